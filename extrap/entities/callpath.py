@@ -6,6 +6,7 @@
 # See the LICENSE file in the base directory for details.
 
 import itertools
+from weakref import WeakValueDictionary
 
 from extrap.util.serialization_schema import make_value_schema
 
@@ -19,6 +20,9 @@ class Callpath:
     """
     ID_COUNTER = itertools.count()
     EMPTY: 'Callpath'
+    # the name determines the hash, it must not be changed after the callpath is created
+    __slots__ = ('name', 'id', '_hash', '__weakref__')
+    _interned: 'WeakValueDictionary[str, Callpath]' = WeakValueDictionary()
 
     def __init__(self, name):
         """
@@ -26,9 +30,24 @@ class Callpath:
         """
         self.name = name
         self.id = next(Callpath.ID_COUNTER)
+        self._hash = hash(name)
+
+    @classmethod
+    def intern(cls, name) -> 'Callpath':
+        """
+        Returns the canonical callpath with the given name, so that equal callpaths are represented by the same object.
+        """
+        callpath = cls._interned.get(name)
+        if callpath is None:
+            callpath = cls._interned.setdefault(name, cls(name))
+        return callpath
 
     def __hash__(self):
-        return hash(self.name)
+        return self._hash
+
+    def __reduce__(self):
+        # the hash of a string differs between processes, therefore, it must be recomputed
+        return Callpath, (self.name,)
 
     def __eq__(self, other):
         if not isinstance(other, Callpath):
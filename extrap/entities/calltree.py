@@ -5,11 +5,55 @@
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
-from typing import cast
+from typing import cast, Dict, Optional, List
 
 from extrap.entities.callpath import Callpath
 
 
+class _ChildList(list):
+    """
+    List of the children of a node, which keeps an index of the children by their names.
+    Appended children are added to the index, all other modifications rebuild the index on the next lookup.
+    """
+
+    def __init__(self, childs=()):
+        super().__init__(childs)
+        self._childs_by_name: Optional[Dict[str, Node]] = None
+
+    def find(self, name) -> Optional['Node']:
+        if self._childs_by_name is None:
+            self._childs_by_name = {}
+            for child in self:
+                self._childs_by_name.setdefault(child.name, child)
+        return self._childs_by_name.get(name)
+
+    def append(self, child):
+        super().append(child)
+        if self._childs_by_name is not None:
+            self._childs_by_name.setdefault(child.name, child)
+
+    def _invalidating(method):
+        def invalidate(self, *args, **kwargs):
+            self._childs_by_name = None
+            return method(self, *args, **kwargs)
+
+        invalidate.__name__ = method.__name__
+        return invalidate
+
+    __setitem__ = _invalidating(list.__setitem__)
+    __delitem__ = _invalidating(list.__delitem__)
+    __iadd__ = _invalidating(list.__iadd__)
+    __imul__ = _invalidating(list.__imul__)
+    extend = _invalidating(list.extend)
+    insert = _invalidating(list.insert)
+    pop = _invalidating(list.pop)
+    remove = _invalidating(list.remove)
+    clear = _invalidating(list.clear)
+    sort = _invalidating(list.sort)
+    reverse = _invalidating(list.reverse)
+    del _invalidating
+
+
 class Node:
 
     def __init__(self, name: str, path: Callpath):
@@ -17,24 +61,29 @@ class Node:
         self.childs = []
         self.path = path
 
+    @property
+    def childs(self) -> List['Node']:
+        return self._childs
+
+    @childs.setter
+    def childs(self, childs):
+        # the children are indexed by their names, see find_child
+        self._childs = _ChildList(childs)
+
     def add_child_node(self, child_node):
-        self.childs.append(child_node)
+        self._childs.append(child_node)
 
     def get_childs(self):
         return self.childs
 
-    def find_child(self, child_node_name):
-        for child in self.childs:
-            if child.name == child_node_name:
-                return child
-        return None
+    def find_child(self, child_node_name) -> Optional['Node']:
+        """
+        Returns the first child with the given name or None, if no child has the name.
+        """
+        return self._childs.find(child_node_name)
 
     def child_exists(self, child_node_name):
-        for i in range(len(self.childs)):
-            child_name = self.childs[i].name
-            if child_name == child_node_name:
-                return True
-        return False
+        return self.find_child(child_node_name) is not None
 
     def __repr__(self):
         if self.childs:
@@ -69,20 +118,13 @@ class CallTree(Node):
         self.childs.append(node)
 
     def get_node(self, node_name):
-        for i in range(len(self.childs)):
-            name = self.childs[i].name
-            if name == node_name:
-                return self.childs[i]
+        return self.find_child(node_name)
 
     def get_nodes(self):
         return self.childs
 
     def node_exist(self, name):
-        for i in range(len(self.childs)):
-            node = self.childs[i]
-            if node.name == name:
-                return True
-        return False
+        return self.find_child(name) is not None
 
     def print_tree(self):
         level = ""
@@ -1,12 +1,13 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
 import itertools
-from typing import Union, Iterable
+from typing import Union, Iterable, Tuple
+from weakref import WeakValueDictionary
 
 from extrap.util.serialization_schema import make_value_schema
 
@@ -19,17 +20,35 @@ class Coordinate:
     Counter for global coordinate ids
     """
     ID_COUNTER = itertools.count()
+    __slots__ = ('_values', 'id', '_hash', '__weakref__')
+    _interned: 'WeakValueDictionary[Tuple[float, ...], Coordinate]' = WeakValueDictionary()
 
     def __init__(self, *parts: Union[Iterable[float], float]):
         """
         Initialize the coordinate object.
         """
+        self._values = self._to_values(parts)
+        self._hash = hash(self._values)
+        self.id = next(Coordinate.ID_COUNTER)
+
+    @staticmethod
+    def _to_values(parts) -> Tuple[float, ...]:
         if len(parts) == 1 and isinstance(parts[0], Iterable):
-            self._values = tuple(parts[0])
+            return tuple(parts[0])
         else:
-            self._values = parts
+            return parts
 
-        self.id = next(Coordinate.ID_COUNTER)
+    @classmethod
+    def intern(cls, *parts: Union[Iterable[float], float]) -> 'Coordinate':
+        """
+        Returns the canonical coordinate with the given values, so that equal coordinates are represented by the same
+        object. The parameters are the same as for the constructor.
+        """
+        values = cls._to_values(parts)
+        coordinate = cls._interned.get(values)
+        if coordinate is None:
+            coordinate = cls._interned.setdefault(values, cls(values))
+        return coordinate
 
     @property
     def dimensions(self):
@@ -57,12 +76,16 @@ class Coordinate:
         return f'Coordinate{str(self._values)}'
 
     def __hash__(self):
-        return hash(self._values)
+        return self._hash
+
+    def __reduce__(self):
+        # only the values are stored, the hash is recomputed when the coordinate is restored
+        return Coordinate, (self._values,)
 
     def __eq__(self, other):
         if not isinstance(other, Coordinate):
             return NotImplemented
-        return self is other or self._values == other._values
+        return self is other or (self._hash == other._hash and self._values == other._values)
 
     def __iter__(self):
         return iter(self._values)
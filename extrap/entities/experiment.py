@@ -8,7 +8,7 @@
 import logging
 import warnings
 from itertools import chain
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
 from marshmallow import fields, validate, pre_load
 from packaging.version import Version
@@ -18,6 +18,7 @@ from extrap.entities.callpath import Callpath, CallpathSchema
 from extrap.entities.calltree import CallTree
 from extrap.entities.coordinate import Coordinate
 from extrap.entities.measurement import Measurement, MeasurementSchema
+from extrap.entities.measurement_store import MeasurementStore, MeasurementsView
 from extrap.entities.metric import Metric, MetricSchema
 from extrap.entities.parameter import Parameter, ParameterSchema
 from extrap.fileio import io_helper
@@ -40,6 +41,8 @@ class Experiment:
         self.call_tree: CallTree = None
         self.modelers: List[ModelGenerator] = []
         self.scaling = None
+        # index of the measurements of each callpath and metric by their coordinates, see find_measurement
+        self._measurement_index: Dict[Tuple[Callpath, Metric], _SeriesIndex] = {}
 
     def add_modeler(self, modeler):
         self.modelers.append(modeler)
@@ -56,32 +59,71 @@ class Experiment:
     def add_callpath(self, callpath: Callpath):
         self.callpaths.append(callpath)
 
-    @deprecated("Use property directly.")
+    @deprecated("Use find_measurement instead.")
     def get_measurement(self, coordinate_id, callpath_id, metric_id):
         callpath = self.callpaths[callpath_id]
         metric = self.metrics[metric_id]
         coordinate = self.coordinates[coordinate_id]
+        return self.find_measurement(callpath, metric, coordinate)
 
-        try:
-            measurements = self.measurements[(callpath, metric)]
-        except KeyError as e:
+    def find_measurement(self, callpath: Callpath, metric: Metric, coordinate: Coordinate) -> Optional[Measurement]:
+        """
+        Returns the measurement of the callpath and metric at the coordinate, or None if there is no measurement.
+        If there are multiple measurements at the coordinate, the first one is returned.
+
+        The measurements are looked up in an index of their positions. Appended measurements are added to the index.
+        The index is rebuilt if the list of measurements is replaced or shortened, or if the measurement at an indexed
+        position no longer has the coordinate. A measurement that replaces another one in the list at a coordinate that
+        was not present before is only found after the list is assigned again.
+        """
+        store = self.measurement_store
+        if store is not None:
+            return store.measurement(callpath, metric, coordinate)
+        key = (callpath, metric)
+        measurements = self.measurements.get(key)
+        if measurements is None:
             return None
+        index = self._measurement_index.get(key)
+        if index is None or index.series is not measurements:
+            index = self._measurement_index[key] = _SeriesIndex(measurements)
+        return index.find(coordinate)
 
-        for measurement in measurements:
-            if measurement.coordinate == coordinate:
-                return measurement
+    @property
+    def measurement_store(self) -> Optional[MeasurementStore]:
+        """
+        The columnar store of the measurements, if the experiment uses columnar measurements.
+        """
+        if isinstance(self.measurements, MeasurementsView):
+            return self.measurements.store
         return None
 
+    def use_columnar_measurements(self) -> MeasurementStore:
+        """
+        Moves the measurements into a MeasurementStore, afterwards measurements is a view of the store.
+        The view creates the measurement objects when a series is accessed, see MeasurementsView.
+        """
+        store = self.measurement_store
+        if store is None:
+            store = MeasurementStore.from_measurements(self.measurements)
+            self.measurements = store.view()
+        return store
+
     def add_measurement(self, measurement: Measurement):
         key = (measurement.callpath,
                measurement.metric)
-        if key in self.measurements:
+        if isinstance(self.measurements, MeasurementsView):
+            self.measurements.store.add_measurement(measurement)
+        elif key in self.measurements:
             self.measurements[key].append(measurement)
         else:
             self.measurements[key] = [measurement]
 
     def clear_measurements(self):
-        self.measurements = {}
+        if isinstance(self.measurements, MeasurementsView):
+            self.measurements = MeasurementStore().view()
+        else:
+            self.measurements = {}
+        self._measurement_index.clear()
 
     def debug(self):
         if not logging.getLogger().isEnabledFor(logging.DEBUG):
@@ -106,6 +148,45 @@ class Experiment:
                 f"Measurement {i}: {metric}, {callpath}, {coordinate}: {value_mean} (mean), {value_median} (median)")
 
 
+class _SeriesIndex:
+    """
+    Index of the positions of the measurements of one callpath and metric by their coordinates.
+    """
+    __slots__ = ('series', 'length', 'positions')
+
+    def __init__(self, series: List[Measurement]):
+        self.series = series
+        self.length = 0
+        self.positions: Dict[Coordinate, int] = {}
+
+    def find(self, coordinate: Coordinate) -> Optional[Measurement]:
+        if self.length != len(self.series):
+            self._update()
+        position = self.positions.get(coordinate)
+        if position is None:
+            return None
+        measurement = self.series[position]
+        if measurement.coordinate != coordinate:
+            # the measurement was replaced in the list
+            self._rebuild()
+            return self.find(coordinate)
+        return measurement
+
+    def _update(self):
+        if self.length > len(self.series):
+            # measurements were removed
+            self._rebuild()
+            return
+        for position in range(self.length, len(self.series)):
+            self.positions.setdefault(self.series[position].coordinate, position)
+        self.length = len(self.series)
+
+    def _rebuild(self):
+        self.positions.clear()
+        self.length = 0
+        self._update()
+
+
 class ExperimentSchema(Schema):
     _version_ = fields.Constant(extrap.__version__, data_key=extrap.__title__)
     scaling = fields.Str(required=False, allow_none=True, validate=validate.OneOf(['strong', 'weak']))
@@ -5,23 +5,27 @@
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
-from typing import List, Mapping, Union
+from typing import List, Mapping, Union, Optional, Sequence
 
 import numpy
 from marshmallow import fields
 
 from extrap.entities.parameter import Parameter
-from extrap.entities.terms import CompoundTerm, MultiParameterTerm, CompoundTermSchema, MultiParameterTermSchema
+from extrap.entities.terms import CompoundTerm, MultiParameterTerm, CompoundTermSchema, MultiParameterTermSchema, \
+    SimpleTerm, CompiledFunctionDependency, _InvalidatingAttribute, _InvalidatingListAttribute
 from extrap.util.serialization_schema import BaseSchema, NumberField
 
 
-class Function:
+class Function(CompiledFunctionDependency):
+    constant_coefficient = _InvalidatingAttribute()
+    compound_terms: List[CompoundTerm] = _InvalidatingListAttribute()
+
     def __init__(self, *compound_terms: CompoundTerm):
         """
         Initialize a Function object.
         """
         self.constant_coefficient = 0
-        self.compound_terms: List[CompoundTerm] = list(compound_terms)
+        self.compound_terms = compound_terms
 
     def add_compound_term(self, compound_term):
         """
@@ -54,6 +58,19 @@ class Function:
             function_value += t.evaluate(parameter_value)
         return function_value
 
+    def compile(self) -> 'CompiledFunction':
+        """
+        Returns an evaluator for the function that evaluates many points at once using vectorized operations.
+        The evaluator is cached until a coefficient or term of the function is assigned or modified.
+        """
+        compiled: Optional[CompiledFunction] = self.__dict__.get('_compiled')
+        if compiled is None:
+            compiled = CompiledFunction(self)
+            self._compiled = compiled
+            for part in _parts(self):
+                part._add_compiled_function(self)
+        return compiled
+
     def to_string(self, *parameters: Union[str, Parameter]):
         """
         Return a string representation of the function.
@@ -82,7 +99,10 @@ class Function:
         elif self is other:
             return True
         else:
-            return self.__dict__ == other.__dict__
+            return self._state() == other._state()
+
+    def _state(self):
+        return self.__getstate__()
 
 
 class ConstantFunction(Function):
@@ -127,6 +147,158 @@ class MultiParameterFunction(Function):
         return f"MultiParameterFunction({self.to_string()})"
 
 
+class CompiledFunction:
+    """
+    Flat representation of a function that evaluates many points at once using vectorized operations.
+
+    The simple terms of the function are evaluated once for each distinct combination of parameter, type and exponent,
+    afterwards, the terms are computed as products of the coefficients and the evaluated simple terms.
+    The operations are performed in the same order as in Function.evaluate, therefore, the results are identical.
+    """
+
+    def __init__(self, function: Function):
+        """
+        :param function: The function that is compiled.
+        """
+        constant_coefficient, terms = _snapshot(function)
+        self.constant_coefficient = float(constant_coefficient)
+
+        # each term is a product of its coefficient and the compound terms of its parameters,
+        # each compound term is a product of its coefficient and its simple terms
+        factors = {}
+        self._coefficients = []
+        term_structures = []
+        for coefficient, parameter_terms in terms:
+            self._coefficients.append(coefficient)
+            term_structure = []
+            for parameter, compound_coefficient, simple_terms in parameter_terms:
+                self._coefficients.append(compound_coefficient)
+                term_structure.append(tuple(
+                    factors.setdefault((parameter, term_type == "logarithm", float(exponent)), len(factors))
+                    for term_type, exponent in simple_terms))
+            term_structures.append(tuple(term_structure))
+        self._term_structures = tuple(term_structures)
+        # functions with the same structure differ only in their coefficients
+        self.structure = (tuple(factors), self._term_structures)
+
+        self._logarithmic_parameters = sorted({p for p, is_log, _ in factors if is_log})
+        # the logarithms of the parameter values are stored in front of the parameter values
+        self._factors = [(self._logarithmic_parameters.index(p) if is_log else len(self._logarithmic_parameters) + p,
+                          exponent) for p, is_log, exponent in factors]
+
+    def evaluate(self, points) -> numpy.ndarray:
+        """
+        Evaluates the function for an array of points.
+
+        :param points: An array with one row of values for each parameter and one column for each point.
+                       Single-parameter functions also accept a one-dimensional array of parameter values.
+        :return: An array with the value of the function for each point.
+        """
+        points = _as_points(points)
+        result = numpy.full(points.shape[1], self.constant_coefficient)
+        if not self._term_structures:
+            return result
+        return self._add_terms(result, self._evaluate_factors(points), self._coefficients)
+
+    def _evaluate_factors(self, points: numpy.ndarray) -> numpy.ndarray:
+        if self._logarithmic_parameters:
+            bases = numpy.concatenate((numpy.log2(points[self._logarithmic_parameters]), points))
+        else:
+            bases = points
+        factors = numpy.empty((len(self._factors), points.shape[1]))
+        for factor, (base, exponent) in zip(factors, self._factors):
+            numpy.float_power(bases[base], exponent, out=factor)
+        return factors
+
+    def _add_terms(self, result, factors, coefficients):
+        # the coefficients are either scalars or column vectors, if functions with the same structure are evaluated
+        coefficients = iter(coefficients)
+        for term_structure in self._term_structures:
+            term_value = next(coefficients)
+            for indices in term_structure:
+                value = next(coefficients)
+                for i in indices:
+                    value = value * factors[i]
+                term_value = term_value * value
+            result += term_value
+        return result
+
+
+def evaluate_functions(functions: Sequence[CompiledFunction], points) -> numpy.ndarray:
+    """
+    Evaluates several compiled functions for an array of points.
+    Functions with the same structure share the evaluation of their simple terms and are evaluated together.
+    The results are identical to the results of evaluating each function separately.
+
+    :param functions: The compiled functions.
+    :param points: An array with one row of values for each parameter and one column for each point.
+    :return: An array with one row for each function and one column for each point.
+    """
+    points = _as_points(points)
+    result = numpy.empty((len(functions), points.shape[1]))
+    groups = {}
+    for i, function in enumerate(functions):
+        groups.setdefault(function.structure, []).append(i)
+    for indices in groups.values():
+        first = functions[indices[0]]
+        constant_coefficients = numpy.array([functions[i].constant_coefficient for i in indices])
+        values = numpy.repeat(constant_coefficients[:, None], points.shape[1], axis=1)
+        if first.structure[1]:
+            coefficients = numpy.array([functions[i]._coefficients for i in indices], dtype=float)
+            first._add_terms(values, first._evaluate_factors(points), coefficients.T[:, :, None])
+        result[indices] = values
+    return result
+
+
+def _snapshot(function: Function) -> tuple:
+    """
+    Returns an immutable copy of the coefficients and terms of the function, with the shape
+    (constant coefficient, ((term coefficient, ((parameter, compound term coefficient, ((type, exponent), ...)), ...)),
+    ...)). Single-parameter terms are treated like multi-parameter terms of the first parameter with coefficient 1.
+    """
+    terms = []
+    for term in function.compound_terms:
+        if isinstance(term, MultiParameterTerm):
+            coefficient, parameter_term_pairs = term.coefficient, term.parameter_term_pairs
+        else:
+            coefficient, parameter_term_pairs = 1, [(0, term)]
+        parameter_terms = []
+        for parameter, parameter_term in parameter_term_pairs:
+            if isinstance(parameter_term, SimpleTerm):
+                compound_coefficient, simple_terms = 1, [parameter_term]
+            else:
+                compound_coefficient, simple_terms = parameter_term.coefficient, parameter_term.simple_terms
+            parameter_terms.append((parameter, compound_coefficient,
+                                    tuple((t.term_type, t.exponent) for t in simple_terms)))
+        terms.append((coefficient, tuple(parameter_terms)))
+    return function.constant_coefficient, tuple(terms)
+
+
+def _parts(function: Function):
+    """
+    Yields the function and all terms it contains.
+    """
+    yield function
+    for term in function.compound_terms:
+        yield term
+        if isinstance(term, MultiParameterTerm):
+            parameter_terms = [parameter_term for _, parameter_term in term.parameter_term_pairs]
+        else:
+            parameter_terms = [term]
+        for parameter_term in parameter_terms:
+            if parameter_term is not term:
+                yield parameter_term
+            if isinstance(parameter_term, CompoundTerm):
+                yield from parameter_term.simple_terms
+
+
+def _as_points(points) -> numpy.ndarray:
+    points = numpy.asarray(points, dtype=float)
+    if points.ndim == 1:
+        points = points.reshape(1, -1)
+    return points
+
+
 class FunctionSchema(BaseSchema):
     constant_coefficient = NumberField()
     compound_terms: List[CompoundTerm] = fields.List(fields.Nested(CompoundTermSchema))
@@ -13,6 +13,8 @@ from marshmallow import fields
 
 from extrap.entities.functions import Function, MultiParameterFunction, FunctionSchema
 from extrap.entities.measurement import Measurement
+from extrap.util.least_squares import pseudo_inverse, leave_one_out_coefficients, leave_one_out_minimum, \
+    LEVERAGE_TOLERANCE
 from extrap.util.serialization_schema import BaseSchema, NumberField
 
 
@@ -116,7 +118,7 @@ class Hypothesis:
             actual = numpy.array([m.mean for m in measurements])
 
         if measurements[0].coordinate.dimensions > 1:
-            points = numpy.array([m.coordinate.as_tuple() for m in measurements]).T
+            points = coordinates_as_array(measurements)
         else:
             points = numpy.array([m.coordinate[0] for m in measurements])
 
@@ -136,6 +138,26 @@ class Hypothesis:
             return self.__dict__ == other.__dict__
 
 
+def coordinates_as_array(measurements: Sequence[Measurement]) -> numpy.ndarray:
+    """
+    Returns the coordinates of the measurements as float array with the shape (dimensions, points).
+    """
+    return numpy.array([m.coordinate.as_tuple() for m in measurements], dtype=float).T
+
+
+def sequential_sum(values: numpy.ndarray, axis=None):
+    """
+    Sums the values one after another like a loop, unlike numpy.sum, which uses pairwise summation.
+    """
+    if axis is None:
+        if len(values) == 0:
+            return 0
+        return numpy.cumsum(values)[-1]
+    if values.shape[axis] == 0:
+        return numpy.sum(values, axis=axis)
+    return numpy.take(numpy.cumsum(values, axis=axis), -1, axis=axis)
+
+
 MAX_HYPOTHESIS = Hypothesis(Function(), False)
 MAX_HYPOTHESIS._RSS = float('inf')
 MAX_HYPOTHESIS._rRSS = float('inf')
@@ -176,30 +198,52 @@ class ConstantHypothesis(Hypothesis):
         """
         Computes the cost of the constant hypothesis using all data points.
         """
-        smape = 0
-        for measurement in measurements:
-            predicted = self.function.constant_coefficient
-            if self._use_median:
-                actual = measurement.median
-            else:
-                actual = measurement.mean
+        actual = numpy.array([m.value(self._use_median) for m in measurements], dtype=float)
+        rss, rrss, smape, re = constant_costs(actual[numpy.newaxis, :],
+                                              numpy.array([self.function.constant_coefficient], dtype=float))
+        self.set_costs(rss[0], rrss[0], re[0], smape[0])
 
-            difference = predicted - actual
-            self._RSS += difference * difference
-            if actual != 0:
-                relative_difference = difference / actual
-                self._rRSS += relative_difference * relative_difference
+    def set_costs(self, rss, rrss, re, smape):
+        """
+        Sets the costs of the constant hypothesis that were computed by constant_costs, e.g., for several
+        hypotheses at once.
+        """
+        self._RSS += rss
+        self._rRSS += rrss
+        if not numpy.isnan(re):
+            self._RE = re
+        self._SMAPE = smape
+        self._costs_are_calculated = True
 
-                absolute_error = numpy.abs(difference)
-                relative_error = absolute_error / actual
-                self._RE = numpy.mean(relative_error)
 
-            abssum = abs(actual) + abs(predicted)
-            if abssum != 0:
-                smape += abs(difference) / abssum * 2
+def constant_costs(actual: numpy.ndarray, predicted: numpy.ndarray):
+    """
+    Computes the costs of constant functions for several measurement series with the same number of points at once.
+    The results are identical to adding the costs of the points one after another.
 
-        self._SMAPE = smape / len(measurements) * 100
-        self._costs_are_calculated = True
+    :param actual: The measured values with the shape (series, points).
+    :param predicted: The constant value of each series.
+    :return: The RSS, rRSS, SMAPE and RE of each series. Like in ConstantHypothesis, the RE is the relative error of
+             the last point whose value is not zero, it is NaN if all values are zero.
+    """
+    predicted = predicted[:, numpy.newaxis]
+    difference = predicted - actual
+    absolute_difference = numpy.abs(difference)
+    is_not_zero = actual != 0
+    abssum = numpy.abs(actual) + numpy.abs(predicted)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        relative_difference = numpy.where(is_not_zero, difference / actual, 0)
+        relative_error = absolute_difference / actual
+        smape = numpy.where(abssum != 0, absolute_difference / abssum * 2, 0)
+
+    rss = sequential_sum(difference * difference, axis=1)
+    rrss = sequential_sum(relative_difference * relative_difference, axis=1)
+    smape = sequential_sum(smape, axis=1) / actual.shape[1] * 100
+
+    last_not_zero = actual.shape[1] - 1 - numpy.argmax(is_not_zero[:, ::-1], axis=1)
+    re = numpy.take_along_axis(relative_error, last_not_zero[:, numpy.newaxis], axis=1)[:, 0]
+    re[~numpy.any(is_not_zero, axis=1)] = numpy.nan
+    return rss, rrss, smape, re
 
 
 class SingleParameterHypothesis(Hypothesis):
@@ -236,6 +280,59 @@ class SingleParameterHypothesis(Hypothesis):
                            len(training_measurements) * 100
         self._costs_are_calculated = True
 
+    def compute_cost_press(self, measurements: Sequence[Measurement], phi) -> bool:
+        """
+        Computes the cost for the single-parameter model using leave one out crossvalidation in closed form.
+
+        The model is factorized only once. The coefficients for each left out point are derived from the fit using
+        all points and the diagonal of the hat matrix, like it is done for the prediction residual error sum of
+        squares (PRESS). The results are the same as repeatedly calling compute_coefficients,
+        clean_constant_coefficient and compute_cost_leave_one_out.
+        Returns False, without computing the cost, if the closed form cannot be used, because the least-squares
+        problem is rank deficient or one point has a leverage of one.
+        """
+        values = numpy.array([m.value(self._use_median) for m in measurements])
+        points = numpy.array([m.coordinate[0] for m in measurements])
+        design = self._design_matrix(points)
+
+        pinv, leverage, rank_deficient = pseudo_inverse(design)
+        if rank_deficient or numpy.any(1 - leverage <= LEVERAGE_TOLERANCE):
+            return False
+
+        values = values.reshape(-1, 1)
+        coefficients = leave_one_out_coefficients(design, pinv, leverage, pinv @ values, values)[:, :, 0]
+
+        # check if the constant coefficients should actually be 0
+        minimum = leave_one_out_minimum(values)[:, 0]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            relative = numpy.where(minimum == 0, numpy.abs(coefficients[:, 0]),
+                                   numpy.abs(coefficients[:, 0] / minimum))
+        coefficients[relative < phi, 0] = 0
+
+        predicted = numpy.sum(design * coefficients, axis=1)
+        self._RSS, self._rRSS, self._SMAPE, self._RE = self.leave_one_out_cost(predicted, values[:, 0])
+        self._costs_are_calculated = True
+        return True
+
+    @staticmethod
+    def leave_one_out_cost(predicted, actual, axis=0):
+        """
+        Computes RSS, rRSS, SMAPE and RE from the predictions for the left out points along the given axis,
+        like it is done by compute_cost_leave_one_out.
+        The actual values are broadcast against the predictions.
+        """
+        n = predicted.shape[axis]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            difference = predicted - actual
+            rss = numpy.sum(difference * difference, axis=axis)
+            relative_difference = numpy.where(actual != 0, difference / actual, 0)
+            re = numpy.sum(numpy.abs(relative_difference) / n, axis=axis)
+            rrss = numpy.sum(relative_difference * relative_difference, axis=axis)
+            abssum = numpy.abs(actual) + numpy.abs(predicted)
+            smape = numpy.sum(numpy.where(abssum != 0, (numpy.abs(difference) / abssum * 2) / (n - 1) * 100, 0),
+                              axis=axis)
+        return rss, rrss, smape, re
+
     def compute_cost(self, measurements: Sequence[Measurement]):
         points = numpy.array([m.coordinate[0] for m in measurements])
         predicted = self.function.evaluate(points)
@@ -282,14 +379,8 @@ class SingleParameterHypothesis(Hypothesis):
             b_list = numpy.array([m.mean for m in measurements])
         points = numpy.array([m.coordinate[0] for m in measurements])
 
-        a_list = [numpy.ones((1, len(points)))]
-        for compound_term in self.function.compound_terms:
-            compound_term.coefficient = 1
-            compound_term_value = compound_term.evaluate(points)
-            a_list.append(compound_term_value.reshape(1, -1))
-
         # solving the lgs for X to get the coefficients
-        A = numpy.concatenate(a_list, axis=0).T
+        A = self._design_matrix(points)
         B = b_list
 
         X, _, _, _ = numpy.linalg.lstsq(A, B, None)
@@ -300,6 +391,17 @@ class SingleParameterHypothesis(Hypothesis):
         for i, compound_term in enumerate(self.function.compound_terms):
             compound_term.coefficient = X[i + 1]
 
+    def _design_matrix(self, points):
+        """
+        Creates the matrix of the linear least-squares problem, with one row per point and one column per coefficient.
+        """
+        a_list = [numpy.ones((1, len(points)))]
+        for compound_term in self.function.compound_terms:
+            compound_term.coefficient = 1
+            compound_term_value = compound_term.evaluate(points)
+            a_list.append(compound_term_value.reshape(1, -1))
+        return numpy.concatenate(a_list, axis=0).T
+
 
 class MultiParameterHypothesis(Hypothesis):
     """
@@ -317,51 +419,39 @@ class MultiParameterHypothesis(Hypothesis):
         """
         super().__init__(function, use_median)
 
-    def compute_cost(self, measurements):
+    def compute_cost(self, measurements: Sequence[Measurement], coordinates: numpy.ndarray = None):
         """
         Compute the cost for a multi parameter hypothesis.
-        """
-        self._RSS = 0
-        self._rRSS = 0
-        smape = 0
-        re_sum = 0
-
-        for measurement in measurements:
-            coordinate = measurement.coordinate
-            parameter_value_pairs = {}
-            for parameter, value in enumerate(coordinate):
-                parameter_value_pairs[parameter] = float(value)
-
-            predicted = self.function.evaluate(parameter_value_pairs)
-            # print(predicted)
-
-            actual = measurement.value(self._use_median)
 
-            # print(actual)
+        :param measurements: The measurements used for computing the cost.
+        :param coordinates: The coordinates of the measurements as array with the shape (dimensions, points),
+                            see coordinates_as_array. It is created from the measurements if it is not given.
+        """
+        if coordinates is None:
+            coordinates = coordinates_as_array(measurements)
+        predicted = self.function.evaluate(coordinates)
+        actual = numpy.array([m.value(self._use_median) for m in measurements])
 
+        with numpy.errstate(divide='ignore', invalid='ignore'):
             difference = predicted - actual
-            # absolute_difference = abs(difference)
-            abssum = abs(actual) + abs(predicted)
+            abssum = numpy.abs(actual) + numpy.abs(predicted)
 
             # calculate relative error
-            absolute_error = abs(predicted - actual)
-            relative_error = absolute_error / actual
-            re_sum = re_sum + relative_error
-
-            self._RSS += difference * difference
-
-            relativeDifference = difference / actual
-            self._rRSS += relativeDifference * relativeDifference
+            relative_error = numpy.abs(difference) / actual
+            relative_difference = difference / actual
 
-            if abssum != 0.0:
-                # This `if` condition prevents a division by zero, but it is correct: if sum is 0,
-                # both `actual` and `predicted` must have been 0, and in that case the error at this point is 0,
-                # so we don't need to add anything.
-                smape += abs(difference) / abssum * 2
+            # This condition prevents a division by zero, but it is correct: if sum is 0,
+            # both `actual` and `predicted` must have been 0, and in that case the error at this point is 0,
+            # so we don't need to add anything.
+            nonzero = abssum != 0.0
+            smape = numpy.abs(difference[nonzero]) / abssum[nonzero] * 2
 
+        # the sums are computed in order of the measurements, so that they are identical to a summation in a loop
+        self._RSS = sequential_sum(difference * difference)
+        self._rRSS = sequential_sum(relative_difference * relative_difference)
         # times 100 for percentage error
-        self._RE = re_sum / len(measurements)
-        self._SMAPE = smape / len(measurements) * 100
+        self._RE = sequential_sum(relative_error) / len(measurements)
+        self._SMAPE = sequential_sum(smape) / len(measurements) * 100
         self._costs_are_calculated = True
 
     def compute_adjusted_rsquared(self, TSS, measurements):
@@ -378,30 +468,32 @@ class MultiParameterHypothesis(Hypothesis):
         degrees_freedom = len(measurements) - counter - 1
         self._AR2 = (1.0 - (1.0 - adjR) * (len(measurements) - 1.0) / degrees_freedom)
 
-    def compute_coefficients(self, measurements):
+    def compute_coefficients(self, measurements: Sequence[Measurement], coordinates: numpy.ndarray = None,
+                             term_values: Sequence[numpy.ndarray] = None):
         """
         Computes the coefficients of the function using the least squares solution.
+
+        :param measurements: The measurements used for computing the coefficients.
+        :param coordinates: The coordinates of the measurements as array with the shape (dimensions, points),
+                            see coordinates_as_array. It is created from the measurements if it is not given.
+        :param term_values: The values of the compound terms of the function with a coefficient of one, evaluated
+                            at the coordinates. If it is not given, the terms are evaluated.
         """
         # creating a numpy matrix representation of the lgs
-        a_list = []
-        b_list = []
-
         self.function.reset_coefficients()
 
-        for measurement in measurements:
-            value = measurement.value(self._use_median)
-            list_element = [1]  # 1 for constant coefficient
-            for multi_parameter_term in self.function:
-                coordinate = measurement.coordinate
-                multi_parameter_term_value = multi_parameter_term.evaluate(coordinate)
-                list_element.append(multi_parameter_term_value)
-            a_list.append(list_element)
-            b_list.append(value)
-            # print(str(list_element)+"[x]=["+str(value)+"]")
-            # logging.debug(str(list_element)+"[x]=["+str(value)+"]")
+        a_list = [numpy.ones(len(measurements))]  # 1 for constant coefficient
+        if term_values is None:
+            if coordinates is None:
+                coordinates = coordinates_as_array(measurements)
+            # the evaluated terms are shared with all hypotheses using the same coordinates
+            term_values = [multi_parameter_term.evaluate(coordinates) for multi_parameter_term in self.function]
+        for multi_parameter_term_value in term_values:
+            a_list.append(numpy.broadcast_to(multi_parameter_term_value, len(measurements)))
+        b_list = [measurement.value(self._use_median) for measurement in measurements]
 
         # solving the lgs for coeffs to get the coefficients
-        A = numpy.array(a_list)
+        A = numpy.stack(a_list, axis=-1)
         B = numpy.array(b_list)
         try:
             coeffs, _, _, _ = numpy.linalg.lstsq(A, B, None)
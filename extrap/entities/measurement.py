@@ -5,6 +5,8 @@
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
+from typing import Optional, Union, Sequence, List
+
 import numpy as np
 from marshmallow import fields, post_load
 
@@ -17,31 +19,181 @@ from extrap.util.serialization_schema import Schema, NumberField
 class Measurement:
     """
     This class represents a measurement, i.e. the value measured for a specific metric and callpath at a coordinate.
+
+    The statistics of the measured values can be computed lazily: in this case, only the value used by the modelers
+    is computed when the measurement is created, the other statistics are computed on their first access.
     """
+    __slots__ = ('coordinate', 'callpath', 'metric', '_values', '_median', '_mean', '_minimum', '_maximum', '_std')
 
-    def __init__(self, coordinate: Coordinate, callpath: Callpath, metric: Metric, values):
+    def __init__(self, coordinate: Coordinate, callpath: Callpath, metric: Metric, values,
+                 use_median: Optional[bool] = None):
         """
         Initialize the Measurement object.
+
+        :param values: The measured values, e.g., the values of all repetitions.
+        :param use_median: If it is given, only the median (True) or the mean (False) is computed immediately,
+                           the other statistics are computed on their first access.
         """
         self.coordinate: Coordinate = coordinate
         self.callpath: Callpath = callpath
         self.metric: Metric = metric
+        self._median = self._mean = self._minimum = self._maximum = self._std = None
+        self._values = None
         if values is None:
             return
         values = np.array(values)
-        self.median: float = np.median(values)
-        self.mean: float = np.mean(values)
-        self.minimum: float = np.min(values)
-        self.maximum: float = np.max(values)
-        self.std: float = np.std(values)
+        if use_median is None:
+            self._median = np.median(values)
+            self._mean = np.mean(values)
+            self._minimum = np.min(values)
+            self._maximum = np.max(values)
+            self._std = np.std(values)
+        else:
+            self._values = values
+            if use_median:
+                self._median = np.median(values)
+            else:
+                self._mean = np.mean(values)
+
+    @classmethod
+    def from_repetitions(cls, coordinates: Union[Coordinate, Sequence[Coordinate]],
+                         callpaths: Union[Callpath, Sequence[Callpath]], metrics: Union[Metric, Sequence[Metric]],
+                         repetitions, use_median: Optional[bool] = None) -> List['Measurement']:
+        """
+        Creates many measurements at once, the statistics are computed for all measurements with the same number of
+        values together. The statistics are identical to the statistics computed by the constructor.
+
+        :param coordinates: The coordinate of each measurement or one coordinate for all measurements.
+        :param callpaths: The callpath of each measurement or one callpath for all measurements.
+        :param metrics: The metric of each measurement or one metric for all measurements.
+        :param repetitions: A two-dimensional array or a sequence of sequences with the measured values of each
+                            measurement.
+        :param use_median: See the constructor.
+        """
+        if isinstance(repetitions, np.ndarray) and repetitions.ndim == 2:
+            rows = repetitions
+            groups = {repetitions.shape[1]: range(len(repetitions))}
+        else:
+            rows = [np.asarray(r) for r in repetitions]
+            groups = {}
+            for i, row in enumerate(rows):
+                groups.setdefault(len(row), []).append(i)
+        coordinates = cls._per_measurement(coordinates, Coordinate, len(rows))
+        callpaths = cls._per_measurement(callpaths, Callpath, len(rows))
+        metrics = cls._per_measurement(metrics, Metric, len(rows))
+
+        measurements: List[Optional[Measurement]] = [None] * len(rows)
+        for indices in groups.values():
+            if rows is repetitions:
+                values = np.ascontiguousarray(repetitions)
+            else:
+                values = np.array([rows[i] for i in indices])
+            median = np.median(values, axis=1) if use_median is None or use_median else None
+            mean = np.mean(values, axis=1) if use_median is None or not use_median else None
+            if use_median is None:
+                minimum = np.min(values, axis=1)
+                maximum = np.max(values, axis=1)
+                std = np.std(values, axis=1)
+            for k, i in enumerate(indices):
+                measurement = cls(coordinates[i], callpaths[i], metrics[i], None)
+                if median is not None:
+                    measurement._median = median[k]
+                if mean is not None:
+                    measurement._mean = mean[k]
+                if use_median is None:
+                    measurement._minimum = minimum[k]
+                    measurement._maximum = maximum[k]
+                    measurement._std = std[k]
+                else:
+                    measurement._values = values[k]
+                measurements[i] = measurement
+        return measurements
+
+    @staticmethod
+    def _per_measurement(entities, entity_type, count):
+        if entities is None or isinstance(entities, entity_type):
+            return [entities] * count
+        if len(entities) != count:
+            raise ValueError(f"The number of {entity_type.__name__.lower()}s ({len(entities)}) does not match the "
+                             f"number of measurements ({count}).")
+        return entities
+
+    def _compute_statistics(self):
+        # computes the missing statistics, afterwards the values are no longer needed
+        values = self._values
+        if values is None:
+            return
+        if self._median is None:
+            self._median = np.median(values)
+        if self._mean is None:
+            self._mean = np.mean(values)
+        self._minimum = np.min(values)
+        self._maximum = np.max(values)
+        self._std = np.std(values)
+        self._values = None
+
+    @property
+    def median(self) -> float:
+        if self._median is None:
+            self._compute_statistics()
+        return self._median
+
+    @median.setter
+    def median(self, value: float):
+        self._median = value
+
+    @property
+    def mean(self) -> float:
+        if self._mean is None:
+            self._compute_statistics()
+        return self._mean
+
+    @mean.setter
+    def mean(self, value: float):
+        self._mean = value
+
+    @property
+    def minimum(self) -> float:
+        if self._minimum is None:
+            self._compute_statistics()
+        return self._minimum
+
+    @minimum.setter
+    def minimum(self, value: float):
+        self._minimum = value
+
+    @property
+    def maximum(self) -> float:
+        if self._maximum is None:
+            self._compute_statistics()
+        return self._maximum
+
+    @maximum.setter
+    def maximum(self, value: float):
+        self._maximum = value
+
+    @property
+    def std(self) -> float:
+        if self._std is None:
+            self._compute_statistics()
+        return self._std
+
+    @std.setter
+    def std(self, value: float):
+        self._std = value
 
     def value(self, use_median):
-        return self.median if use_median else self.mean
+        value = self._median if use_median else self._mean
+        if value is None:
+            return self.median if use_median else self.mean
+        return value
 
     def merge(self, other: 'Measurement') -> None:
         """Approximately merges the other measurement into this measurement."""
         if self.coordinate != other.coordinate:
             raise ValueError("Coordinate does not match while merging measurements.")
+        # the merged statistics replace the statistics of the values
+        self._compute_statistics()
         self.median += other.median
         self.mean += other.mean
         self.minimum += other.minimum
@@ -0,0 +1,359 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+from collections.abc import MutableMapping
+from typing import Dict, List, Tuple, Iterable, Mapping, Sequence, Iterator, Optional
+
+import numpy as np
+
+from extrap.entities.callpath import Callpath
+from extrap.entities.coordinate import Coordinate
+from extrap.entities.measurement import Measurement
+from extrap.entities.metric import Metric
+
+# minimum number of callpaths, metrics and coordinates for which space is reserved
+_INITIAL_CAPACITY = 8
+
+
+class MeasurementStore:
+    """
+    Columnar storage of the measurements of an experiment.
+
+    The statistics of all measurements are stored in a dense array with the shape
+    (callpaths, metrics, coordinates, statistics), the callpaths, metrics and coordinates are identified by the
+    integer ids assigned in the order they are added. A mask marks which measurements are present.
+    The arrays grow automatically, if new callpaths, metrics or coordinates are added.
+
+    Each callpath and metric has at most one measurement for each coordinate, adding a second measurement for the
+    same coordinate raises a ValueError. Only the statistics of the measurements are stored, not the measured values.
+    """
+    STATISTICS = ('mean', 'median', 'minimum', 'maximum', 'std')
+
+    def __init__(self):
+        self.callpaths: List[Callpath] = []
+        self.metrics: List[Metric] = []
+        self.coordinates: List[Coordinate] = []
+        self._callpath_ids: Dict[Callpath, int] = {}
+        self._metric_ids: Dict[Metric, int] = {}
+        self._coordinate_ids: Dict[Coordinate, int] = {}
+        # the ids of the callpath and metric of each series in the order the series were added
+        self._series: Dict[Tuple[int, int], None] = {}
+        self._values = np.zeros((0, 0, 0, len(self.STATISTICS)))
+        self._mask = np.zeros((0, 0, 0), dtype=bool)
+
+    @classmethod
+    def from_measurements(cls, measurements: Mapping[Tuple[Callpath, Metric], Sequence[Measurement]]):
+        """
+        Creates a store containing the measurements of the mapping, e.g., the measurements of an experiment.
+        """
+        store = cls()
+        for (callpath, metric), series in measurements.items():
+            store.set_series(callpath, metric, series)
+        return store
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        The statistics of all measurements with the shape (callpaths, metrics, coordinates, statistics).
+        The values of the measurements that are not present are undefined.
+        """
+        return self._values[:len(self.callpaths), :len(self.metrics), :len(self.coordinates)]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """
+        Marks the present measurements, the shape is (callpaths, metrics, coordinates).
+        """
+        return self._mask[:len(self.callpaths), :len(self.metrics), :len(self.coordinates)]
+
+    def statistic(self, name: str) -> np.ndarray:
+        """
+        Returns the values of one statistic of all measurements with the shape (callpaths, metrics, coordinates).
+        """
+        return self.values[..., self.STATISTICS.index(name)]
+
+    def callpath_id(self, callpath: Callpath) -> int:
+        return self._callpath_ids[callpath]
+
+    def metric_id(self, metric: Metric) -> int:
+        return self._metric_ids[metric]
+
+    def coordinate_id(self, coordinate: Coordinate) -> int:
+        return self._coordinate_ids[coordinate]
+
+    def _add_id(self, ids: dict, items: list, item, axis: int) -> int:
+        i = ids.get(item)
+        if i is None:
+            i = ids[item] = len(items)
+            items.append(item)
+            if i >= self._values.shape[axis]:
+                self._grow(axis, max(_INITIAL_CAPACITY, 2 * self._values.shape[axis]))
+        return i
+
+    def _grow(self, axis: int, capacity: int):
+        shape = list(self._values.shape)
+        shape[axis] = capacity
+        values = np.zeros(shape)
+        mask = np.zeros(shape[:-1], dtype=bool)
+        old_shape = tuple(slice(0, s) for s in self._mask.shape)
+        values[old_shape] = self._values
+        mask[old_shape] = self._mask
+        self._values, self._mask = values, mask
+
+    def _ids(self, callpath: Callpath, metric: Metric) -> Tuple[int, int]:
+        callpath_id = self._add_id(self._callpath_ids, self.callpaths, callpath, 0)
+        metric_id = self._add_id(self._metric_ids, self.metrics, metric, 1)
+        self._series.setdefault((callpath_id, metric_id), None)
+        return callpath_id, metric_id
+
+    def add(self, callpath: Callpath, metric: Metric, coordinate: Coordinate, mean: float, median: float,
+            minimum: float, maximum: float, std: float):
+        """
+        Adds the statistics of a measurement.
+        Raises a ValueError if the callpath and metric already have a measurement at the coordinate.
+        """
+        callpath_id, metric_id = self._ids(callpath, metric)
+        coordinate_id = self._add_id(self._coordinate_ids, self.coordinates, coordinate, 2)
+        if self._mask[callpath_id, metric_id, coordinate_id]:
+            raise ValueError(f"There is already a measurement of {callpath} and {metric} at {coordinate}.")
+        self._values[callpath_id, metric_id, coordinate_id] = (mean, median, minimum, maximum, std)
+        self._mask[callpath_id, metric_id, coordinate_id] = True
+
+    def add_values(self, callpath: Callpath, metric: Metric, coordinate: Coordinate, values: Iterable[float]):
+        """
+        Adds a measurement by computing the statistics of the measured values, like Measurement.
+        """
+        values = np.array(values)
+        self.add(callpath, metric, coordinate, np.mean(values), np.median(values), np.min(values), np.max(values),
+                 np.std(values))
+
+    def add_measurement(self, measurement: Measurement):
+        self.add(measurement.callpath, measurement.metric, measurement.coordinate, measurement.mean,
+                 measurement.median, measurement.minimum, measurement.maximum, measurement.std)
+
+    def set_series(self, callpath: Callpath, metric: Metric, measurements: Iterable[Measurement]):
+        """
+        Replaces all measurements of the callpath and metric.
+        The callpath and metric of the measurements are ignored.
+        Raises a ValueError, without changing the stored measurements, if two measurements have the same coordinate.
+        """
+        measurements = list(measurements)
+        coordinates = set()
+        for m in measurements:
+            if m.coordinate in coordinates:
+                raise ValueError(f"There are multiple measurements of {callpath} and {metric} at {m.coordinate}.")
+            coordinates.add(m.coordinate)
+        self.remove(callpath, metric)
+        self._ids(callpath, metric)
+        for m in measurements:
+            self.add(callpath, metric, m.coordinate, m.mean, m.median, m.minimum, m.maximum, m.std)
+
+    def remove(self, callpath: Callpath, metric: Metric):
+        """
+        Removes all measurements of the callpath and metric.
+        """
+        ids = self._callpath_ids.get(callpath), self._metric_ids.get(metric)
+        if ids in self._series:
+            del self._series[ids]
+            self._mask[ids] = False
+
+    def clear(self):
+        self.__init__()
+
+    def series_keys(self) -> Iterator[Tuple[Callpath, Metric]]:
+        for callpath_id, metric_id in self._series:
+            yield self.callpaths[callpath_id], self.metrics[metric_id]
+
+    def __contains__(self, key: Tuple[Callpath, Metric]):
+        callpath, metric = key
+        return (self._callpath_ids.get(callpath), self._metric_ids.get(metric)) in self._series
+
+    def __len__(self):
+        return len(self._series)
+
+    def series(self, callpath: Callpath, metric: Metric) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the ids of the coordinates and the statistics of the measurements of the callpath and metric.
+        The statistics have the shape (coordinates, statistics), the coordinates are ordered by their ids.
+        """
+        ids = self._callpath_ids.get(callpath), self._metric_ids.get(metric)
+        if ids not in self._series:
+            raise KeyError((callpath, metric))
+        coordinate_ids = np.flatnonzero(self._mask[ids][:len(self.coordinates)])
+        return coordinate_ids, self._values[ids][coordinate_ids]
+
+    def measurement(self, callpath: Callpath, metric: Metric, coordinate: Coordinate) -> Optional[Measurement]:
+        """
+        Creates the measurement object of the callpath and metric at the coordinate, if the measurement exists.
+        Changes of the statistics of the measurement are written to the store, see StoredMeasurement.
+        """
+        try:
+            ids = self._callpath_ids[callpath], self._metric_ids[metric], self._coordinate_ids[coordinate]
+        except KeyError:
+            return None
+        if not self._mask[ids]:
+            return None
+        return StoredMeasurement(self, ids)
+
+    def measurements(self, callpath: Callpath, metric: Metric) -> List[Measurement]:
+        """
+        Creates the measurement objects of the callpath and metric.
+        Changes of the statistics of the measurements are written to the store, see StoredMeasurement.
+        """
+        coordinate_ids, _ = self.series(callpath, metric)
+        ids = self._callpath_ids[callpath], self._metric_ids[metric]
+        return [StoredMeasurement(self, ids + (coordinate_id,)) for coordinate_id in coordinate_ids]
+
+    def _set_statistic(self, ids: Tuple[int, int, int], name: str, value: float):
+        # measurements that were removed from the store are no longer updated
+        if self._mask[ids]:
+            self._values[ids + (self.STATISTICS.index(name),)] = value
+
+    def view(self) -> 'MeasurementsView':
+        return MeasurementsView(self)
+
+
+class StoredMeasurement(Measurement):
+    """
+    A measurement of a MeasurementStore. Changes of its statistics are written to the store.
+    The coordinate, callpath and metric cannot be changed, copies of the measurement are not connected to the store.
+    """
+    __slots__ = ('_store', '_ids')
+
+    def __init__(self, store: MeasurementStore, ids: Tuple[int, int, int]):
+        callpath_id, metric_id, coordinate_id = ids
+        Measurement.coordinate.__set__(self, store.coordinates[coordinate_id])
+        Measurement.callpath.__set__(self, store.callpaths[callpath_id])
+        Measurement.metric.__set__(self, store.metrics[metric_id])
+        self._values = None
+        self._mean, self._median, self._minimum, self._maximum, self._std = store.values[ids]
+        self._store = store
+        self._ids = ids
+
+    def _read_only(name):
+        def set_entity(self, value):
+            raise AttributeError(f"The {name} of a stored measurement cannot be changed, assign the measurements of "
+                                 f"the series instead.")
+
+        return property(getattr(Measurement, name).__get__, set_entity)
+
+    coordinate = _read_only('coordinate')
+    callpath = _read_only('callpath')
+    metric = _read_only('metric')
+    del _read_only
+
+    def _write_through(name):
+        statistic = getattr(Measurement, name)
+
+        def set_statistic(self, value):
+            statistic.fset(self, value)
+            self._store._set_statistic(self._ids, name, value)
+
+        return property(statistic.fget, set_statistic)
+
+    mean = _write_through('mean')
+    median = _write_through('median')
+    minimum = _write_through('minimum')
+    maximum = _write_through('maximum')
+    std = _write_through('std')
+    del _write_through
+
+    def __copy__(self):
+        return _detached_measurement(self.coordinate, self.callpath, self.metric,
+                                     (self._mean, self._median, self._minimum, self._maximum, self._std))
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def __reduce__(self):
+        return _detached_measurement, (self.coordinate, self.callpath, self.metric,
+                                       (self._mean, self._median, self._minimum, self._maximum, self._std))
+
+
+def _detached_measurement(coordinate, callpath, metric, statistics) -> Measurement:
+    measurement = Measurement(coordinate, callpath, metric, None)
+    measurement.mean, measurement.median, measurement.minimum, measurement.maximum, measurement.std = statistics
+    return measurement
+
+
+class _SeriesList(list):
+    """
+    The measurements of one callpath and metric of a MeasurementsView.
+    Changes of the list are written to the store, afterwards the list contains the stored measurements.
+    """
+
+    def __init__(self, store: MeasurementStore, callpath: Callpath, metric: Metric):
+        super().__init__(store.measurements(callpath, metric))
+        self._store = store
+        self._key = callpath, metric
+
+    def _writing_through(method):
+        def write_through(self, *args, **kwargs):
+            previous = list(self)
+            result = method(self, *args, **kwargs)
+            try:
+                self._store.set_series(*self._key, self)
+            except ValueError:
+                list.__setitem__(self, slice(None), previous)
+                raise
+            list.__setitem__(self, slice(None), self._store.measurements(*self._key))
+            return result
+
+        write_through.__name__ = method.__name__
+        return write_through
+
+    __setitem__ = _writing_through(list.__setitem__)
+    __delitem__ = _writing_through(list.__delitem__)
+    __iadd__ = _writing_through(list.__iadd__)
+    __imul__ = _writing_through(list.__imul__)
+    append = _writing_through(list.append)
+    extend = _writing_through(list.extend)
+    insert = _writing_through(list.insert)
+    pop = _writing_through(list.pop)
+    remove = _writing_through(list.remove)
+    clear = _writing_through(list.clear)
+    del _writing_through
+
+
+class MeasurementsView(MutableMapping):
+    """
+    Mapping of (callpath, metric) to the list of measurements, that is compatible with Experiment.measurements,
+    but stores the measurements in a MeasurementStore.
+
+    The measurement objects are created each time a series is accessed. Changes of the lists and of the statistics of
+    the measurements are written to the store. The measurements in the store are ordered by their coordinates in the
+    order the coordinates were added to the store, a list reflects this order after it was changed.
+    """
+
+    def __init__(self, store: MeasurementStore):
+        self.store = store
+
+    def __getitem__(self, key: Tuple[Callpath, Metric]) -> List[Measurement]:
+        callpath, metric = key
+        return _SeriesList(self.store, callpath, metric)
+
+    def __setitem__(self, key: Tuple[Callpath, Metric], measurements: Iterable[Measurement]):
+        callpath, metric = key
+        self.store.set_series(callpath, metric, measurements)
+
+    def __delitem__(self, key: Tuple[Callpath, Metric]):
+        if key not in self.store:
+            raise KeyError(key)
+        callpath, metric = key
+        self.store.remove(callpath, metric)
+
+    def __contains__(self, key):
+        return isinstance(key, tuple) and len(key) == 2 and key in self.store
+
+    def __iter__(self):
+        return self.store.series_keys()
+
+    def __len__(self):
+        return len(self.store)
+
+    def __repr__(self):
+        return f"MeasurementsView({len(self)} series)"
@@ -1,11 +1,12 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
 import itertools
+from weakref import WeakValueDictionary
 
 from extrap.util.serialization_schema import make_value_schema
 
@@ -18,6 +19,9 @@ class Metric:
     Counter for global metric ids
     """
     ID_COUNTER = itertools.count()
+    # the name determines the hash, it must not be changed after the metric is created
+    __slots__ = ('name', 'id', '_hash', '__weakref__')
+    _interned: 'WeakValueDictionary[str, Metric]' = WeakValueDictionary()
 
     def __init__(self, name):
         """
@@ -25,9 +29,24 @@ class Metric:
         """
         self.name = name
         self.id = next(Metric.ID_COUNTER)
+        self._hash = hash(name)
+
+    @classmethod
+    def intern(cls, name) -> 'Metric':
+        """
+        Returns the canonical metric with the given name, so that equal metrics are represented by the same object.
+        """
+        metric = cls._interned.get(name)
+        if metric is None:
+            metric = cls._interned.setdefault(name, cls(name))
+        return metric
 
     def __hash__(self):
-        return hash(self.name)
+        return self._hash
+
+    def __reduce__(self):
+        # the hash of a string differs between processes, therefore, it must be recomputed
+        return Metric, (self.name,)
 
     def __eq__(self, other):
         if not isinstance(other, Metric):
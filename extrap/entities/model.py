@@ -1,6 +1,6 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
@@ -25,11 +25,13 @@ class Model:
         self.callpath = callpath
         self.metric = metric
         self.measurements: Optional[List[Measurement]] = None
+        # False if the search for the hypothesis was stopped early, because its time budget was exceeded
+        self.exhaustive = True
 
     @cached_property
     def predictions(self):
         coordinates = numpy.array([m.coordinate for m in self.measurements])
-        return self.hypothesis.function.evaluate(coordinates.transpose())
+        return self.hypothesis.function.compile().evaluate(coordinates.transpose())
 
     def __eq__(self, other):
         if not isinstance(other, Model):
@@ -56,3 +58,4 @@ class ModelSchema(Schema):
     hypothesis = fields.Nested(HypothesisSchema)
     callpath = fields.Nested(CallpathSchema)
     metric = fields.Nested(MetricSchema)
+    exhaustive = fields.Bool()
@@ -8,6 +8,7 @@
 from abc import ABC, abstractmethod
 from numbers import Real
 from typing import Tuple, List, Union, Mapping
+from weakref import WeakValueDictionary
 
 import numpy as np
 from marshmallow import fields, validate
@@ -18,7 +19,123 @@ from extrap.entities.parameter import Parameter
 from extrap.util.serialization_schema import Schema, NumberField
 
 
-class Term(ABC):
+def _invalidate_compiled_functions(obj):
+    """
+    Discards the compiled evaluators of all functions that contain the object.
+    """
+    functions = obj.__dict__.get('_compiled_functions')
+    if functions:
+        for function in list(functions.values()):
+            function.__dict__.pop('_compiled', None)
+        functions.clear()
+
+
+class _InvalidatingAttribute:
+    """
+    Attribute that invalidates the compiled functions containing its object when it is assigned.
+    The value is stored in the instance dictionary under the same name, therefore, reading it does not call the
+    descriptor.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __set__(self, instance, value):
+        state = instance.__dict__
+        state[self.name] = value
+        if '_compiled_functions' in state:
+            _invalidate_compiled_functions(instance)
+
+    def __delete__(self, instance):
+        del instance.__dict__[self.name]
+        _invalidate_compiled_functions(instance)
+
+
+class _InvalidatingList(list):
+    """
+    List that invalidates the compiled functions containing its owner when it is modified.
+    """
+    _owner: 'CompiledFunctionDependency'
+
+    def __reduce_ex__(self, protocol):
+        # the owner wraps the list again, when it is restored
+        return list, (list(self),)
+
+    def _invalidating(method):
+        def invalidate(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            if '_compiled_functions' in self._owner.__dict__:
+                _invalidate_compiled_functions(self._owner)
+            return result
+
+        invalidate.__name__ = method.__name__
+        return invalidate
+
+    __setitem__ = _invalidating(list.__setitem__)
+    __delitem__ = _invalidating(list.__delitem__)
+    __iadd__ = _invalidating(list.__iadd__)
+    __imul__ = _invalidating(list.__imul__)
+    extend = _invalidating(list.extend)
+    insert = _invalidating(list.insert)
+    pop = _invalidating(list.pop)
+    remove = _invalidating(list.remove)
+    clear = _invalidating(list.clear)
+    sort = _invalidating(list.sort)
+    reverse = _invalidating(list.reverse)
+    del _invalidating
+
+    def append(self, item):
+        # terms are built by appending, therefore, append avoids the overhead of the generic wrapper
+        list.append(self, item)
+        if '_compiled_functions' in self._owner.__dict__:
+            _invalidate_compiled_functions(self._owner)
+
+
+class _InvalidatingListAttribute(_InvalidatingAttribute):
+    """
+    Attribute that stores a copy of the assigned sequence as an _InvalidatingList.
+    """
+
+    def __set__(self, instance, value):
+        value = _InvalidatingList(value)
+        value._owner = instance
+        state = instance.__dict__
+        state[self.name] = value
+        if '_compiled_functions' in state:
+            _invalidate_compiled_functions(instance)
+
+
+class CompiledFunctionDependency:
+    """
+    Base class for the parts of functions.
+    Assigning or modifying the coefficients and terms of the parts discards the compiled evaluators of the functions
+    that contain them.
+    """
+
+    def _add_compiled_function(self, function):
+        """
+        Registers a function that contains this part and whose compiled evaluator must be discarded when the part
+        changes.
+        """
+        functions = self.__dict__.get('_compiled_functions')
+        if functions is None:
+            # functions are not hashable, therefore, they are registered by their identity
+            self._compiled_functions = functions = WeakValueDictionary()
+        functions[id(function)] = function
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_compiled_functions', None)
+        state.pop('_compiled', None)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class Term(CompiledFunctionDependency, ABC):
+    coefficient = _InvalidatingAttribute()
 
     def __init__(self):
         self.coefficient = 1
@@ -56,10 +173,10 @@ class SingleParameterTerm(Term, ABC):
 
 
 class SimpleTerm(SingleParameterTerm):
+    # simple terms have no coefficient
+    coefficient = property()
 
     def __init__(self, term_type, exponent: Real):
-        super().__init__()
-        del self.coefficient
         self.term_type = term_type
         self.exponent = exponent
 
@@ -71,6 +188,7 @@ class SimpleTerm(SingleParameterTerm):
     def exponent(self, value):
         self._exponent = value
         self._float_exponent = float(value)
+        _invalidate_compiled_functions(self)
 
     @property
     def term_type(self):
@@ -83,6 +201,7 @@ class SimpleTerm(SingleParameterTerm):
             self.evaluate = self._evaluate_polynomial
         elif self._term_type == "logarithm":
             self.evaluate = self._evaluate_logarithm
+        _invalidate_compiled_functions(self)
 
     def reset_coefficients(self):
         pass
@@ -93,10 +212,16 @@ class SimpleTerm(SingleParameterTerm):
         elif self._term_type == "logarithm":
             return f"log2({parameter})^({self.exponent})"
 
+    # np.float_power gives the same results for arrays as the power operator for scalars, the power operator for
+    # arrays may use vectorized implementations that differ in the last digits
     def _evaluate_polynomial(self, parameter_value):
+        if isinstance(parameter_value, np.ndarray):
+            return np.float_power(parameter_value, self._float_exponent)
         return parameter_value ** self._float_exponent
 
     def _evaluate_logarithm(self, parameter_value):
+        if isinstance(parameter_value, np.ndarray):
+            return np.float_power(np.log2(parameter_value), self._float_exponent)
         log = np.log2(parameter_value)
         log **= self._float_exponent
         return log
@@ -116,10 +241,11 @@ class SimpleTerm(SingleParameterTerm):
 
 
 class CompoundTerm(SingleParameterTerm):
+    simple_terms: List[SimpleTerm] = _InvalidatingListAttribute()
 
     def __init__(self, *terms):
         super().__init__()
-        self.simple_terms: List[SimpleTerm] = list(terms)
+        self.simple_terms = terms
 
     def add_simple_term(self, simple_term):
         self.simple_terms.append(simple_term)
@@ -165,12 +291,13 @@ class CompoundTerm(SingleParameterTerm):
 
 
 class MultiParameterTerm(Term):
+    parameter_term_pairs: List[Tuple[int, SingleParameterTerm]] = _InvalidatingListAttribute()
 
     def __init__(self, *terms: Tuple[int, SingleParameterTerm]):
         super().__init__()
         if len(terms) > 0 and not isinstance(terms[0], Tuple):
             raise TypeError('Argument must be a pair of parameter index and term.')
-        self.parameter_term_pairs = list(terms)
+        self.parameter_term_pairs = terms
 
     def add_parameter_term_pair(self, parameter_term_pair: Tuple[int, SingleParameterTerm]):
         self.parameter_term_pairs.append(parameter_term_pair)
@@ -189,7 +316,7 @@ class MultiParameterTerm(Term):
 
     def to_string(self, *parameters: Union[Parameter, str, Mapping[int, Union[Parameter, str]]]):
         if len(parameters) == 0:
-            parameters = ('p', 'q', 'r', 's', 't')
+            parameters = ('p', 'q', 'r', 's', 't', 'u', 'v', 'w')
         elif len(parameters) == 1 and not isinstance(parameters[0], str):
             parameters = parameters[0]
         function_string = str(self.coefficient)
@@ -15,7 +15,8 @@ import extrap
 from extrap.fileio import experiment_io
 from extrap.fileio.cube_file_reader2 import read_cube_file
 from extrap.fileio.extrap3_experiment_reader import read_extrap3_experiment
-from extrap.fileio.io_helper import format_output
+from extrap.entities.coordinate import Coordinate
+from extrap.fileio.io_helper import format_output, format_evaluation
 from extrap.fileio.io_helper import save_output
 from extrap.fileio.json_file_reader import read_json_file
 from extrap.fileio.talpas_file_reader import read_talpas_file
@@ -24,6 +25,7 @@ from extrap.modelers import multi_parameter
 from extrap.modelers import single_parameter
 from extrap.modelers.abstract_modeler import MultiParameterModeler
 from extrap.modelers.model_generator import ModelGenerator
+from extrap.modelers.profiling import ModelingProfiler
 from extrap.util.exceptions import RecoverableError
 from extrap.util.options_parser import ModelerOptionsAction, ModelerHelpAction
 from extrap.util.options_parser import SINGLE_PARAMETER_MODELER_KEY, SINGLE_PARAMETER_OPTIONS_KEY
@@ -72,6 +74,16 @@ def main(args=None, prog=None):
     modeling_options.add_argument("--help-modeler", choices=modelers_list, type=str.lower,
                                   help="Show help for modeler options and exit",
                                   action=ModelerHelpAction)
+    modeling_options.add_argument("--jobs", action="store", dest="jobs", type=int, default=1, metavar="N",
+                                  help="Number of processes used for modeling, 0 uses all available processors "
+                                       "(default: 1)")
+    modeling_options.add_argument("--time-budget", action="store", dest="time_budget", type=float, default=None,
+                                  metavar="SECONDS",
+                                  help="Maximum time for modeling all measurement series, afterwards the best models "
+                                       "found so far are used")
+    modeling_options.add_argument("--profile", action="store_true", dest="profile",
+                                  help="Measures the time spent in the phases of the modeling and prints the profile "
+                                       "after the output, only the main process is profiled")
 
     output_options = parser.add_argument_group("Output options")
     output_options.add_argument("--out", action="store", metavar="OUTPUT_PATH", dest="out",
@@ -80,6 +92,13 @@ def main(args=None, prog=None):
                                 choices=["all", "callpaths", "metrics", "parameters", "functions"],
                                 help="Set which information should be displayed after modeling "
                                      "(default: all)")
+    output_options.add_argument("--evaluate", action="store", dest="evaluate", nargs='+', metavar="POINT",
+                                type=lambda point: Coordinate(float(v) for v in point.split(',')),
+                                help="Evaluates all models at the given points, the values of the parameters of each "
+                                     "point are separated by commas")
+    output_options.add_argument("--stream", action="store_true", dest="stream",
+                                help="Models the most expensive callpaths first and prints each model as soon as it "
+                                     "is created")
     output_options.add_argument("--save-experiment", action="store", metavar="EXPERIMENT_PATH", dest="save_experiment",
                                 help="Saves the experiment including all models as Extra-P experiment "
                                      "(if no extension is specified, '.extra-p' is appended)")
@@ -176,9 +195,25 @@ def main(args=None, prog=None):
             if value is not None:
                 setattr(modeler, name, value)
 
+        profiler = ModelingProfiler() if arguments.profile else None
+        if profiler is not None:
+            if arguments.jobs != 1:
+                logging.warning("Only the main process is profiled, the modeling in the worker processes is not "
+                                "included in the profile.")
+            profiler.enable()
         with ProgressBar(desc='Generating models') as pbar:
             # create models from data
-            model_generator.model_all(pbar)
+            if arguments.stream:
+                def print_model(key, model):
+                    callpath, metric = key
+                    function = model.hypothesis.function.to_string(*experiment.parameters)
+                    pbar.write(f"{callpath.name}, {metric.name}: {function}")
+            else:
+                print_model = None
+            model_generator.model_all(pbar, jobs=arguments.jobs, time_budget=arguments.time_budget,
+                                      order_by_importance=arguments.stream, callback=print_model)
+        if profiler is not None:
+            profiler.disable()
 
         if arguments.save_experiment:
             try:
@@ -192,9 +227,17 @@ def main(args=None, prog=None):
 
         # format modeler output into text
         text = format_output(experiment, printtype)
+        if arguments.evaluate:
+            if any(point.dimensions != len(experiment.parameters) for point in arguments.evaluate):
+                logging.error("The number of values of each point must match the number of parameters.")
+                sys.exit(1)
+            evaluation = model_generator.evaluate(arguments.evaluate)
+            text += format_evaluation(evaluation, arguments.evaluate)
 
         # print formatted output to command line
         print(text)
+        if profiler is not None:
+            print(profiler.report())
 
         # save formatted output to text file
         if print_output:
@@ -35,12 +35,12 @@ def make_callpath_mapping(cnodes):
         for cnode in parent_cnode.get_children():
             name = cnode.region.name
             path_name = '->'.join((parent_name, name))
-            callpaths[cnode.id] = Callpath(path_name)
+            callpaths[cnode.id] = Callpath.intern(path_name)
             walk_tree(cnode, path_name)
 
     for root_cnode in cnodes:
         name = root_cnode.region.name
-        callpath = Callpath(name)
+        callpath = Callpath.intern(name)
         callpaths[root_cnode.id] = callpath
         walk_tree(root_cnode, name)
 
@@ -125,7 +125,7 @@ def read_cube_file(dir_name, scaling_type, pbar=DUMMY_PROGRESS, selected_metrics
     for parameter_value, point_group in groupby(reordered_files, key=itemgetter(1)):
         num_points += 1
         # create coordinate
-        coordinate = Coordinate(parameter_value[i] for i in parameter_selection_mask)
+        coordinate = Coordinate.intern(parameter_value[i] for i in parameter_selection_mask)
         experiment.add_coordinate(coordinate)
 
         aggregated_values.clear()
@@ -142,7 +142,7 @@ def read_cube_file(dir_name, scaling_type, pbar=DUMMY_PROGRESS, selected_metrics
                     try:
                         metric_values = parsed.get_metric_values(metric=cube_metric, cache=False)
                         # create the metrics
-                        metric = Metric(cube_metric.name)
+                        metric = Metric.intern(cube_metric.name)
 
                         for cnode_id in metric_values.cnode_indices:
                             pbar.update(0)
@@ -167,10 +167,13 @@ def read_cube_file(dir_name, scaling_type, pbar=DUMMY_PROGRESS, selected_metrics
                         logging.info(
                             f'The cubex file {Path(*path.parts[-2:])} does not contain data for the metric "{e.metric.name}"')
 
-        # add measurements to experiment
-        for (callpath, metric), values in aggregated_values.items():
+        # add measurements to experiment, the statistics of all measurements of the point are computed together
+        keys = list(aggregated_values.keys())
+        measurements = Measurement.from_repetitions(coordinate, [callpath for callpath, _ in keys],
+                                                    [metric for _, metric in keys], list(aggregated_values.values()))
+        for measurement in measurements:
             pbar.update(0)
-            experiment.add_measurement(Measurement(coordinate, callpath, metric, values))
+            experiment.add_measurement(measurement)
 
     pbar.step("Unify calltrees")
     callpaths_to_merge = []
@@ -190,7 +193,7 @@ def read_cube_file(dir_name, scaling_type, pbar=DUMMY_PROGRESS, selected_metrics
         new_key = key
         # find parent call-path
         while new_key not in experiment.measurements and '->' in new_callpath.name:
-            new_callpath = Callpath(str(new_callpath).rsplit(sep='->', maxsplit=1)[0])
+            new_callpath = Callpath.intern(str(new_callpath).rsplit(sep='->', maxsplit=1)[0])
             new_key = (new_callpath, metric)
         # merge parent measurements with the current measurements
         if new_key in experiment.measurements:
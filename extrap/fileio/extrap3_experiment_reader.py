@@ -1,6 +1,6 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
@@ -134,7 +134,7 @@ def deserialize_metric(ioHelper):
     id = ioHelper.readId()
     name = ioHelper.readString()
     unit = ioHelper.readString()
-    return Metric(name)
+    return Metric.intern(name)
 
 
 def deserialize_region(id_mappings, ioHelper):
@@ -160,9 +160,9 @@ def deserialize_callpath(id_mappings, ioHelper):
     region_name = id_mappings.region_mapping[region_id]
     if parent_id != -1:
         parent = id_mappings.callpath_mapping[parent_id]
-        callpath = Callpath(parent.name + '->' + region_name)
+        callpath = Callpath.intern(parent.name + '->' + region_name)
     else:
-        callpath = Callpath(region_name)
+        callpath = Callpath.intern(region_name)
 
     id_mappings.callpath_mapping[id] = callpath
     return callpath
@@ -179,7 +179,7 @@ def deserialize_coordinate(exp, id_mapping, ioHelper):
         val = ioHelper.readValue()
         coordinate_parts[paramIdx] = val
 
-    coordinate = Coordinate(*coordinate_parts)
+    coordinate = Coordinate.intern(*coordinate_parts)
     id_mapping.coordinate_mapping[id] = coordinate
     return coordinate
 
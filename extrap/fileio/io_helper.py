@@ -84,16 +84,13 @@ def format_all(experiment):
     metrics = experiment.metrics
     modeler = experiment.modelers[0]
     text = ""
-    for callpath_id in range(len(callpaths)):
-        callpath = callpaths[callpath_id]
+    for callpath in callpaths:
         callpath_string = callpath.name
         text += "Callpath: " + callpath_string + "\n"
-        for metric_id in range(len(metrics)):
-            metric = metrics[metric_id]
+        for metric in metrics:
             metric_string = metric.name
             text += "\tMetric: " + metric_string + "\n"
-            for coordinate_id in range(len(coordinates)):
-                coordinate = coordinates[coordinate_id]
+            for coordinate in coordinates:
                 dimensions = coordinate.dimensions
                 coordinate_text = "Measurement point: ("
                 for dimension in range(dimensions):
@@ -102,7 +99,7 @@ def format_all(experiment):
                     coordinate_text += value_string + ","
                 coordinate_text = coordinate_text[:-1]
                 coordinate_text += ")"
-                measurement = experiment.get_measurement(coordinate_id, callpath_id, metric_id)
+                measurement = experiment.find_measurement(callpath, metric, coordinate)
                 if measurement == None:
                     value_mean = 0
                     value_median = 0
@@ -130,6 +127,22 @@ def format_all(experiment):
     return text
 
 
+def format_evaluation(evaluation, coordinates):
+    """
+    This method formats the values of the models at the given coordinates, which are evaluated by
+    ModelGenerator.evaluate.
+    """
+    coordinate_texts = ["(" + ",".join("{:.2E}".format(value) for value in coordinate) + ")"
+                        for coordinate in coordinates]
+    text = ""
+    for (callpath, metric), values in zip(evaluation.keys, evaluation.values):
+        text += "Callpath: " + callpath.name + "\n"
+        text += "\tMetric: " + metric.name + "\n"
+        for coordinate_text, value in zip(coordinate_texts, values):
+            text += f"\t\tPrediction point: {coordinate_text} Value: {value:.2E}\n"
+    return text
+
+
 def format_output(experiment, printtype):
     """
     This method formats the ouput of the modeler to a string that can be printed in the console
@@ -193,10 +206,11 @@ def repetition_dict_to_experiment(complete_data, experiment, progress_bar=DUMMY_
         measurementset = complete_data[key]
         experiment.add_callpath(callpath)
         experiment.add_metric(metric)
-        for coordinate in measurementset:
-            values = measurementset[coordinate]
+        coordinates = list(measurementset.keys())
+        for coordinate, measurement in zip(coordinates, Measurement.from_repetitions(
+                coordinates, callpath, metric, list(measurementset.values()))):
             experiment.add_coordinate(coordinate)
-            experiment.add_measurement(Measurement(coordinate, callpath, metric, values))
+            experiment.add_measurement(measurement)
 
 
 def create_call_tree(callpaths: List[Callpath], progress_bar=DUMMY_PROGRESS, progress_total_added=False,
@@ -210,105 +224,39 @@ def create_call_tree(callpaths: List[Callpath], progress_bar=DUMMY_PROGRESS, pro
     """
     tree = CallTree()
     progress_bar.step('Creating calltree')
-    # create a two dimensional array of the callpath elements as strings
-    callpaths2 = []
-    max_length = 0
 
     if not progress_total_added:
         progress_bar.total += len(callpaths) * progress_scale
 
-    for splitted_callpath in callpaths:
-        callpath_string = splitted_callpath.name
-        elems = callpath_string.split("->")
-        callpaths2.append(elems)
-        progress_bar.total += len(elems) * progress_scale
+    # the callpaths are inserted one after another like into a trie, the children of each node are ordered by the
+    # first callpath that contains them
+    for callpath in callpaths:
+        elements = callpath.name.split("->")
+        progress_bar.total += len(elements) * progress_scale
         progress_bar.update(progress_scale)
-        if len(elems) > max_length:
-            max_length = len(elems)
-
-    # iterate over the elements of one call path
-    for i in range(max_length):
-        # iterate over all callpaths
-        for callpath, splitted_callpath in zip(callpaths, callpaths2):
-            # check that we do not try to access an element that does not exist
-            if i >= len(splitted_callpath):
-                continue
-            # if the element does exist
-            progress_bar.update(progress_scale)
-            callpath_string = splitted_callpath[i]
-
-            # when at root level
-            if i == 0:
-                root_node = tree
-            # when not at root level, the previous nodes of the elements have to be checked
-            else:
-                # find the root node of the element that we want to add currently
-                root_node = find_root_node(splitted_callpath, tree, i)
-
-            # check if that child node is already existing
-            child_node = root_node.find_child(callpath_string)
-            is_leaf = i == len(splitted_callpath) - 1
-            if child_node:
-                if is_leaf:
-                    if child_node.path == Callpath.EMPTY:
-                        child_node.path = callpath
-                    else:
-                        warnings.warn("Duplicate callpath encountered, only first occurence is retained.")
 
-            else:
-                # add a new child node to the root node
-                if is_leaf:
-                    child_node = Node(callpath_string, callpath)
-                else:
-                    child_node = Node(callpath_string, Callpath.EMPTY)
-                root_node.add_child_node(child_node)
+        # find or create the nodes of the parents
+        node = tree
+        for element in elements[:-1]:
+            child_node = node.find_child(element)
+            if child_node is None:
+                child_node = Node(element, Callpath.EMPTY)
+                node.add_child_node(child_node)
+            node = child_node
+
+        # add the node of the callpath
+        child_node = node.find_child(elements[-1])
+        if child_node is None:
+            node.add_child_node(Node(elements[-1], callpath))
+        elif child_node.path == Callpath.EMPTY:
+            child_node.path = callpath
+        else:
+            warnings.warn("Duplicate callpath encountered, only first occurence is retained.")
+        progress_bar.update(len(elements) * progress_scale)
 
     return tree
 
 
-def find_root_node(callpath_elements, tree, loop_id):
-    """
-    This method finds the root node of a element in the callpath tree.
-    Therefore, it searches iterativels through the tree.
-    """
-    level = 0
-    root_element_string = callpath_elements[level]
-    root_node = tree.get_node(root_element_string)
-
-    # root node already found
-    if loop_id == level + 1:
-        return root_node
-
-    # need to search deeper in the tree for the root node
-    else:
-        return find_child_node(root_node, level, callpath_elements, loop_id)
-
-
-def find_child_node(root_node, level, callpath_elements, loop_id):
-    """
-    This method searches for a child node in the tree. Searches iteratively
-    into the three and each nodes child nodes. Returns the root node of the
-    child.
-    """
-    level = level + 1
-    root_element_string = callpath_elements[level]
-    childs = root_node.childs
-
-    for i in range(len(childs)):
-        child_name = childs[i].name
-
-        if child_name == root_element_string:
-            new_root_node = childs[i]
-
-            # root node already found
-            if loop_id == level + 1:
-                return new_root_node
-
-            # need to search deeper in the tree for the root node
-            else:
-                return find_child_node(new_root_node, level, callpath_elements, loop_id)
-
-
 def validate_experiment(experiment: Experiment, progress_bar=DUMMY_PROGRESS):
     def require(cond, message):
         if not cond:
@@ -1,6 +1,6 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
@@ -70,11 +70,11 @@ def _read_new_json_file(experiment, json_data, progress_bar):
     for callpath_name, data in progress_bar(measurements_data.items()):
         for metric_name, measurements in data.items():
             for measurement in measurements:
-                coordinate = Coordinate(measurement['point'])
+                coordinate = Coordinate.intern(measurement['point'])
                 experiment.add_coordinate(coordinate)
-                callpath = Callpath(callpath_name)
+                callpath = Callpath.intern(callpath_name)
                 experiment.add_callpath(callpath)
-                metric = Metric(metric_name)
+                metric = Metric.intern(metric_name)
                 experiment.add_metric(metric)
                 measurement = Measurement(coordinate, callpath, metric, measurement['values'])
                 experiment.add_measurement(measurement)
@@ -96,7 +96,7 @@ def _read_legacy_json_file(experiment, json_data, progress_bar):
     logging.debug("Number of callpaths: " + str(len(callpath_data)))
     for i, c_data in enumerate(progress_bar(callpath_data)):
         callpath_name = c_data["name"]
-        callpath = Callpath(callpath_name)
+        callpath = Callpath.intern(callpath_name)
         experiment.add_callpath(callpath)
         logging.debug("Callpath " + str(i + 1) + ": " + callpath_name)
     # read metrics
@@ -105,7 +105,7 @@ def _read_legacy_json_file(experiment, json_data, progress_bar):
     logging.debug("Number of metrics: " + str(len(metric_data)))
     for i, m_data in enumerate(progress_bar(metric_data)):
         metric_name = m_data["name"]
-        metric = Metric(metric_name)
+        metric = Metric.intern(metric_name)
         experiment.add_metric(metric)
         logging.debug("Metric " + str(i + 1) + ": " + metric_name)
     # read coordinates
@@ -115,7 +115,7 @@ def _read_legacy_json_file(experiment, json_data, progress_bar):
     for i, c_data in enumerate(progress_bar(coordinate_data)):
         parameter_value_pairs = c_data["parameter_value_pairs"]
         parameter_value_pairs = sorted(parameter_value_pairs, key=lambda x: x["parameter_id"])
-        coordinate = Coordinate(float(p["parameter_value"]) for p in parameter_value_pairs)
+        coordinate = Coordinate.intern(float(p["parameter_value"]) for p in parameter_value_pairs)
         experiment.add_coordinate(coordinate)
         logging.debug(f"Coordinate {i + 1}: {coordinate}")
     aggregate_data = {}
@@ -1,6 +1,6 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
@@ -26,8 +26,8 @@ def read_jsonlines_file(path, progress_bar=DUMMY_PROGRESS):
 
     complete_data = {}
     parameters = None
-    default_callpath = Callpath('<root>')
-    default_metric = Metric('<default>')
+    default_callpath = Callpath.intern('<root>')
+    default_metric = Metric.intern('<default>')
 
     progress_bar.total += os.path.getsize(path)
 
@@ -45,18 +45,18 @@ def read_jsonlines_file(path, progress_bar=DUMMY_PROGRESS):
                 raise FileFormatError(f'Decoding of line {ln} failed: {str(error)}. Line: "{line}"')
             try:
                 if 'callpath' in data:
-                    callpath = Callpath(data['callpath'])
+                    callpath = Callpath.intern(data['callpath'])
                 else:
                     callpath = default_callpath
 
                 if 'metric' in data:
-                    metric = Metric(data['metric'])
+                    metric = Metric.intern(data['metric'])
                 else:
                     metric = default_metric
                 key = callpath, metric
                 if parameters is None:  # ensures uniform order of paremeters
                     parameters = [Parameter(p) for p in data['params'].keys()]
-                coordinate = Coordinate(data['params'][p.name] for p in parameters)
+                coordinate = Coordinate.intern(data['params'][p.name] for p in parameters)
                 io_helper.append_to_repetition_dict(complete_data, key, coordinate, data['value'], progress_bar)
             except KeyError as error:
                 raise FileFormatError(f'Missing property in line {ln}: {str(error)}. Line: "{line}"')
@@ -1,6 +1,6 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
@@ -43,10 +43,10 @@ def read_talpas_file(path, progress_bar=DUMMY_PROGRESS):
             except JSONDecodeError as error:
                 raise FileFormatError(f'Decoding of line {ln} failed: {str(error).replace(",", ";")}. Line: "{line}"')
             try:
-                key = Callpath(data['callpath']), Metric(data['metric'])
+                key = Callpath.intern(data['callpath']), Metric.intern(data['metric'])
                 if parameters is None:
                     parameters = [Parameter(p) for p in data['parameters'].keys()]
-                coordinate = Coordinate(data['parameters'][p.name] for p in parameters)
+                coordinate = Coordinate.intern(data['parameters'][p.name] for p in parameters)
                 io_helper.append_to_repetition_dict(complete_data, key, coordinate, data['value'], progress_bar)
             except KeyError as error:
                 raise FileFormatError(f'Missing property in line {ln}: {str(error)}. Line: "{line}"')
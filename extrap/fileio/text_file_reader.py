@@ -1,6 +1,6 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
@@ -38,7 +38,7 @@ def read_text_file(path, progress_bar=DUMMY_PROGRESS):
     # variables for parsing
     number_parameters = 0
     last_metric = None
-    last_callpath = Callpath("")
+    last_callpath = Callpath.intern("")
     coordinate_id = 0
 
     if len(lines_no_space) == 0:
@@ -57,7 +57,7 @@ def read_text_file(path, progress_bar=DUMMY_PROGRESS):
         if field_name == "METRIC":
             # create a new metric if not already exists
             metric_name = field_value
-            test_metric = Metric(metric_name)
+            test_metric = Metric.intern(metric_name)
             if test_metric not in experiment.metrics:
                 metric = test_metric
                 experiment.add_metric(metric)
@@ -74,7 +74,7 @@ def read_text_file(path, progress_bar=DUMMY_PROGRESS):
             # create a new region if not already exists
             callpath_name = field_value
 
-            callpath = Callpath(callpath_name)
+            callpath = Callpath.intern(callpath_name)
             experiment.add_callpath(callpath)
             last_callpath = callpath
 
@@ -83,7 +83,7 @@ def read_text_file(path, progress_bar=DUMMY_PROGRESS):
 
         elif field_name == "DATA":
             if last_metric is None:
-                last_metric = Metric("")
+                last_metric = Metric.intern("")
             # create a new data set
             data_string = field_value
             data_list = data_string.split(" ")
@@ -120,14 +120,14 @@ def read_text_file(path, progress_bar=DUMMY_PROGRESS):
                 coordinate_strings = coordinate_string.split(' ')
             # create a new point
             if number_parameters == 1:
-                coordinates = [Coordinate(float(c))
+                coordinates = [Coordinate.intern(float(c))
                                for c in coordinate_strings]
                 experiment.coordinates.extend(coordinates)
             elif 1 < number_parameters < 5:
                 for coordinate_string in coordinate_strings:
                     coordinate_string = coordinate_string.strip()
                     values = coordinate_string.split(" ")
-                    coordinate = Coordinate(float(v) for v in values)
+                    coordinate = Coordinate.intern(float(v) for v in values)
                     experiment.coordinates.append(coordinate)
             elif number_parameters >= 5:
                 raise FileFormatError("This input format supports a maximum of 4 parameters.")
@@ -575,7 +575,7 @@ class GraphWidget(QWidget):
         # m_x_lower_bound = 1
         number_of_x_points, x_list, x_values = self._calculate_evaluation_points(length_x_axis)
         previous = numpy.seterr(invalid='ignore', divide='ignore')
-        y_list = function.evaluate(x_list).reshape(-1)
+        y_list = function.compile().evaluate(x_list)
         numpy.seterr(**previous)
         cord_list = self._create_drawing_iterator(x_values, y_list)
 
@@ -592,7 +592,7 @@ class GraphWidget(QWidget):
 
         previous = numpy.seterr(invalid='ignore', divide='ignore')
         for function in functions:
-            y_list += function.evaluate(x_list).reshape(-1)
+            y_list += function.compile().evaluate(x_list)
         numpy.seterr(**previous)
 
         cord_list = self._create_drawing_iterator(x_values, y_list)
@@ -743,38 +743,40 @@ class GraphWidget(QWidget):
                 y = max(model.predictions)
                 y_max = max(y, y_max)
 
+        # evaluate all functions at the end and at the beginning of the displayed interval at once
+        points = numpy.empty((len(self.main_widget.experiment.parameters), 2))
+        for i in range(len(points)):
+            points[i] = pv_list.get(i, 1)
+        points[param] = (self.max_x, 1)
         previous = numpy.seterr(invalid='ignore', divide='ignore')
+        values = [model.hypothesis.function.compile().evaluate(points) for model in modelList]
+        end_values = [v[0] for v in values]
+        beginning_values = [v[1] for v in values]
 
         if self.combine_all_callpath:
             y_agg = 0
-            for model in modelList:
-                function = model.hypothesis.function
-                y_agg = y_agg + function.evaluate(pv_list)
+            for y in end_values:
+                y_agg = y_agg + y
             y_max = max(y_agg, y_max)
 
-            pv_list[param] = 1
             y_agg = 0
-            for model in modelList:
-                function = model.hypothesis.function
-                y = function.evaluate(pv_list)
+            for model, y in zip(modelList, beginning_values):
                 if math.isinf(y):
                     y = max(model.predictions)
                 y_agg += y
             y_max = max(y_agg, y_max)
 
-        # Check the value at the end of the displayed interval
-        for model in modelList:
-            function = model.hypothesis.function
-            y = function.evaluate(pv_list)
+        # Check the value at the end of the displayed interval, after combining all callpaths the parameter value
+        # has already been set to the beginning of the interval
+        if self.combine_all_callpath:
+            end_values = beginning_values
+        for model, y in zip(modelList, end_values):
             if math.isinf(y):
                 y = max(model.predictions)
             y_max = max(y, y_max)
 
         # Check the value at the beginning of the displayed interval
-        pv_list[param] = 1
-        for model in modelList:
-            function = model.hypothesis.function
-            y = function.evaluate(pv_list)
+        for model, y in zip(modelList, beginning_values):
             if math.isinf(y):
                 y = max(model.predictions)
             y_max = max(y, y_max)
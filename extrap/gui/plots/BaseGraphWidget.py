@@ -1,6 +1,6 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
@@ -90,7 +90,7 @@ class GraphDisplayWindow(FigureCanvas):
         points[param1] = xs
         points[param2] = ys
 
-        z_value = function.evaluate(points)
+        z_value = function.compile().evaluate(points)
         return z_value
 
     def calculate_z_models(self, maxX, maxY, model_list, max_z=0):
@@ -1,19 +1,21 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
 import copy
 from abc import ABC, abstractmethod
-from typing import Sequence, Optional
+from typing import Sequence, Optional, Dict, Tuple, List
 
 from marshmallow import fields
 
+from extrap.entities.coordinate import Coordinate
 from extrap.entities.measurement import Measurement
 from extrap.entities.model import Model
 from extrap.util.classproperty import classproperty
+from extrap.util.deadline import Deadline
 from extrap.util.progress_bar import DUMMY_PROGRESS
 from extrap.util.serialization_schema import BaseSchema
 
@@ -22,6 +24,8 @@ class AbstractModeler(ABC):
     def __init__(self, use_median: bool):
         # use mean or median measurement values to calculate models
         self._use_median = use_median
+        # deadline for modeling all measurement series, the best models found so far are used when it expires
+        self.deadline: Optional[Deadline] = None
 
     @property
     def use_median(self) -> bool:
@@ -41,6 +45,17 @@ class AbstractModeler(ABC):
         The measurement sequences are not guaranteed to have similar coordinates."""
         raise NotImplementedError
 
+    def model_constant_series(self, measurements: Sequence[Sequence[Measurement]]) -> List[Optional[Model]]:
+        """ Creates the models of the measurement series that can be modeled without searching.
+
+        The model generator calls this method before model and only passes the remaining series to model.
+        Modelers can override it, if they can create the models of some series, e.g., of constant series, cheaper
+        than by model. The created models must be identical to the models created by model.
+        By default, no series is modeled in advance.
+
+        :return: For each measurement series its model or None, if the series must be modeled by model."""
+        return [None] * len(measurements)
+
     @classproperty
     @abstractmethod
     def NAME(cls) -> str:  # noqa
@@ -63,6 +78,19 @@ class SingularModeler(AbstractModeler, ABC):
     def model(self, measurements: Sequence[Sequence[Measurement]], progress_bar=DUMMY_PROGRESS) -> Sequence[Model]:
         return [self.create_model(m) for m in progress_bar(measurements)]
 
+    @staticmethod
+    def group_by_coordinates(measurements: Sequence[Sequence[Measurement]]) -> Dict[Tuple[Coordinate, ...], List[int]]:
+        """
+        Groups the measurement sequences by their coordinates.
+        Returns the indices of the sequences in each group, the groups are ordered by their first occurrence.
+        Sequences are only grouped together if their coordinates are in the same order.
+        """
+        groups = {}
+        for i, series in enumerate(measurements):
+            key = tuple(m.coordinate for m in series)
+            groups.setdefault(key, []).append(i)
+        return groups
+
     @abstractmethod
     def create_model(self, measurements: Sequence[Measurement]) -> Model:
         raise NotImplementedError
@@ -0,0 +1,41 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+from typing import Sequence, List, Optional
+
+import numpy
+
+from extrap.entities.functions import ConstantFunction
+from extrap.entities.hypotheses import ConstantHypothesis, constant_costs, sequential_sum
+from extrap.entities.measurement import Measurement
+from extrap.entities.model import Model
+
+
+def model_constant_series(measurements: Sequence[Sequence[Measurement]], use_median: bool) -> List[Optional[Model]]:
+    """
+    Creates the constant models of all measurement series whose values are constant, i.e., the constant model has no
+    cost. These series do not need to be searched by a modeler. The series are processed together in one matrix per
+    number of measurements. The mean and the costs are computed in the same order as by the modelers, so the models
+    are identical to the models the modelers would create.
+
+    :return: For each measurement series the constant model or None if the values of the series are not constant.
+    """
+    models: List[Optional[Model]] = [None] * len(measurements)
+    series_by_length = {}
+    for i, series in enumerate(measurements):
+        if series:
+            series_by_length.setdefault(len(series), []).append(i)
+
+    for length, indices in series_by_length.items():
+        values = numpy.array([[m.value(use_median) for m in measurements[i]] for i in indices], dtype=float)
+        means = sequential_sum(values / length, axis=1)
+        rss, rrss, smape, re = constant_costs(values, means)
+        for k in numpy.flatnonzero(rss == 0):
+            hypothesis = ConstantHypothesis(ConstantFunction(means[k]), use_median)
+            hypothesis.set_costs(rss[k], rrss[k], re[k], smape[k])
+            models[indices[k]] = Model(hypothesis)
+    return models
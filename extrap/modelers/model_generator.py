@@ -1,24 +1,33 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
 from __future__ import annotations
 
+import copy
 import itertools
-from typing import Dict, Union, Tuple, TYPE_CHECKING
+import logging
+from collections import namedtuple
+from typing import Dict, Union, Tuple, TYPE_CHECKING, Optional, Sequence, List, Callable, Iterator, Iterable
 
+import numpy
 from marshmallow import fields
 
 from extrap.entities.callpath import Callpath, CallpathSchema
+from extrap.entities.coordinate import Coordinate
+from extrap.entities.functions import evaluate_functions
+from extrap.entities.measurement import Measurement
 from extrap.entities.metric import Metric, MetricSchema
 from extrap.entities.model import Model, ModelSchema
 from extrap.modelers import multi_parameter
 from extrap.modelers import single_parameter
 from extrap.modelers.abstract_modeler import AbstractModeler, MultiParameterModeler, ModelerSchema
 from extrap.modelers.modeler_options import modeler_options
+from extrap.modelers.parallel import model_parallel_iter
+from extrap.util.deadline import Deadline
 from extrap.util.progress_bar import DUMMY_PROGRESS
 from extrap.util.serialization_schema import Schema, TupleKeyDict
 
@@ -26,6 +35,10 @@ if TYPE_CHECKING:
     from extrap.entities.experiment import Experiment
 
 
+# The result of ModelGenerator.evaluate: the keys of the models and an array with one row for each model
+ModelEvaluation = namedtuple('ModelEvaluation', ['keys', 'values'])
+
+
 class ModelGenerator:
     """
     Counter for global modeler ids
@@ -43,6 +56,8 @@ class ModelGenerator:
         self._modeler: AbstractModeler = self._choose_modeler(modeler, use_median)
         # all models modeled with this model generator
         self.models: Dict[Tuple[Callpath, Metric], Model] = {}
+        # number of measurement series that were not modeled, because they are identical to another series
+        self.skipped_searches = 0
 
     @property
     def modeler(self):
@@ -75,18 +90,178 @@ class ModelGenerator:
                 raise ValueError("Modeler must use one parameter.")
         return result_modeler
 
-    def model_all(self, progress_bar=DUMMY_PROGRESS):
-        models = self._modeler.model(list(self.experiment.measurements.values()), progress_bar)
-        self.models = {
-            k: m for k, m in zip(self.experiment.measurements.keys(), models)
-        }
-        for (callpath, metric), model in self.models.items():
-            model.callpath = callpath
-            model.metric = metric
-            model.measurements = self.experiment.measurements[(callpath, metric)]
+    def model_all(self, progress_bar=DUMMY_PROGRESS, jobs: Optional[int] = 1, deduplicate: bool = True,
+                  time_budget: Optional[float] = None, order_by_importance: bool = False,
+                  callback: Optional[Callable[[Tuple[Callpath, Metric], Model], None]] = None):
+        """
+        Creates the models for all measurements of the experiment.
+
+        :param progress_bar: Shows the modeling progress.
+        :param jobs: The number of processes used for modeling.
+                     If it is None or smaller than one, all available processors are used.
+        :param deduplicate: Models identical measurement series only once and copies the model for the duplicates.
+        :param time_budget: Maximum time in seconds for modeling all measurement series. When it is exceeded, the best
+                            models found so far are used, these models are marked as not exhaustive.
+        :param order_by_importance: Models the most important measurement series first, see model_iter.
+        :param callback: Is called with the key and the model as soon as a model is created.
+        """
+        for key, model in self.model_iter(progress_bar, jobs, deduplicate, time_budget, order_by_importance):
+            if callback is not None:
+                callback(key, model)
+
+    def model_iter(self, progress_bar=DUMMY_PROGRESS, jobs: Optional[int] = 1, deduplicate: bool = True,
+                   time_budget: Optional[float] = None, order_by_importance: bool = True
+                   ) -> Iterator[Tuple[Tuple[Callpath, Metric], Model]]:
+        """
+        Creates the models for all measurements of the experiment like model_all, but yields each model together with
+        its key as soon as it is created.
+        The models are only assigned to this model generator and the model generator is only added to the experiment,
+        after all models were yielded.
+
+        :param order_by_importance: Models the measurement series with the largest values relative to the largest
+                                    value of their metric first, in chunks that grow exponentially, so that the models
+                                    of the most expensive callpaths are available early. Otherwise, the series are
+                                    modeled in the order of the experiment and, in a single process, all at once.
+        """
+        keys = list(self.experiment.measurements.keys())
+        measurements = list(self.experiment.measurements.values())
+        if deduplicate:
+            series, indices = self._deduplicate(measurements, self._modeler.use_median)
+        else:
+            series, indices = measurements, list(range(len(measurements)))
+        self.skipped_searches = len(measurements) - len(series)
+        if self.skipped_searches:
+            logging.info(f"Skipped modeling of {self.skipped_searches} identical measurement series.")
+        positions: List[List[int]] = [[] for _ in series]
+        for position, i in enumerate(indices):
+            positions[i].append(position)
+
+        models: List[Optional[Model]] = [None] * len(measurements)
+
+        def distribute(i, model):
+            # assigns the model of the distinct series i to all its duplicates
+            for n, position in enumerate(positions[i]):
+                if n > 0:
+                    model = self._copy_model(model)
+                callpath, metric = keys[position]
+                model.callpath = callpath
+                model.metric = metric
+                model.measurements = measurements[position]
+                models[position] = model
+                yield keys[position], model
+
+        # the modeler can model some series, e.g., series with constant values, without searching
+        direct_models = self._modeler.model_constant_series(series)
+        search_indices = [i for i, model in enumerate(direct_models) if model is None]
+        progress_bar.total += len(series) - len(search_indices)
+        progress_bar.update(len(series) - len(search_indices))
+        for i, model in enumerate(direct_models):
+            if model is not None:
+                yield from distribute(i, model)
+
+        if order_by_importance:
+            importance = self._importance(measurements)
+            series_importance = [max(importance[p] for p in positions[i]) for i in search_indices]
+            search_indices = [i for _, i in sorted(zip(series_importance, search_indices), key=lambda x: -x[0])]
+        search_series = [series[i] for i in search_indices]
+
+        truncated = 0
+        self._modeler.deadline = Deadline.create(time_budget)
+        try:
+            if jobs != 1:
+                chunks = model_parallel_iter(self._modeler, search_series, jobs, progress_bar)
+            elif order_by_importance:
+                chunks = self._model_chunks(search_series, progress_bar)
+            else:
+                chunks = [(0, self._modeler.model(search_series, progress_bar))]
+            for start, chunk_models in chunks:
+                for i, model in zip(search_indices[start:start + len(chunk_models)], chunk_models):
+                    truncated += not model.exhaustive
+                    yield from distribute(i, model)
+        finally:
+            self._modeler.deadline = None
+        if truncated:
+            logging.info(f"The search was stopped early for {truncated} measurement series.")
+
+        self.models = dict(zip(keys, models))
         # add the modeler with the results to the experiment
         self.experiment.add_modeler(self)
 
+    def _model_chunks(self, series: Sequence[Sequence[Measurement]], progress_bar
+                      ) -> Iterator[Tuple[int, Sequence[Model]]]:
+        # the chunks grow exponentially, so that the first models are available early, while the modeler can still
+        # process most series together
+        start, size = 0, 1
+        progress_bar.total += len(series)
+        while start < len(series):
+            chunk = series[start:start + size]
+            yield start, self._modeler.model(chunk)
+            progress_bar.update(len(chunk))
+            start += len(chunk)
+            size *= 2
+
+    def _importance(self, measurements: Sequence[Sequence[Measurement]]) -> List[float]:
+        """
+        Estimates the importance of each measurement series by its largest absolute value relative to the largest
+        absolute value of all series of the same metric.
+        """
+        use_median = self._modeler.use_median
+        maxima = [max((abs(m.value(use_median)) for m in ms), default=0) for ms in measurements]
+        metric_maxima = {}
+        for (_, metric), maximum in zip(self.experiment.measurements.keys(), maxima):
+            metric_maxima[metric] = max(metric_maxima.get(metric, 0), maximum)
+        return [maximum / metric_maxima[metric] if metric_maxima[metric] > 0 else 0
+                for (_, metric), maximum in zip(self.experiment.measurements.keys(), maxima)]
+
+    def evaluate(self, points: Union[numpy.ndarray, Sequence[Coordinate]],
+                 keys: Optional[Iterable[Tuple[Callpath, Metric]]] = None) -> ModelEvaluation:
+        """
+        Evaluates the models for several points at once.
+        Models whose functions have the same structure are evaluated together.
+
+        :param points: An array with one row of values for each parameter and one column for each point,
+                       or a sequence of coordinates.
+        :param keys: The callpaths and metrics of the models that are evaluated, by default all models are evaluated.
+        :return: The keys of the evaluated models and an array with one row for each model and one column for each
+                 point.
+        """
+        if not isinstance(points, numpy.ndarray):
+            points = numpy.array([tuple(c) for c in points], dtype=float).reshape(len(points), -1).T
+        if keys is None:
+            keys = list(self.models.keys())
+        else:
+            keys = list(keys)
+        functions = [self.models[key].hypothesis.function.compile() for key in keys]
+        return ModelEvaluation(keys, evaluate_functions(functions, points))
+
+    @staticmethod
+    def _deduplicate(measurements: Sequence[Sequence[Measurement]], use_median: bool
+                     ) -> Tuple[List[Sequence[Measurement]], List[int]]:
+        """
+        Finds the measurement series that have the same coordinates and the same values used for modeling.
+        Only the values selected by use_median are compared, so that no other statistics need to be computed.
+
+        :return: The distinct measurement series and for each measurement series the index of the distinct series.
+        """
+        positions = {}
+        series = []
+        indices = []
+        for ms in measurements:
+            key = tuple((m.coordinate, m.value(use_median)) for m in ms)
+            position = positions.get(key)
+            if position is None:
+                position = positions[key] = len(series)
+                series.append(ms)
+            indices.append(position)
+        return series, indices
+
+    @staticmethod
+    def _copy_model(model: Model) -> Model:
+        copied_model = copy.copy(model)
+        copied_model.__dict__.pop('predictions', None)
+        copied_model.hypothesis = copy.deepcopy(model.hypothesis)
+        return copied_model
+
     def __eq__(self, other):
         if not isinstance(other, ModelGenerator):
             return NotImplemented
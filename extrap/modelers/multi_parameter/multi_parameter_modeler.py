@@ -1,14 +1,17 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
 import copy
+import itertools
 import logging
+import threading
 import warnings
-from typing import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence, List, Optional, Dict, Tuple
 
 import numpy as np
 
@@ -16,18 +19,120 @@ from extrap.entities.coordinate import Coordinate
 from extrap.entities.functions import ConstantFunction
 from extrap.entities.functions import MultiParameterFunction
 from extrap.entities.hypotheses import ConstantHypothesis
-from extrap.entities.hypotheses import MultiParameterHypothesis
+from extrap.entities.hypotheses import MultiParameterHypothesis, coordinates_as_array
 from extrap.entities.measurement import Measurement
 from extrap.entities.model import Model
-from extrap.entities.terms import MultiParameterTerm
-from extrap.modelers import single_parameter
+from extrap.entities.terms import MultiParameterTerm, CompoundTerm
+from extrap.modelers import constant_series, single_parameter
+from extrap.modelers.abstract_modeler import AbstractModeler
 from extrap.modelers.abstract_modeler import MultiParameterModeler as AbstractMultiParameterModeler
 from extrap.modelers.abstract_modeler import SingularModeler
 from extrap.modelers.modeler_options import modeler_options
+from extrap.modelers.multi_parameter.sum_of_products import SumOfProductsEnumerator
+from extrap.modelers.parallel import resolve_jobs
+from extrap.modelers.time_budget import TimeBudgetModeler
+from extrap.util.caching import LRUCache
+from extrap.util.progress_bar import DUMMY_PROGRESS
+
+
+class TermColumnStore:
+    """
+    Stores the values of the terms of the candidate functions of one model, evaluated with a coefficient of one.
+    Each column of a compound term of a parameter and each column of a multi-parameter term, which is a product of
+    these columns, is only computed once and shared by all candidate functions that contain the term.
+    The terms are identified by their object identity, so the store must only be used while the terms exist.
+    If a TermColumnCache is given, the columns of the compound terms are shared with the stores of other series that
+    have the same coordinates.
+    """
+
+    def __init__(self, coordinates: np.ndarray, column_cache: 'TermColumnCache' = None):
+        self.coordinates = coordinates
+        self._column_cache = column_cache
+        self._parameter_columns = {}
+        self._term_columns = {}
+
+    def parameter_column(self, parameter: int, compound_term: CompoundTerm) -> np.ndarray:
+        key = (parameter, id(compound_term))
+        column = self._parameter_columns.get(key)
+        if column is None:
+            if self._column_cache is None:
+                column = self._evaluate(parameter, compound_term)
+            else:
+                column = self._column_cache.column(self.coordinates, parameter, compound_term,
+                                                   lambda: self._evaluate(parameter, compound_term))
+            self._parameter_columns[key] = column
+        return column
+
+    def _evaluate(self, parameter: int, compound_term: CompoundTerm) -> np.ndarray:
+        column = np.ones(self.coordinates.shape[1])
+        for simple_term in compound_term.simple_terms:
+            column = column * simple_term.evaluate(self.coordinates[parameter])
+        return column
+
+    def term_column(self, term: MultiParameterTerm) -> np.ndarray:
+        column = self._term_columns.get(id(term))
+        if column is None:
+            column = np.ones(self.coordinates.shape[1])
+            for parameter, compound_term in term.parameter_term_pairs:
+                column = column * self.parameter_column(parameter, compound_term)
+            self._term_columns[id(term)] = column
+        return column
+
+    def function_columns(self, function: MultiParameterFunction) -> List[np.ndarray]:
+        return [self.term_column(term) for term in function.compound_terms]
+
+
+class TermColumnCache:
+    """
+    Shares the coordinate arrays and the columns of the compound terms between the series modeled in one call of
+    MultiParameterModeler.model.
+    The coordinates of a series are identified by the identities of the coordinate objects of its measurements,
+    which are shared by all series of an experiment. The columns are identified by the identity of the shared
+    coordinate array and the exponents of the terms, so no array contents are hashed.
+    The number of stored columns is bounded, their hits and misses are counted.
+    """
+
+    def __init__(self, maxsize=4096):
+        # the coordinate objects are kept, so that their identities stay unique while the cache is used
+        self._coordinates: Dict[Tuple[int, ...], Tuple[np.ndarray, List[Coordinate]]] = {}
+        self.columns = LRUCache(maxsize)
+
+    @property
+    def hits(self):
+        return self.columns.hits
+
+    @property
+    def misses(self):
+        return self.columns.misses
+
+    def coordinates(self, measurements: Sequence[Measurement]) -> np.ndarray:
+        """
+        Returns the read-only coordinates of the measurements, see coordinates_as_array.
+        """
+        key = tuple(id(m.coordinate) for m in measurements)
+        entry = self._coordinates.get(key)
+        if entry is None:
+            coordinates = coordinates_as_array(measurements)
+            coordinates.setflags(write=False)
+            entry = self._coordinates.setdefault(key, (coordinates, [m.coordinate for m in measurements]))
+        return entry[0]
+
+    def column(self, coordinates: np.ndarray, parameter: int, compound_term: CompoundTerm, compute) -> np.ndarray:
+        """
+        Returns the column of the compound term for the parameter at coordinates returned by this cache.
+        If the column is not stored, it is computed using compute.
+        """
+        def compute_read_only():
+            column = compute()
+            column.setflags(write=False)
+            return column
+
+        key = (id(coordinates), parameter, tuple((t.term_type, t.exponent) for t in compound_term.simple_terms))
+        return self.columns.get(key, compute_read_only)
 
 
 @modeler_options
-class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler):
+class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler, TimeBudgetModeler):
     """
     This class represents the modeler for multi parameter functions.
     In order to create a model measurements at least 5 points are needed.
@@ -43,6 +148,14 @@ class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler):
     allow_combinations_of_sums_and_products = modeler_options.add(True, bool,
                                                                   description="Allows models that consist of "
                                                                               "combinations of sums and products.")
+    candidate_budget = modeler_options.add(1000, int, name='Candidate budget',
+                                           description="Maximum number of combinations of sums and products that "
+                                                       "are examined for models with more than three parameters.")
+    single_parameter_jobs = modeler_options.add(1, int, name='Single-parameter jobs',
+                                                description="Number of threads that model the measurement series "
+                                                            "concurrently, each with its own single-parameter "
+                                                            "modeler. Values smaller than one select the number of "
+                                                            "available processors.")
     compare_with_RSS = modeler_options.add(False, bool,
                                            'If enabled the models are compared using their residual sum of squares '
                                            '(RSS) instead of their symmetric mean absolute percentage error (SMAPE)')
@@ -55,104 +168,144 @@ class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler):
         # value for the minimum number of measurement points required for modeling
         self.min_measurement_points = 5
         self.epsilon = 0.0005  # value for the minimum term contribution
+        # the layouts of the measurement points for the single-parameter models only depend on the coordinates,
+        # which are usually the same for all series of an experiment, they are cached during each call of model
+        self._measurement_point_layouts: Dict[Tuple[Tuple[float, ...], ...], tuple] = {}
+        # the evaluated terms are shared between the series during each call of model
+        self._term_column_cache: Optional[TermColumnCache] = None
+        # number of columns of compound terms that were reused from or added to the term column cache
+        self.term_column_hits = 0
+        self.term_column_misses = 0
+
+    def model_constant_series(self, measurements: Sequence[Sequence[Measurement]]) -> List[Optional[Model]]:
+        """
+        Creates the constant models of all series with constant values, see constant_series.model_constant_series.
+        """
+        return constant_series.model_constant_series(measurements, self.use_median)
 
     def find_best_measurement_points(self, measurements: Sequence[Measurement]):
         """
         Determines the best measurement points for creating the single-parameter models.
         """
+        key = tuple(m.coordinate.as_tuple() for m in measurements)
+        layout = self._measurement_point_layouts.get(key)
+        if layout is None:
+            layout = self._find_best_measurement_point_layout([m.coordinate for m in measurements])
+            self._measurement_point_layouts[key] = layout
+        layout, use_all = layout
 
-        def make_measurement(c, ms: Sequence[Measurement]):
-            if len(ms) == 1:
-                measurement = copy.copy(ms[0])
-                measurement.coordinate = Coordinate(c)
-                return measurement
+        if self.single_parameter_point_selection == 'all' and not use_all:
+            warnings.warn(
+                "Could not use all measurement points. At least 25 measurements are needed; one for each "
+                "combination of parameters.")
 
-            measurement = Measurement(Coordinate(c), ms[0].callpath, ms[0].metric, None)
+        values = np.array([m.value(self.use_median) for m in measurements], dtype=float)
+        statistics = None
+        combined_measurements = []
+        for groups in layout:
+            combined = [None] * len(groups)
+            # groups with the same number of measurements are combined together, the rows of the resulting matrices
+            # are reduced in the same order as np.mean and np.nanmean reduce the values of a single group
+            groups_by_size = {}
+            for j, (c, indices) in enumerate(groups):
+                if len(indices) == 1:
+                    measurement = copy.copy(measurements[indices[0]])
+                    measurement.coordinate = Coordinate(c)
+                    combined[j] = measurement
+                else:
+                    groups_by_size.setdefault(len(indices), []).append(j)
+
+            if groups_by_size and statistics is None:
+                statistics = [np.array([getattr(m, s) for m in measurements], dtype=float)
+                              for s in ('mean', 'minimum', 'maximum', 'std')]
+
+            for size, positions in groups_by_size.items():
+                # the matrices must be contiguous, otherwise the rows are not reduced pairwise like in np.mean
+                indices = np.stack([groups[j][1] for j in positions])
+                mean = np.sum(values[indices], axis=1) / size
+                means = statistics[0][indices]
+                minimum, maximum, std = [self._combine_statistic(statistic[indices], means, mean)
+                                         for statistic in statistics[1:]]
+
+                for k, j in enumerate(positions):
+                    first = measurements[groups[j][1][0]]
+                    measurement = Measurement(Coordinate(groups[j][0]), first.callpath, first.metric, None)
+                    measurement.mean = mean[k]
+                    measurement.median = mean[k]
+                    measurement.maximum = maximum[k]
+                    measurement.minimum = minimum[k]
+                    measurement.std = std[k]
+                    combined[j] = measurement
+
+            combined_measurements.append(combined)
 
-            if self.use_median:
-                value = np.mean([m.median for m in ms])
-            else:
-                value = np.mean([m.mean for m in ms])
-
-            measurement.mean = value
-            measurement.median = value
-            if measurement.mean == 0:
-                measurement.maximum = np.mean([m.maximum for m in ms])
-                measurement.minimum = np.mean([m.minimum for m in ms])
-                measurement.std = np.mean([m.std for m in ms])
-            else:
-                measurement.maximum = np.nanmean([m.maximum / m.mean for m in ms]) * measurement.mean
-                measurement.minimum = np.nanmean([m.minimum / m.mean for m in ms]) * measurement.mean
-                measurement.std = np.nanmean([m.std / m.mean for m in ms]) * measurement.mean
+        return combined_measurements
 
-            return measurement
+    @staticmethod
+    def _combine_statistic(values: np.ndarray, means: np.ndarray, mean: np.ndarray) -> np.ndarray:
+        """
+        Combines a statistic of each row of measurements relative to the means of the measurements,
+        unless the combined mean is zero.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = values / means
+            is_number = ~np.isnan(ratios)
+            relative = np.sum(np.where(is_number, ratios, 0), axis=1) / np.sum(is_number, axis=1) * mean
+        absolute = np.sum(values, axis=1) / values.shape[1]
+        return np.where(mean == 0, absolute, relative)
 
-        dimensions = measurements[0].coordinate.dimensions
+    @staticmethod
+    def _group_by_first_appearance(values: np.ndarray) -> np.ndarray:
+        """
+        Assigns the same group number to equal rows of values. The groups are numbered in order of their first
+        appearance.
+        """
+        if values.ndim > 1 and values.shape[1] == 0:
+            return np.zeros(len(values), dtype=int)
+        _, first_index, inverse = np.unique(values, return_index=True, return_inverse=True, axis=0)
+        number = np.empty(len(first_index), dtype=int)
+        number[np.argsort(first_index)] = np.arange(len(first_index))
+        return number[inverse.reshape(-1)]
+
+    @classmethod
+    def _find_best_measurement_point_layout(cls, coordinates: Sequence[Coordinate]):
+        """
+        Groups the indices of the coordinates for the single-parameter models, see find_best_measurement_points.
+        The layout only depends on the coordinates, therefore, it is shared by all measurements with the same
+        coordinates.
 
-        dimension_groups = [
-            {} for _ in range(dimensions)
-        ]
-        # group all measurements for each dimension, by their coordinates in the other dimensions
-        for m in measurements:
-            for p in range(dimensions):
-                coordinate_p_ = m.coordinate.as_partial_tuple(p)
-                groups_p_ = dimension_groups[p]
-                if coordinate_p_ in groups_p_:
-                    groups_p_[coordinate_p_].append(m)
-                else:
-                    groups_p_[coordinate_p_] = [m]
+        :return: For each dimension a list of the coordinate values and the indices of the coordinates that are
+                 combined for this coordinate value and whether all coordinates are used.
+        """
+        matrix = np.array([c.as_tuple() for c in coordinates], dtype=float)
+        dimensions = matrix.shape[1]
 
         use_all = True
-        result_groups = []
-        for p, grp in enumerate(dimension_groups):
+        layout = []
+        for p in range(dimensions):
+            # group all measurements by their coordinates in the other dimensions
+            lines = cls._group_by_first_appearance(np.delete(matrix, p, axis=1))
+            lengths = np.bincount(lines)
+            if np.any(lengths != lengths[0]):
+                use_all = False
+
             # select the longest groups, which cover the biggest range in each direction
-            grp_values = iter(grp.values())
-            first_ms = next(grp_values)
-            current_max = len(first_ms)
-            candidates = [first_ms]
-            for ms in grp_values:
-                len_ms = len(ms)
-                if len_ms > current_max:
-                    current_max = len_ms
-                    candidates = [ms]
-                    use_all = False
-                elif len_ms == current_max:
-                    candidates.append(ms)
-                else:
-                    use_all = False
+            selected = np.flatnonzero(lengths[lines] == lengths.max())
+            selected = selected[np.argsort(lines[selected], kind='stable')]
 
             # regroup the longest groups by their coordinate in the current dimension
-            groups = {}
-            for c in candidates:
-                for m in c:
-                    coordinate_p_ = m.coordinate[p]
-                    if coordinate_p_ in groups:
-                        groups[coordinate_p_].append(m)
-                    else:
-                        groups[coordinate_p_] = [m]
-
-            # remove all measurements from the group which cover not the same range as the inital group
-            cms = iter(groups.values())
-            first_list = next(cms)
-            common_coords = set(m.coordinate.as_partial_tuple(p) for m in first_list)
-            for g in cms:
-                for i in reversed(range(len(g))):
-                    if g[i].coordinate.as_partial_tuple(p) not in common_coords:
-                        del g[i]
-
-            result_groups.append(groups)
+            points = cls._group_by_first_appearance(matrix[selected, p])
 
-        if self.single_parameter_point_selection == 'all' and not use_all:
-            warnings.warn(
-                "Could not use all measurement points. At least 25 measurements are needed; one for each "
-                "combination of parameters.")
+            # remove all measurements from the group which cover not the same range as the initial group
+            common_lines = np.unique(lines[selected[points == 0]])
+            is_common = np.isin(lines[selected], common_lines)
+            selected, points = selected[is_common], points[is_common]
 
-        previous = np.seterr(invalid='ignore')
-        combined_measurements = [[make_measurement(c, ms) for c, ms in grp.items() if ms]
-                                 for p, grp in enumerate(result_groups)]
-        np.seterr(**previous)
+            order = np.argsort(points, kind='stable')
+            groups = np.split(selected[order], np.flatnonzero(np.diff(points[order])) + 1)
+            layout.append(tuple((coordinates[g[0]][p], g) for g in groups))
 
-        return combined_measurements
+        return tuple(layout), use_all
 
     @staticmethod
     def find_first_measurement_points(measurements: Sequence[Measurement]):
@@ -181,10 +334,61 @@ class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler):
 
         return candidate_list
 
-    def create_model(self, measurements: Sequence[Measurement]):
+    # counters of the single-parameter modelers, which are summed up after modeling concurrently
+    _SINGLE_PARAMETER_COUNTERS = ('pruned_by_contribution', 'pruned_by_bound', 'fits_performed', 'fits_saved')
+
+    def model(self, measurements: Sequence[Sequence[Measurement]], progress_bar=DUMMY_PROGRESS) -> Sequence[Model]:
+        """
+        Creates the models of the measurement series, concurrently if single_parameter_jobs is not one.
+        Each thread uses its own copy of the single-parameter modeler, so that their deadlines and counters are
+        independent. The counters of the copies are added to the single-parameter modeler afterwards.
+        """
+        self._measurement_point_layouts = {}
+        self._term_column_cache = TermColumnCache()
+        try:
+            jobs = min(resolve_jobs(self.single_parameter_jobs), len(measurements))
+            if jobs <= 1:
+                return super().model(measurements, progress_bar)
+
+            local = threading.local()
+            single_parameter_modelers = []
+
+            def initialize_thread():
+                local.single_parameter_modeler = copy.copy(self.single_parameter_modeler)
+                for counter in self._SINGLE_PARAMETER_COUNTERS:
+                    if hasattr(local.single_parameter_modeler, counter):
+                        setattr(local.single_parameter_modeler, counter, 0)
+                single_parameter_modelers.append(local.single_parameter_modeler)
+
+            models = []
+            progress_bar.total += len(measurements)
+            with ThreadPoolExecutor(jobs, initializer=initialize_thread) as executor:
+                for model in executor.map(lambda ms: self.create_model(ms, local.single_parameter_modeler),
+                                          measurements):
+                    models.append(model)
+                    progress_bar.update(1)
+
+            for single_parameter_modeler in single_parameter_modelers:
+                for counter in self._SINGLE_PARAMETER_COUNTERS:
+                    if hasattr(single_parameter_modeler, counter):
+                        setattr(self.single_parameter_modeler, counter,
+                                getattr(self.single_parameter_modeler, counter) +
+                                getattr(single_parameter_modeler, counter))
+            return models
+        finally:
+            self._measurement_point_layouts = {}
+            self.term_column_hits += self._term_column_cache.hits
+            self.term_column_misses += self._term_column_cache.misses
+            self._term_column_cache = None
+
+    def create_model(self, measurements: Sequence[Measurement], single_parameter_modeler: AbstractModeler = None):
         """
         Create a multi-parameter model using the given measurements.
+        By default, the single-parameter models are created using the single_parameter_modeler.
         """
+        if single_parameter_modeler is None:
+            single_parameter_modeler = self.single_parameter_modeler
+        deadline = self.create_deadline()
         if self.single_parameter_point_selection == 'auto' \
                 or self.single_parameter_point_selection == 'all':
             measurements_sp = self.find_best_measurement_points(measurements)
@@ -196,8 +400,11 @@ class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler):
         # model all single parameter experiments using only the selected points from the step before
         # parameters = list(range(measurements[0].coordinate.dimensions))
 
-        models = self.single_parameter_modeler.model(measurements_sp)
+        # the single-parameter models share the deadline of the multi-parameter model
+        single_parameter_modeler.deadline = deadline
+        models = single_parameter_modeler.model(measurements_sp)
         functions = [m.hypothesis.function for m in models]
+        exhaustive = all(m.exhaustive for m in models)
 
         # check if the number of measurements satisfies the reuqirements of the modeler (>=5)
         if len(measurements) < self.min_measurement_points:
@@ -209,6 +416,11 @@ class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler):
         # coordinates = list(dict.fromkeys(m.coordinate for m in measurements).keys())
 
         # use all available additional points for modeling the multi-parameter models
+        column_cache = self._term_column_cache
+        if column_cache is None:
+            coordinates = coordinates_as_array(measurements)
+        else:
+            coordinates = column_cache.coordinates(measurements)
         constantCost = 0
         meanModel = 0
 
@@ -233,7 +445,9 @@ class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler):
             constant_function.constant_coefficient = meanModel
             constant_hypothesis = ConstantHypothesis(constant_function, self.use_median)
             constant_hypothesis.compute_cost(measurements)
-            return Model(constant_hypothesis)
+            model = Model(constant_hypothesis)
+            model.exhaustive = exhaustive
+            return model
 
         # in case is only one parameter, make a single parameter function
         elif len(compound_term_pairs) == 1:
@@ -245,9 +459,11 @@ class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler):
             # constant_coefficient = functions[param].get_constant_coefficient()
             # multi_parameter_function.set_constant_coefficient(constant_coefficient)
             multi_parameter_hypothesis = MultiParameterHypothesis(multi_parameter_function, self.use_median)
-            multi_parameter_hypothesis.compute_coefficients(measurements)
-            multi_parameter_hypothesis.compute_cost(measurements)
-            return Model(multi_parameter_hypothesis)
+            multi_parameter_hypothesis.compute_coefficients(measurements, coordinates)
+            multi_parameter_hypothesis.compute_cost(measurements, coordinates)
+            model = Model(multi_parameter_hypothesis)
+            model.exhaustive = exhaustive
+            return model
 
         # create multiplicative multi parameter term
         mult = MultiParameterTerm(*compound_term_pairs)
@@ -335,51 +551,85 @@ class MultiParameterModeler(AbstractMultiParameterModeler, SingularModeler):
                 MultiParameterFunction(mult_y_z, add[0], add[2])
             ]
 
-        # create the hypotheses from the functions
-        hypotheses = [MultiParameterHypothesis(f, self.use_median)
-                      for f in mp_functions]
+        term_columns = TermColumnStore(coordinates, column_cache)
+        enumerator = None
+        if self.allow_combinations_of_sums_and_products and len(compound_term_pairs) > 3:
+            # search the combinations of sums and products for models with more than three parameters
+            positions = range(len(compound_term_pairs))
+            enumerator = SumOfProductsEnumerator(
+                compound_term_pairs, term_columns, np.array([m.value(self.use_median) for m in measurements]),
+                self.epsilon, self.candidate_budget, exclude=[[positions], [[i] for i in positions]])
+            mp_functions = itertools.chain(mp_functions, enumerator)
 
-        # select one function as the bestHypothesis for the start
-        best_hypothesis = copy.deepcopy(hypotheses[0])
-        best_hypothesis.compute_coefficients(measurements)
-        best_hypothesis.compute_cost(measurements)
-        best_hypothesis.compute_adjusted_rsquared(constantCost, measurements)
+        # create the hypotheses from the functions
+        hypotheses = (MultiParameterHypothesis(f, self.use_median) for f in mp_functions)
 
-        logging.info(f"hypothesis 0: {best_hypothesis.function} --- smape: {best_hypothesis.SMAPE} "
-                     f"--- ar2: {best_hypothesis.AR2} --- rss: {best_hypothesis.RSS} "
-                     f"--- rrss: {best_hypothesis.rRSS} --- re: {best_hypothesis.RE}")
+        # the candidate functions share their terms, therefore, the coefficients of the best hypothesis are stored
+        # and restored after the search
+        best_hypothesis = None
+        best_coefficients = None
 
         # find the best hypothesis
         for i, hypothesis in enumerate(hypotheses):
-            hypothesis.compute_coefficients(measurements)
-            hypothesis.compute_cost(measurements)
+            if best_hypothesis is not None and deadline is not None and deadline.expired():
+                break
+            hypothesis.compute_coefficients(measurements, coordinates,
+                                            term_columns.function_columns(hypothesis.function))
+            hypothesis.compute_cost(measurements, coordinates)
             hypothesis.compute_adjusted_rsquared(constantCost, measurements)
 
             logging.info(f"hypothesis {i}: {hypothesis.function} --- smape: {hypothesis.SMAPE} "
                          f"--- ar2: {hypothesis.AR2} --- rss: {hypothesis.RSS} "
                          f"--- rrss: {hypothesis.rRSS} --- re: {hypothesis.RE}")
 
-            term_contribution_big_enough = True
-            # for all compound terms check if they are smaller than minimum allowed contribution
-            for term in hypothesis.function.compound_terms:
-                # ignore this hypothesis, since one of the terms contributes less than epsilon to the function
-                if term.coefficient == 0 or hypothesis.calc_term_contribution(term, measurements) < self.epsilon:
-                    term_contribution_big_enough = False
-                    break
-
-            if not term_contribution_big_enough:
-                continue
+            # select the first function as the best hypothesis for the start
+            if best_hypothesis is None:
+                is_better = True
+            elif not self._is_term_contribution_big_enough(hypothesis, measurements):
+                is_better = False
+            elif enumerator is not None and not self._justifies_additional_terms(hypothesis, best_hypothesis):
+                is_better = False
             elif self.compare_with_RSS:
-                if hypotheses[i].RSS < best_hypothesis.RSS:
-                    best_hypothesis = copy.deepcopy(hypotheses[i])
-            elif hypotheses[i].SMAPE < best_hypothesis.SMAPE:
-                best_hypothesis = copy.deepcopy(hypotheses[i])
+                is_better = hypothesis.RSS < best_hypothesis.RSS
+            else:
+                is_better = hypothesis.SMAPE < best_hypothesis.SMAPE
+
+            if is_better:
+                best_hypothesis = hypothesis
+                if enumerator is not None:
+                    enumerator.update_best(hypothesis.RSS)
+                best_coefficients = [hypothesis.function.constant_coefficient] + \
+                                    [term.coefficient for term in hypothesis.function]
+
+        best_hypothesis.function.constant_coefficient = best_coefficients[0]
+        for term, coefficient in zip(best_hypothesis.function, best_coefficients[1:]):
+            term.coefficient = coefficient
 
         # add the best found hypothesis to the model list
         model = Model(best_hypothesis)
+        model.exhaustive = exhaustive and (deadline is None or not deadline.reached)
 
         logging.info(f"best hypothesis: {best_hypothesis.function} --- smape: {best_hypothesis.SMAPE} "
                      f"--- ar2: {best_hypothesis.AR2} --- rss: {best_hypothesis.RSS} "
                      f"--- rrss: {best_hypothesis.rRSS} --- re: {best_hypothesis.RE}")
 
         return model
+
+    @staticmethod
+    def _justifies_additional_terms(hypothesis: MultiParameterHypothesis, best_hypothesis: MultiParameterHypothesis):
+        """
+        Checks whether the hypothesis explains the measurements better than the best hypothesis, after adjusting for
+        its number of terms. Used for the large functions of the sum of products search, which tend to overfit.
+        """
+        if len(hypothesis.function.compound_terms) <= len(best_hypothesis.function.compound_terms):
+            return True
+        return hypothesis.AR2 > best_hypothesis.AR2
+
+    def _is_term_contribution_big_enough(self, hypothesis: MultiParameterHypothesis,
+                                         measurements: Sequence[Measurement]):
+        # for all compound terms check if they are smaller than minimum allowed contribution
+        for term in hypothesis.function.compound_terms:
+            # ignore this hypothesis, since one of the terms contributes less than epsilon to the function
+            if term.coefficient == 0 or hypothesis.calc_term_contribution(term, measurements) < self.epsilon:
+                return False
+        return True
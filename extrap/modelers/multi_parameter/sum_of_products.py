@@ -0,0 +1,179 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+from __future__ import annotations
+
+import itertools
+from typing import Sequence, Tuple, List, Iterator, Iterable, TYPE_CHECKING
+
+import numpy
+
+from extrap.entities.functions import MultiParameterFunction
+from extrap.entities.terms import MultiParameterTerm, CompoundTerm
+
+if TYPE_CHECKING:
+    from extrap.modelers.multi_parameter.multi_parameter_modeler import TermColumnStore
+
+
+class SumOfProductsEnumerator:
+    """
+    Enumerates multi-parameter functions that are sums of products of the given single-parameter terms.
+
+    Each function consists of a set of product terms, each product term uses a subset of the parameters.
+    Only functions that use every parameter are returned. Because the number of these functions grows
+    double-exponentially with the number of parameters, the functions are built up term by term using a beam search.
+    The product terms are ordered by the residual sum of squares (RSS) they achieve alone; a function is only extended
+    by terms that come after its last term. The search is pruned:
+
+    * Product terms that contribute less than epsilon to the measured values, even when they are used alone, are
+      not used. Functions in which one term contributes less than epsilon are neither returned nor extended.
+    * Functions are only extended, if adding the last term reduced the RSS.
+    * Adding terms to a function never increases its RSS. Therefore, the RSS of a function extended by all terms that
+      may still be added is a lower bound for all functions that can be derived from it. Functions whose bound is not
+      smaller than the RSS of the best hypothesis, which is reported using update_best, are not extended.
+      Functions whose own RSS is not smaller than it are not returned.
+      This is exact if the hypotheses are compared using the RSS, otherwise it is a heuristic.
+    * Only the BEAM_WIDTH functions with the smallest RSS are returned and extended for each number of terms.
+    * The number of examined functions is limited by the candidate budget.
+    * Functions have at most max_terms product terms, by default DEFAULT_MAX_TERMS, like the largest functions that
+      are examined for three parameters. Larger functions tend to overfit the measurements.
+
+    The least-squares problems are solved on the term columns, which are evaluated only once, and the RSS is computed
+    from the residuals.
+    """
+    BEAM_WIDTH = 8
+    DEFAULT_MAX_TERMS = 3
+
+    def __init__(self, compound_term_pairs: Sequence[Tuple[int, CompoundTerm]], term_columns: TermColumnStore,
+                 values: numpy.ndarray, epsilon: float, budget: int, max_terms: int = None,
+                 exclude: Iterable[Sequence[Sequence[int]]] = ()):
+        """
+        :param compound_term_pairs: The single-parameter terms and the indices of their parameters.
+        :param term_columns: The store that provides the evaluated terms.
+        :param values: The measured values.
+        :param epsilon: The minimum term contribution.
+        :param budget: The maximum number of functions that are examined.
+        :param max_terms: The maximum number of product terms per function, by default DEFAULT_MAX_TERMS.
+        :param exclude: Functions, given as sequences of the positions in compound_term_pairs used in each product
+                        term, that are not returned, e.g., because they are already evaluated.
+        """
+        self.compound_term_pairs = compound_term_pairs
+        self.epsilon = epsilon
+        self.budget = budget
+        self.max_terms = max_terms if max_terms is not None else self.DEFAULT_MAX_TERMS
+        self._best_rss = numpy.inf
+
+        # number of examined functions and number of functions or terms that were pruned
+        self.examined = 0
+        self.pruned_by_bound = 0
+        self.pruned_by_contribution = 0
+
+        self._terms: List[MultiParameterTerm] = []
+        self._subsets: List[Tuple[int, ...]] = []
+        self._exclude = {frozenset(frozenset(t) for t in function) for function in exclude}
+
+        positions = range(len(compound_term_pairs))
+        for size in reversed(positions):
+            for subset in itertools.combinations(positions, size + 1):
+                self._subsets.append(subset)
+                self._terms.append(MultiParameterTerm(*(compound_term_pairs[i] for i in subset)))
+
+        columns = [numpy.ones(len(values))] + [term_columns.term_column(t) for t in self._terms]
+        self._design = numpy.stack(columns, axis=-1)
+        self._values = values
+        self._sum_of_squares = values @ values
+        self._columns = columns
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            self._inverse_values = 1 / numpy.abs(values)
+
+        # order the usable terms by the RSS they achieve alone
+        self._pool = []
+        for t in range(len(self._terms)):
+            coefficients, rss = self._solve((t,))
+            if self._contributes((t,), coefficients):
+                self._pool.append((rss, t))
+            else:
+                self.pruned_by_contribution += 1
+        self._pool = [t for _, t in sorted(self._pool)]
+        self._rank = {t: i for i, t in enumerate(self._pool)}
+
+    def update_best(self, rss: float):
+        """
+        Reports the RSS of the currently best hypothesis, which is used to prune the search.
+        """
+        self._best_rss = rss
+
+    def _solve(self, terms: Sequence[int]):
+        design = self._design[:, [0] + [t + 1 for t in terms]]
+        coefficients, _, _, _ = numpy.linalg.lstsq(design, self._values, None)
+        residuals = self._values - design @ coefficients
+        return coefficients, residuals @ residuals
+
+    def _contributes(self, terms: Sequence[int], coefficients: numpy.ndarray):
+        for coefficient, t in zip(coefficients[1:], terms):
+            if coefficient == 0:
+                return False
+            with numpy.errstate(invalid='ignore'):
+                contribution = numpy.max(numpy.abs(coefficient * self._columns[t + 1]) * self._inverse_values)
+            if contribution < self.epsilon:
+                return False
+        return True
+
+    def _covers_all_parameters(self, terms: Tuple[int, ...]):
+        covered = set()
+        for t in terms:
+            covered.update(self._subsets[t])
+        return len(covered) == len(self.compound_term_pairs)
+
+    def _is_excluded(self, terms: Tuple[int, ...]):
+        return frozenset(frozenset(self._subsets[t]) for t in terms) in self._exclude
+
+    def _is_not_better(self, rss):
+        # small tolerance for rounding errors, because the RSS of the best hypothesis is computed separately
+        return rss >= self._best_rss + 1e-12 * self._sum_of_squares
+
+    def _can_be_extended(self, terms: Tuple[int, ...]):
+        if len(terms) >= self.max_terms or self._rank[terms[-1]] + 1 >= len(self._pool):
+            return False
+        if self.examined >= self.budget:
+            return False
+        self.examined += 1
+        _, bound = self._solve(terms + tuple(self._pool[self._rank[terms[-1]] + 1:]))
+        if self._is_not_better(bound):
+            self.pruned_by_bound += 1
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[MultiParameterFunction]:
+        beam = [((), self._sum_of_squares)]
+        while beam and self.examined < self.budget:
+            candidates = []
+            for terms, parent_rss in beam:
+                start = self._rank[terms[-1]] + 1 if terms else 0
+                for t in self._pool[start:]:
+                    if self.examined >= self.budget:
+                        break
+                    self.examined += 1
+                    child = terms + (t,)
+                    coefficients, rss = self._solve(child)
+                    if not self._contributes(child, coefficients):
+                        self.pruned_by_contribution += 1
+                    elif rss >= parent_rss:
+                        self.pruned_by_bound += 1
+                    else:
+                        candidates.append((rss, child))
+
+            candidates.sort()
+            beam = []
+            for rss, terms in candidates[:self.BEAM_WIDTH]:
+                if self._covers_all_parameters(terms) and not self._is_excluded(terms):
+                    if self._is_not_better(rss):
+                        self.pruned_by_bound += 1
+                    else:
+                        yield MultiParameterFunction(*(self._terms[t] for t in terms))
+                if self._can_be_extended(terms):
+                    beam.append((terms, rss))
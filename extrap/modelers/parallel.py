@@ -0,0 +1,83 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Sequence, Optional, List, Iterator, Tuple
+
+from extrap.entities.measurement import Measurement
+from extrap.entities.model import Model
+from extrap.modelers.abstract_modeler import AbstractModeler
+from extrap.util.progress_bar import DUMMY_PROGRESS
+
+# number of chunks per worker, more chunks result in a better load balance but cause more communication
+CHUNKS_PER_JOB = 4
+
+_worker_modeler: Optional[AbstractModeler] = None
+
+
+def _initialize_worker(modeler: AbstractModeler):
+    # the modeler is transferred once per worker process, its state (including the state created by the
+    # on_change callbacks of the modeler options) is restored from its instance dictionary
+    global _worker_modeler
+    _worker_modeler = modeler
+
+
+def _model_chunk(measurements: Sequence[Sequence[Measurement]]) -> Sequence[Model]:
+    return _worker_modeler.model(measurements)
+
+
+def resolve_jobs(jobs: Optional[int]) -> int:
+    """
+    Returns the number of worker processes for the given number of jobs.
+    None or values smaller than one select the number of available processors.
+    """
+    if jobs is None or jobs < 1:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def model_parallel(modeler: AbstractModeler, measurements: Sequence[Sequence[Measurement]], jobs: Optional[int],
+                   progress_bar=DUMMY_PROGRESS) -> List[Model]:
+    """
+    Creates a model for each sequence of measurements like modeler.model, but distributes the sequences over a pool
+    of worker processes. The models are returned in the order of the measurements.
+
+    :param modeler: The modeler, it is copied to each worker process.
+    :param measurements: The measurement sequences to model.
+    :param jobs: The number of worker processes, see resolve_jobs.
+    :param progress_bar: Is advanced whenever the models of a chunk of measurement sequences are received.
+    """
+    models: List[Optional[Model]] = [None] * len(measurements)
+    for start, chunk_models in model_parallel_iter(modeler, measurements, jobs, progress_bar):
+        models[start:start + len(chunk_models)] = chunk_models
+    return models
+
+
+def model_parallel_iter(modeler: AbstractModeler, measurements: Sequence[Sequence[Measurement]], jobs: Optional[int],
+                        progress_bar=DUMMY_PROGRESS) -> Iterator[Tuple[int, Sequence[Model]]]:
+    """
+    Creates the models like model_parallel, but yields the models of each chunk as soon as it is received together
+    with the index of the first measurement sequence of the chunk.
+    The chunks are submitted in the order of the measurements, but may be received in any order.
+    """
+    jobs = resolve_jobs(jobs)
+    if jobs == 1 or len(measurements) <= 1:
+        yield 0, modeler.model(measurements, progress_bar)
+        return
+
+    chunk_size = math.ceil(len(measurements) / (jobs * CHUNKS_PER_JOB))
+    chunks = [measurements[i:i + chunk_size] for i in range(0, len(measurements), chunk_size)]
+    progress_bar.total += len(measurements)
+    with ProcessPoolExecutor(min(jobs, len(chunks)), initializer=_initialize_worker,
+                             initargs=(modeler,)) as executor:
+        futures = {executor.submit(_model_chunk, chunk): i * chunk_size for i, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            chunk_models = future.result()
+            progress_bar.update(len(chunk_models))
+            yield futures[future], chunk_models
@@ -0,0 +1,283 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import functools
+import heapq
+import inspect
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Optional, Sequence
+
+import numpy
+
+from extrap.entities import hypotheses
+from extrap.entities.hypotheses import Hypothesis, ConstantHypothesis, SingleParameterHypothesis, \
+    MultiParameterHypothesis
+from extrap.entities.measurement import Measurement
+from extrap.modelers import constant_series, single_parameter, multi_parameter
+from extrap.modelers.model_generator import ModelGenerator
+from extrap.modelers.single_parameter import batched_search
+from extrap.modelers.single_parameter.abstract_base import AbstractSingleParameterModeler
+from extrap.modelers.single_parameter.batched_search import BatchedHypothesisSearch
+from extrap.util.progress_bar import ProgressBar
+
+
+@dataclass
+class PhaseStatistics:
+    """
+    Wall time and number of calls of one modeling phase.
+    """
+    calls: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+@dataclass
+class SeriesTiming:
+    """
+    Wall time for modeling one measurement series, or a group of series that were modeled together.
+    """
+    time: float
+    label: str
+    series: int = 1
+
+
+@dataclass
+class ProfileReport:
+    """
+    Result of a ModelingProfiler.
+
+    The times of the phases are inclusive, i.e., the time of a phase contains the times of all phases that are
+    executed as part of it.
+    """
+    total_time: float
+    phases: Dict[str, PhaseStatistics] = field(default_factory=dict)
+    slowest_series: List[SeriesTiming] = field(default_factory=list)
+
+    def __str__(self):
+        lines = ["Modeling profile (total time: {:.3f} s)".format(self.total_time),
+                 "{:<40} {:>10} {:>12} {:>12} {:>12}".format('Phase', 'Calls', 'Total [s]', 'Mean [ms]', 'Max [ms]')]
+        for name, statistics in sorted(self.phases.items(), key=lambda p: -p[1].total_time):
+            lines.append("{:<40} {:>10} {:>12.3f} {:>12.3f} {:>12.3f}".format(
+                name, statistics.calls, statistics.total_time, statistics.mean_time * 1000,
+                statistics.max_time * 1000))
+        if self.slowest_series:
+            lines.append("Slowest series:")
+            for timing in self.slowest_series:
+                if timing.series > 1:
+                    lines.append("{:>12.3f} s  {} (modeled together with {} other series)".format(
+                        timing.time, timing.label, timing.series - 1))
+                else:
+                    lines.append("{:>12.3f} s  {}".format(timing.time, timing.label))
+        return '\n'.join(lines)
+
+
+class ModelingProfiler:
+    """
+    Opt-in instrumentation of the modeling process, it collects the wall time and the number of calls of the modeling
+    phases and the slowest measurement series.
+
+    While the profiler is enabled, the methods of the modeling phases are replaced by timed wrappers.
+    Only one profiler can be enabled at a time. Modeling in worker processes (jobs other than one) is not profiled.
+
+    Usage::
+
+        with ModelingProfiler() as profiler:
+            model_generator.model_all()
+        print(profiler.report())
+    """
+    _enabled_profiler: Optional['ModelingProfiler'] = None
+
+    def __init__(self, slowest_series: int = 10):
+        """
+        :param slowest_series: The number of slowest series that are listed in the report.
+        """
+        self.number_of_slowest_series = slowest_series
+        self._phases: Dict[str, PhaseStatistics] = {}
+        self._slowest_series: List[Tuple[float, int, SeriesTiming]] = []
+        self._series_counter = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._originals = []
+        self._start = None
+        self._total_time = 0.0
+        # the modeler of the model generator, only its series are timed if it is set
+        self._top_level_modeler = None
+
+    @property
+    def enabled(self) -> bool:
+        return ModelingProfiler._enabled_profiler is self
+
+    def enable(self):
+        """
+        Starts profiling and instruments the modeling phases.
+        """
+        if ModelingProfiler._enabled_profiler is not None:
+            raise RuntimeError("Another modeling profiler is already enabled.")
+        ModelingProfiler._enabled_profiler = self
+        for owner, name, phase in self._instrumented_phases():
+            self._instrument(owner, name, self._timed(phase))
+        for modeler in self._modeler_classes():
+            for name in ('create_model', 'create_models'):
+                if name in modeler.__dict__ and not getattr(modeler.__dict__[name], '__isabstractmethod__', False):
+                    self._instrument(modeler, name, self._timed_series(f"{modeler.__name__}.{name}"))
+        self._start = time.perf_counter()
+
+    def disable(self):
+        """
+        Stops profiling and restores the original methods.
+        """
+        if not self.enabled:
+            return
+        self._total_time += time.perf_counter() - self._start
+        for owner, name, original in reversed(self._originals):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._originals.clear()
+        ModelingProfiler._enabled_profiler = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disable()
+        return False
+
+    def report(self) -> ProfileReport:
+        """
+        Returns the statistics collected so far.
+        """
+        total_time = self._total_time
+        if self.enabled:
+            total_time += time.perf_counter() - self._start
+        with self._lock:
+            phases = {name: PhaseStatistics(s.calls, s.total_time, s.max_time) for name, s in self._phases.items()}
+            slowest_series = [timing for _, _, timing in sorted(self._slowest_series, reverse=True)]
+        return ProfileReport(total_time, phases, slowest_series)
+
+    @staticmethod
+    def _instrumented_phases():
+        yield ModelGenerator, 'model_all', 'ModelGenerator.model_all'
+        yield ModelGenerator, '_copy_model', 'copy models'
+        yield constant_series, 'model_constant_series', 'model constant series'
+        yield AbstractSingleParameterModeler, 'find_best_hypothesis', 'find_best_hypothesis'
+        yield BatchedHypothesisSearch, 'search', 'batched search'
+        for hypothesis in (Hypothesis, ConstantHypothesis, SingleParameterHypothesis, MultiParameterHypothesis):
+            for name in ('compute_coefficients', 'compute_cost', 'compute_cost_leave_one_out', 'compute_cost_press',
+                         'calc_term_contribution'):
+                if name in hypothesis.__dict__:
+                    yield hypothesis, name, name
+        yield numpy.linalg, 'lstsq', 'lstsq'
+        yield hypotheses, 'pseudo_inverse', 'pseudo_inverse'
+        yield batched_search, 'pseudo_inverse', 'pseudo_inverse'
+        yield ProgressBar, 'update', 'progress bar updates'
+
+    @staticmethod
+    def _modeler_classes():
+        classes = []
+        for modeler in (*single_parameter.all_modelers.values(), *multi_parameter.all_modelers.values()):
+            for cls in inspect.getmro(modeler):
+                if cls not in classes:
+                    classes.append(cls)
+        return classes
+
+    def _instrument(self, owner, name, decorator):
+        original = inspect.getattr_static(owner, name)
+        if isinstance(original, staticmethod):
+            wrapper = staticmethod(decorator(original.__func__))
+        elif isinstance(original, classmethod):
+            wrapper = classmethod(decorator(original.__func__))
+        else:
+            wrapper = decorator(original)
+        # inherited attributes are removed again, instead of being copied to the owner
+        self._originals.append((owner, name, original if name in vars(owner) else None))
+        setattr(owner, name, wrapper)
+
+    def _active_phases(self) -> set:
+        active_phases = getattr(self._local, 'active_phases', None)
+        if active_phases is None:
+            active_phases = self._local.active_phases = set()
+        return active_phases
+
+    def _timed(self, phase: str):
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                active_phases = self._active_phases()
+                if phase in active_phases:
+                    # recursive calls of the same phase are only counted once
+                    return function(*args, **kwargs)
+                if phase == 'ModelGenerator.model_all':
+                    self._top_level_modeler = args[0].modeler
+                active_phases.add(phase)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self._record(phase, time.perf_counter() - start)
+                    active_phases.discard(phase)
+
+            return wrapper
+
+        return decorator
+
+    def _timed_series(self, phase: str):
+        timed = self._timed(phase)
+
+        def decorator(function):
+            timed_function = timed(function)
+
+            @functools.wraps(function)
+            def wrapper(modeler, series, *args, **kwargs):
+                start = time.perf_counter()
+                result = timed_function(modeler, series, *args, **kwargs)
+                if self._top_level_modeler is None or modeler is self._top_level_modeler:
+                    # the series of nested modelers, e.g., the single-parameter modelers of a multi-parameter
+                    # modeler, are part of the series of their parent
+                    self._record_series(time.perf_counter() - start, series, phase.endswith('create_models'))
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def _record(self, phase: str, duration: float):
+        with self._lock:
+            statistics = self._phases.get(phase)
+            if statistics is None:
+                statistics = self._phases[phase] = PhaseStatistics()
+            statistics.calls += 1
+            statistics.total_time += duration
+            statistics.max_time = max(statistics.max_time, duration)
+
+    def _record_series(self, duration: float, series, is_group: bool):
+        if is_group:
+            label, count = (self._label(series[0]) if series else ''), len(series)
+        else:
+            label, count = self._label(series), 1
+        with self._lock:
+            self._series_counter += 1
+            entry = (duration, self._series_counter, SeriesTiming(duration, label, count))
+            if len(self._slowest_series) < self.number_of_slowest_series:
+                heapq.heappush(self._slowest_series, entry)
+            elif self._slowest_series and duration > self._slowest_series[0][0]:
+                heapq.heapreplace(self._slowest_series, entry)
+
+    @staticmethod
+    def _label(measurements: Sequence[Measurement]) -> str:
+        if not measurements:
+            return ''
+        measurement = measurements[0]
+        return f"{measurement.callpath}, {measurement.metric}"
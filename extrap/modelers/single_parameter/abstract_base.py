@@ -7,16 +7,21 @@
 
 import logging
 from abc import ABC
-from typing import Iterable, TypeVar, Union, Tuple, Sequence
+from typing import Iterable, TypeVar, Union, Tuple, Sequence, List, Optional
 
 import numpy
 
 from extrap.entities.functions import ConstantFunction
-from extrap.entities.hypotheses import Hypothesis, SingleParameterHypothesis, MAX_HYPOTHESIS, ConstantHypothesis
+from extrap.entities.hypotheses import Hypothesis, SingleParameterHypothesis, MAX_HYPOTHESIS, ConstantHypothesis, \
+    sequential_sum
 from extrap.entities.measurement import Measurement
 from extrap.entities.parameter import Parameter
-from extrap.modelers.abstract_modeler import AbstractModeler
+from extrap.entities.model import Model
+from extrap.entities.terms import CompoundTerm
+from extrap.modelers import constant_series
 from extrap.modelers.modeler_options import modeler_options
+from extrap.modelers.time_budget import TimeBudgetModeler
+from extrap.util.deadline import Deadline
 
 _H = TypeVar('_H', bound=Hypothesis)
 _SH = TypeVar('_SH', bound=SingleParameterHypothesis)
@@ -25,38 +30,51 @@ H = Union[_H, Hypothesis]
 
 
 @modeler_options
-class AbstractSingleParameterModeler(AbstractModeler, ABC):
+class AbstractSingleParameterModeler(TimeBudgetModeler, ABC):
     CLEAN_CONSTANT_EPSILON = 1e-3  # minimum allowed value for a constant coefficient before it is set to 0
 
     allow_log_terms = modeler_options.add(True, bool, 'Allows models with logarithmic terms')
     use_crossvalidation = modeler_options.add(True, bool, 'Enables cross-validation', name='Cross-validation')
+    crossvalidation_method = modeler_options.add('press', str, range=['press', 'reference'],
+                                                 name='Cross-validation method',
+                                                 description='Selects how the leave-one-out cross-validation is '
+                                                             'computed: "press" derives all folds from one fit using '
+                                                             'the hat matrix, "reference" refits every fold')
     compare_with_RSS = modeler_options.add(False, bool,
                                            'If enabled the models are compared using their residual sum of squares '
                                            '(RSS) instead of their symmetric mean absolute percentage error (SMAPE)')
+    prune_hypotheses = modeler_options.add(True, bool, 'Stops fitting a hypothesis as soon as it is certain that it '
+                                                       'is not better than the best hypothesis, because one of its '
+                                                       'terms contributes too little or, for the reference '
+                                                       'cross-validation without batched search, its partial cost '
+                                                       'exceeds the cost of the best hypothesis. The selected '
+                                                       'hypothesis does not change. Disable to compute the costs of '
+                                                       'all hypotheses.',
+                                           name='Prune hypotheses')
 
     def __init__(self, use_median: bool):
         super().__init__(use_median)
         self.epsilon = 0.0005  # value for the minimum term contribution
-
-    def compare_hypotheses(self, old: Hypothesis, new: SingleParameterHypothesis, measurements: Sequence[Measurement]):
+        # number of hypotheses that were rejected before their cross-validation, because one of their terms contributes
+        # less than epsilon, and number of hypotheses whose cross-validation was stopped early, the latter is only
+        # possible if each fold is refitted separately, i.e., for the reference cross-validation without batched search
+        self.pruned_by_contribution = 0
+        self.pruned_by_bound = 0
+
+    def compare_hypotheses(self, old: Hypothesis, new: SingleParameterHypothesis, measurements: Sequence[Measurement],
+                           check_contribution=True):
         """
         Compares the best with the new hypothesis and decides which one is a better fit for the data.
         If the new hypothesis is better than the best one it becomes the best hypothesis.
         The choice is made based on the RSS or SMAPE.
+        The check of the term contribution can be skipped, if it was already done while fitting the new hypothesis.
         """
         if old == MAX_HYPOTHESIS:
             return True
 
-        # get the compound terms of the new hypothesis
-        compound_terms = new.function.compound_terms
-
-        previous = numpy.seterr(divide='ignore', invalid='ignore')
-        # for all compound terms check if they are smaller than minimum allowed contribution
-        for term in compound_terms:
-            # ignore this hypothesis, since one of the terms contributes less than epsilon to the function
-            if term.coefficient == 0 or new.calc_term_contribution(term, measurements) < self.epsilon:
-                return False
-        numpy.seterr(**previous)
+        # ignore this hypothesis, since one of the terms contributes less than epsilon to the function
+        if check_contribution and self._has_small_term(new, measurements):
+            return False
 
         # print smapes in debug mode
         logging.debug("next hypothesis SMAPE: " + str(new.SMAPE) + ' RSS:' + str(new.RSS))
@@ -65,12 +83,23 @@ class AbstractSingleParameterModeler(AbstractModeler, ABC):
             return new.RSS < old.RSS
         return new.SMAPE < old.SMAPE
 
+    def _has_small_term(self, hypothesis: SingleParameterHypothesis, measurements: Sequence[Measurement]) -> bool:
+        """
+        Checks if one of the compound terms of the hypothesis contributes less than epsilon to the function.
+        """
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            for term in hypothesis.function.compound_terms:
+                if term.coefficient == 0 or hypothesis.calc_term_contribution(term, measurements) < self.epsilon:
+                    return True
+        return False
+
     def create_constant_model(self, measurements: Sequence[Measurement]) -> Tuple[ConstantHypothesis, float]:
         """
         Creates a constant model that fits the data using a ConstantFunction.
         """
         # compute the constant coefficient
-        mean_model = sum(m.value(self.use_median) / len(measurements) for m in measurements)
+        values = numpy.array([m.value(self.use_median) for m in measurements], dtype=float)
+        mean_model = sequential_sum(values / len(measurements))
 
         # create a constant function
         constant_function = ConstantFunction(mean_model)
@@ -82,10 +111,18 @@ class AbstractSingleParameterModeler(AbstractModeler, ABC):
 
         return constant_hypothesis, constant_cost
 
+    def model_constant_series(self, measurements: Sequence[Sequence[Measurement]]) -> List[Optional[Model]]:
+        """
+        Creates the constant models of all series with constant values, see constant_series.model_constant_series.
+        """
+        return constant_series.model_constant_series(measurements, self.use_median)
+
     def find_best_hypothesis(self, candidate_hypotheses: Iterable[SH], constant_cost: float,
-                             measurements: Sequence[Measurement], current_best: H = MAX_HYPOTHESIS) -> Union[SH, H]:
+                             measurements: Sequence[Measurement], current_best: H = MAX_HYPOTHESIS,
+                             deadline: Optional[Deadline] = None) -> Union[SH, H]:
         """
         Searches for the best single parameter hypothesis and returns it.
+        If the deadline expires, the best hypothesis found so far is returned.
         """
 
         # currently the constant hypothesis is the best hypothesis
@@ -94,56 +131,141 @@ class AbstractSingleParameterModeler(AbstractModeler, ABC):
         # search for the best hypothesis over all functions that can be build with the basic building blocks
 
         for i, next_hypothesis in enumerate(candidate_hypotheses):
+            if deadline is not None and deadline.expired():
+                break
+            if self.fit_hypothesis(next_hypothesis, constant_cost, measurements, i, best_hypothesis):
+                # the term contribution was already checked while fitting, if the hypothesis could be pruned
+                best_hypothesis = self.select_hypothesis(best_hypothesis, next_hypothesis, measurements,
+                                                         not self._can_prune(best_hypothesis))
+
+        return best_hypothesis
+
+    @staticmethod
+    def order_by_likelihood(building_blocks: Sequence[CompoundTerm], measurements: Sequence[Measurement],
+                            use_median: bool) -> List[CompoundTerm]:
+        """
+        Orders the building blocks, so that the blocks that most likely describe the measurements come first.
+        The growth of the measured values between the smallest and the largest coordinate is compared with the growth
+        of each building block, the blocks with the most similar growth are tried first.
+        """
+        points = numpy.array([m.coordinate[0] for m in measurements], dtype=float)
+        values = numpy.array([m.value(use_median) for m in measurements], dtype=float)
+        if len(points) < 2:
+            return list(building_blocks)
+        first, last = numpy.argmin(points), numpy.argmax(points)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            scale = numpy.log(points[last] / points[first])
+            growth = numpy.log(values[last] / values[first]) / scale
+            if not numpy.isfinite(growth):
+                return list(building_blocks)
+            block_growth = [numpy.log(numpy.abs(b.evaluate(points[last]) / b.evaluate(points[first]))) / scale
+                            for b in building_blocks]
+        distance = numpy.abs(numpy.nan_to_num(numpy.array(block_growth, dtype=float), nan=numpy.inf) - growth)
+        return [building_blocks[i] for i in numpy.argsort(distance, kind='stable')]
+
+    def fit_hypothesis(self, hypothesis: SingleParameterHypothesis, constant_cost: float,
+                       measurements: Sequence[Measurement], index: int = 0,
+                       best_hypothesis: H = MAX_HYPOTHESIS) -> bool:
+        """
+        Computes the coefficients and the cost of the hypothesis, as part of find_best_hypothesis.
+
+        If prune_hypotheses is enabled and the best hypothesis is given, the fitting is stopped as soon as it is certain
+        that the hypothesis will not be selected instead of the best hypothesis. In this case, False is returned and
+        the coefficients and costs of the hypothesis are incomplete.
+        """
+        prune = self._can_prune(best_hypothesis)
+        if self.use_crossvalidation:
+            if prune:
+                # the term contribution is checked using the coefficients for all data, which do not depend on the
+                # cross-validation
+                hypothesis.compute_coefficients(measurements)
+                if self._has_small_term(hypothesis, measurements):
+                    self.pruned_by_contribution += 1
+                    return False
+                bound = best_hypothesis.RSS if self.compare_with_RSS else best_hypothesis.SMAPE
+            else:
+                bound = None
+
+            # use leave one out crossvalidation
+            if self.crossvalidation_method == 'press' \
+                    and hypothesis.compute_cost_press(measurements, self.epsilon):
+                pass
+            # cycle through points and leave one out per iteration
+            elif not self._compute_cost_leave_one_out(hypothesis, measurements, bound):
+                self.pruned_by_bound += 1
+                return False
 
-            if self.use_crossvalidation:
-                # use leave one out crossvalidation
-                # cycle through points and leave one out per iteration
-                for element_id in range(len(measurements)):
-                    # copy measurements to create the training sets
-                    training_measurements = list(measurements)
+            # compute the model coefficients using all data
+            hypothesis.compute_coefficients(measurements)
+            logging.debug(f"single-parameter model {index}: " + hypothesis.function.to_string(Parameter('p')))
+        else:
+            # compute the model coefficients based on the training data
+            hypothesis.compute_coefficients(measurements)
+            if prune and self._has_small_term(hypothesis, measurements):
+                self.pruned_by_contribution += 1
+                return False
 
-                    # remove one element the set
-                    training_measurements.pop(element_id)
+            # check if the constant coefficient should actually be 0
+            hypothesis.clean_constant_coefficient(
+                self.CLEAN_CONSTANT_EPSILON, measurements)
 
-                    # validation set
-                    validation_measurement = measurements[element_id]
+            # compute the cost of the single-parameter model for the validation data
+            hypothesis.compute_cost(measurements)
 
-                    # compute the model coefficients based on the training data
-                    next_hypothesis.compute_coefficients(training_measurements)
+        # compute the AR2 for the hypothesis
+        hypothesis.compute_adjusted_rsquared(constant_cost, measurements)
+        return True
 
-                    # check if the constant coefficient should actually be 0
-                    next_hypothesis.clean_constant_coefficient(self.epsilon, training_measurements)
+    def _can_prune(self, best_hypothesis: H) -> bool:
+        return self.prune_hypotheses and best_hypothesis != MAX_HYPOTHESIS
 
-                    # compute the cost of the single-parameter model for the validation data
-                    next_hypothesis.compute_cost_leave_one_out(training_measurements, validation_measurement)
+    def select_hypothesis(self, best_hypothesis: H, next_hypothesis: SH, measurements: Sequence[Measurement],
+                          check_contribution=True) -> Union[SH, H]:
+        """
+        Returns the better one of the best and the next fitted hypothesis, as part of find_best_hypothesis.
+        """
+        # check if hypothesis is valid
+        if not next_hypothesis.is_valid():
+            logging.info(
+                "Numeric imprecision found. Model is invalid and will be ignored.")
+            return best_hypothesis
 
-                # compute the model coefficients using all data
-                next_hypothesis.compute_coefficients(measurements)
-                logging.debug(f"single-parameter model {i}: " + next_hypothesis.function.to_string(Parameter('p')))
-            else:
-                # compute the model coefficients based on the training data
-                next_hypothesis.compute_coefficients(measurements)
+        # compare the new hypothesis with the best hypothesis
+        elif self.compare_hypotheses(best_hypothesis, next_hypothesis, measurements, check_contribution):
+            return next_hypothesis
 
-                # check if the constant coefficient should actually be 0
-                next_hypothesis.clean_constant_coefficient(
-                    self.CLEAN_CONSTANT_EPSILON, measurements)
+        return best_hypothesis
 
-                # compute the cost of the single-parameter model for the validation data
-                next_hypothesis.compute_cost(measurements)
+    def _compute_cost_leave_one_out(self, hypothesis: SingleParameterHypothesis, measurements: Sequence[Measurement],
+                                    bound: float = None) -> bool:
+        """
+        Computes the cost of the hypothesis by refitting it for every left out point.
+        Serves as reference for the closed-form cross-validation.
+        The costs only grow with each left out point, therefore, the computation is stopped and False is returned
+        as soon as the compared cost reaches the bound.
+        """
+        for element_id in range(len(measurements)):
+            # copy measurements to create the training sets
+            training_measurements = list(measurements)
 
-            # compute the AR2 for the hypothesis
-            next_hypothesis.compute_adjusted_rsquared(constant_cost, measurements)
+            # remove one element the set
+            training_measurements.pop(element_id)
 
-            # check if hypothesis is valid
-            if not next_hypothesis.is_valid():
-                logging.info(
-                    "Numeric imprecision found. Model is invalid and will be ignored.")
+            # validation set
+            validation_measurement = measurements[element_id]
 
-            # compare the new hypothesis with the best hypothesis
-            elif self.compare_hypotheses(best_hypothesis, next_hypothesis, measurements):
-                best_hypothesis = next_hypothesis
+            # compute the model coefficients based on the training data
+            hypothesis.compute_coefficients(training_measurements)
 
-        return best_hypothesis
+            # check if the constant coefficient should actually be 0
+            hypothesis.clean_constant_coefficient(self.epsilon, training_measurements)
+
+            # compute the cost of the single-parameter model for the validation data
+            hypothesis.compute_cost_leave_one_out(training_measurements, validation_measurement)
+
+            if bound is not None and (hypothesis.RSS if self.compare_with_RSS else hypothesis.SMAPE) >= bound:
+                return False
+        return True
 
     @staticmethod
     def are_measurements_log_capable(measurements, check_negative_exponents=False):
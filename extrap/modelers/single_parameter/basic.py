@@ -9,7 +9,7 @@ import copy
 import itertools
 import logging
 import warnings
-from typing import List, Sequence
+from typing import List, Sequence, Optional
 
 from extrap.entities.functions import SingleParameterFunction
 from extrap.entities.hypotheses import SingleParameterHypothesis
@@ -20,6 +20,9 @@ from extrap.entities.terms import CompoundTerm
 from extrap.modelers.abstract_modeler import SingularModeler
 from extrap.modelers.modeler_options import modeler_options
 from extrap.modelers.single_parameter.abstract_base import AbstractSingleParameterModeler
+from extrap.modelers.single_parameter.batched_search import find_best_hypothesis_batched, \
+    find_best_hypotheses_batched
+from extrap.util.progress_bar import DUMMY_PROGRESS
 
 
 @modeler_options
@@ -53,6 +56,12 @@ class SingleParameterModeler(AbstractSingleParameterModeler, SingularModeler):
                                                    on_change=lambda self, v: self._exponents_changed())
     modeler_options.group('Exponents', poly_exponents, log_exponents, retain_default_exponents,
                           force_combination_exponents, allow_negative_exponents)
+    use_batched_search = modeler_options.add(True, bool, 'Evaluates all hypotheses of a measurement series at once '
+                                                         'using a stacked design matrix', name='Batched search')
+    group_series = modeler_options.add(True, bool, 'Models all measurement series with the same coordinates together, '
+                                                   'sharing the factorization of each hypothesis. '
+                                                   'Requires the batched search.',
+                                       name='Group by coordinates')
 
     def __init__(self):
         """
@@ -248,26 +257,75 @@ class SingleParameterModeler(AbstractSingleParameterModeler, SingularModeler):
 
         return [CompoundTerm.create(*e) for e in exponents if not e == (0, 0)]
 
-    def build_hypotheses(self, measurements):
+    def build_hypotheses(self, measurements, hypotheses_building_blocks: Sequence[CompoundTerm] = None):
         """
         Builds the next hypothesis that should be analysed based on the given compound term.
+        By default, the building blocks matching the measurements are used.
         """
-        hypotheses_building_blocks = self.get_matching_hypotheses(measurements)
+        if hypotheses_building_blocks is None:
+            hypotheses_building_blocks = self.get_matching_hypotheses(measurements)
 
         # search for the best hypothesis over all functions that can be build with the basic building blocks
         # using leave one out crossvalidation
         for i, compound_term in enumerate(hypotheses_building_blocks):
-            # create next function that will be analyzed
-            next_function = SingleParameterFunction(copy.copy(compound_term))
+            yield self.build_hypothesis(compound_term)
 
-            # create single parameter hypothesis from function
-            yield SingleParameterHypothesis(next_function, self.use_median)
+    def build_hypothesis(self, compound_term: CompoundTerm) -> SingleParameterHypothesis:
+        """
+        Builds a single parameter hypothesis from the given compound term.
+        """
+        # create next function that will be analyzed
+        next_function = SingleParameterFunction(copy.copy(compound_term))
 
-    def create_model(self, measurements: Sequence[Measurement]):
+        # create single parameter hypothesis from function
+        return SingleParameterHypothesis(next_function, self.use_median)
+
+    def model(self, measurements: Sequence[Sequence[Measurement]], progress_bar=DUMMY_PROGRESS) -> Sequence[Model]:
+        if not (self.use_batched_search and self.group_series):
+            return super().model(measurements, progress_bar)
+
+        models: List[Optional[Model]] = [None] * len(measurements)
+        progress_bar.total += len(measurements)
+        for group in self.group_by_coordinates(measurements).values():
+            for i, model in zip(group, self.create_models([measurements[i] for i in group])):
+                models[i] = model
+            progress_bar.update(len(group))
+        return models
+
+    def create_models(self, series: Sequence[Sequence[Measurement]]) -> List[Model]:
         """
-        Create a model for the given callpath and metric using the given data.
+        Creates the models for several measurement series that share the same coordinates.
+        The least-squares problems of all series are solved together for each hypothesis.
         """
+        models: List[Optional[Model]] = [None] * len(series)
+        # the series share the search, therefore, they also share their time budgets
+        deadline = self.create_deadline(len(series))
+        search_indices, constant_hypotheses, constant_costs = [], [], []
+        for i, measurements in enumerate(series):
+            constant_hypothesis, constant_cost = self._create_initial_model(measurements)
+            if constant_cost == 0:
+                models[i] = Model(constant_hypothesis)
+            else:
+                search_indices.append(i)
+                constant_hypotheses.append(constant_hypothesis)
+                constant_costs.append(constant_cost)
 
+        if search_indices:
+            logging.debug("Searching for single-parameter models.")
+            hypotheses_building_blocks = self.get_matching_hypotheses(series[search_indices[0]])
+            if deadline is not None:
+                hypotheses_building_blocks = self.order_by_likelihood(hypotheses_building_blocks,
+                                                                      series[search_indices[0]], self.use_median)
+            best_hypotheses = find_best_hypotheses_batched(
+                self, hypotheses_building_blocks,
+                lambda i: self.build_hypothesis(hypotheses_building_blocks[i]),
+                constant_costs, [series[i] for i in search_indices], constant_hypotheses, deadline)
+            for i, best_hypothesis in zip(search_indices, best_hypotheses):
+                models[i] = Model(best_hypothesis)
+                models[i].exhaustive = deadline is None or not deadline.reached
+        return models
+
+    def _create_initial_model(self, measurements: Sequence[Measurement]):
         # check if the number of measurements satisfies the requirements of the modeler (>=5)
         if len(measurements) < self.min_measurement_points:
             warnings.warn(
@@ -278,6 +336,14 @@ class SingleParameterModeler(AbstractSingleParameterModeler, SingularModeler):
         constant_hypothesis, constant_cost = self.create_constant_model(measurements)
         logging.debug("Constant model: " + constant_hypothesis.function.to_string())
         logging.debug("Constant model cost: " + str(constant_cost))
+        return constant_hypothesis, constant_cost
+
+    def create_model(self, measurements: Sequence[Measurement]):
+        """
+        Create a model for the given callpath and metric using the given data.
+        """
+        deadline = self.create_deadline()
+        constant_hypothesis, constant_cost = self._create_initial_model(measurements)
 
         # use constant model when cost is 0
         if constant_cost == 0:
@@ -288,7 +354,20 @@ class SingleParameterModeler(AbstractSingleParameterModeler, SingularModeler):
         else:
             logging.debug("Searching for a single-parameter model.")
             # search for the best single parameter hypothesis
-            hypotheses_generator = self.build_hypotheses(measurements)
-            best_hypothesis = self.find_best_hypothesis(hypotheses_generator, constant_cost, measurements,
-                                                        constant_hypothesis)
-            return Model(best_hypothesis)
+            hypotheses_building_blocks = self.get_matching_hypotheses(measurements)
+            if deadline is not None:
+                # try the most likely hypotheses first, in case the search is stopped early
+                hypotheses_building_blocks = self.order_by_likelihood(hypotheses_building_blocks, measurements,
+                                                                      self.use_median)
+            if self.use_batched_search:
+                best_hypothesis = find_best_hypothesis_batched(
+                    self, hypotheses_building_blocks,
+                    lambda i: self.build_hypothesis(hypotheses_building_blocks[i]),
+                    constant_cost, measurements, constant_hypothesis, deadline)
+            else:
+                hypotheses_generator = self.build_hypotheses(measurements, hypotheses_building_blocks)
+                best_hypothesis = self.find_best_hypothesis(hypotheses_generator, constant_cost, measurements,
+                                                            constant_hypothesis, deadline)
+            model = Model(best_hypothesis)
+            model.exhaustive = deadline is None or not deadline.reached
+            return model
@@ -0,0 +1,290 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+from __future__ import annotations
+
+import logging
+from typing import Sequence, Callable, TYPE_CHECKING, List, Optional
+
+import numpy
+
+from extrap.entities.hypotheses import Hypothesis, SingleParameterHypothesis, MAX_HYPOTHESIS
+from extrap.entities.measurement import Measurement
+from extrap.entities.terms import CompoundTerm
+from extrap.util.least_squares import pseudo_inverse, leave_one_out_coefficients, leave_one_out_minimum, \
+    LEVERAGE_TOLERANCE
+from extrap.util.deadline import Deadline
+
+if TYPE_CHECKING:
+    from extrap.modelers.single_parameter.abstract_base import AbstractSingleParameterModeler
+
+# maximum number of series that are searched at once, limits the size of the intermediate arrays
+MAX_SERIES_PER_SEARCH = 1024
+# number of building blocks that are searched together when the search has a deadline
+BUILDING_BLOCKS_PER_DEADLINE_CHECK = 8
+
+
+def evaluate_building_blocks(building_blocks: Sequence[CompoundTerm], points: numpy.ndarray) -> numpy.ndarray:
+    """
+    Evaluates the building blocks with a coefficient of one at the given points.
+    Returns an array of the shape (building blocks, points).
+    """
+    term_values = numpy.empty((len(building_blocks), len(points)))
+    for i, compound_term in enumerate(building_blocks):
+        value = numpy.ones(len(points))
+        for simple_term in compound_term.simple_terms:
+            value *= simple_term.evaluate(points)
+        term_values[i] = value
+    return term_values
+
+
+class BatchedHypothesisSearch:
+    """
+    Searches the best single-parameter hypothesis for all given building blocks at once.
+
+    Instead of creating and fitting one hypothesis object per building block, the values of all building blocks are
+    stacked into one design tensor of the shape (building blocks, points, 2) and all least-squares problems are solved
+    in one vectorized call. The selection follows the rules of
+    :py:meth:`AbstractSingleParameterModeler.find_best_hypothesis`, so the same hypothesis is selected.
+    Only the winning hypothesis is turned into an object.
+    """
+
+    def __init__(self, modeler: AbstractSingleParameterModeler, building_blocks: Sequence[CompoundTerm],
+                 points: numpy.ndarray):
+        self.modeler = modeler
+        self.building_blocks = building_blocks
+        self.points = points
+        self.term_values = evaluate_building_blocks(building_blocks, points)
+        self.design = numpy.stack([numpy.ones_like(self.term_values), self.term_values], axis=-1)
+        self.pseudo_inverse, self.leverage, rank_deficient = pseudo_inverse(self.design)
+        # building blocks for which the closed-form leave-one-out solution cannot be used
+        self._needs_refit = rank_deficient | numpy.any(1 - self.leverage <= LEVERAGE_TOLERANCE, axis=-1)
+        self._fold_pseudo_inverse = None
+        self._fold_indices = None
+        self._fold_blocks = None
+
+    def _fold_solver(self):
+        """
+        Returns the indices of the training points and the pseudo inverses for all leave-one-out folds of the
+        given building blocks. The pseudo inverses have the shape (building blocks, folds, 2, points - 1).
+        """
+        if self._fold_pseudo_inverse is None:
+            n = len(self.points)
+            self._fold_indices = numpy.nonzero(~numpy.eye(n, dtype=bool))[1].reshape(n, n - 1)
+            fold_design = self.design[self._fold_blocks][:, self._fold_indices, :]
+            self._fold_pseudo_inverse, _, _ = pseudo_inverse(fold_design)
+        return self._fold_indices, self._fold_pseudo_inverse
+
+    @staticmethod
+    def _clean_constant_coefficients(constant_coefficients, minimum, phi):
+        """
+        Vectorized version of :py:meth:`Hypothesis.clean_constant_coefficient`.
+        Returns the cleaned coefficients and a mask of the coefficients that were set to zero.
+        """
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            relative = numpy.where(minimum == 0, numpy.abs(constant_coefficients),
+                                   numpy.abs(constant_coefficients / minimum))
+        cleaned = relative < phi
+        return numpy.where(cleaned, 0, constant_coefficients), cleaned
+
+    def _compute_cost_leave_one_out(self, values, coefficients, evaluated):
+        """
+        Computes the costs for the evaluated building blocks and all series using leave-one-out cross-validation.
+        Equivalent to calling :py:meth:`SingleParameterHypothesis.compute_cost_leave_one_out` for every fold.
+        The costs of the building blocks that are not evaluated are NaN.
+        """
+        if self.modeler.crossvalidation_method == 'press':
+            self._fold_blocks = self._needs_refit
+        else:
+            self._fold_blocks = numpy.ones(len(self.building_blocks), dtype=bool)
+
+        predicted = numpy.full((len(self.building_blocks),) + values.shape, numpy.nan)  # (blocks, folds, series)
+        press_blocks = ~self._fold_blocks & evaluated
+        if press_blocks.any():
+            fold_coefficients = leave_one_out_coefficients(self.design[press_blocks], self.pseudo_inverse[press_blocks],
+                                                           self.leverage[press_blocks], coefficients[press_blocks],
+                                                           values)  # (blocks, folds, 2, series)
+            predicted[press_blocks] = self._predict_folds(fold_coefficients, leave_one_out_minimum(values),
+                                                          self.term_values[press_blocks])
+        refit_blocks = self._fold_blocks & evaluated
+        if refit_blocks.any():
+            fold_indices, fold_pseudo_inverse = self._fold_solver()
+            training_values = values[fold_indices]  # (folds, points - 1, series)
+            # the pseudo inverses are computed for all blocks that need a refit, only the evaluated ones are used
+            fold_pseudo_inverse = fold_pseudo_inverse[evaluated[self._fold_blocks]]
+            fold_coefficients = fold_pseudo_inverse @ training_values[numpy.newaxis]  # (blocks, folds, 2, series)
+            predicted[refit_blocks] = self._predict_folds(fold_coefficients, training_values.min(axis=1),
+                                                          self.term_values[refit_blocks])
+        return SingleParameterHypothesis.leave_one_out_cost(predicted, values, axis=1)
+
+    def _predict_folds(self, fold_coefficients, training_minimum, term_values):
+        """
+        Cleans the constant coefficients of all folds and predicts the values of the left out points.
+        """
+        constant_coefficients, _ = self._clean_constant_coefficients(fold_coefficients[:, :, 0, :], training_minimum,
+                                                                     self.modeler.epsilon)
+        return constant_coefficients + fold_coefficients[:, :, 1, :] * term_values[:, :, numpy.newaxis]
+
+    @staticmethod
+    def _compute_cost(predicted, actual):
+        """
+        Vectorized version of :py:meth:`SingleParameterHypothesis.compute_cost`.
+        """
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            difference = predicted - actual
+            rss = numpy.sum(difference * difference, axis=1)
+            relative_difference = difference / actual
+            rrss = numpy.sum(relative_difference * relative_difference, axis=1)
+            re = numpy.mean(numpy.abs(difference) / actual, axis=1)
+            abssum = numpy.abs(actual) + numpy.abs(predicted)
+            nonzero = abssum != 0
+            smape_sum = numpy.sum(numpy.where(nonzero, numpy.abs(difference) / abssum * 2, 0), axis=1)
+            smape = smape_sum / numpy.sum(nonzero, axis=1) * 100
+        return rss, rrss, smape, re
+
+    def search(self, values: numpy.ndarray, current_best_costs: numpy.ndarray, accept_first_valid=False):
+        """
+        Determines the best building block for each series of values.
+
+        :param values: The measured values with the shape (points, series).
+        :param current_best_costs: The cost of the current best hypothesis for each series.
+        :param accept_first_valid: If set, the first valid hypothesis is accepted without further checks,
+                                   like it is done when the current best hypothesis is the MAX_HYPOTHESIS.
+                                   Either one flag for all series or an array with one flag per series.
+        :return: The index of the best building block for each series, -1 if the current best hypothesis is better.
+        """
+        modeler = self.modeler
+        coefficients = self.pseudo_inverse @ values  # (blocks, 2, series)
+        term_values = self.term_values[:, :, numpy.newaxis]
+        term_coefficients = coefficients[:, 1, :]
+        accept_first_valid = numpy.broadcast_to(accept_first_valid, values.shape[1:])
+
+        # the term contribution is checked using the coefficients for all data, which do not depend on the
+        # cross-validation
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            contribution = numpy.max(numpy.abs(term_coefficients[:, numpy.newaxis, :] * term_values / values), axis=1)
+        # nan contributions are not rejected, as in the comparison of single hypotheses
+        large_enough = (term_coefficients != 0) & ~(contribution < modeler.epsilon)
+        evaluated = numpy.ones(len(self.building_blocks), dtype=bool)
+        if modeler.prune_hypotheses:
+            # like in fit_hypothesis, the first valid hypothesis of a series is not pruned
+            pruned = ~large_enough & ~accept_first_valid
+            modeler.pruned_by_contribution += int(numpy.count_nonzero(pruned))
+            evaluated = ~pruned.all(axis=1)
+
+        if modeler.use_crossvalidation:
+            rss, rrss, smape, re = self._compute_cost_leave_one_out(values, coefficients, evaluated)
+            constant_coefficients = coefficients[:, 0, :]
+            cleaned = numpy.zeros(constant_coefficients.shape, dtype=bool)
+        else:
+            constant_coefficients, cleaned = self._clean_constant_coefficients(coefficients[:, 0, :],
+                                                                               values.min(axis=0),
+                                                                               modeler.CLEAN_CONSTANT_EPSILON)
+            predicted = constant_coefficients[:, numpy.newaxis, :] + coefficients[:, 1:2, :] * term_values
+            rss, rrss, smape, re = self._compute_cost(predicted, values)
+
+        self.constant_coefficients, self.term_coefficients = constant_coefficients, term_coefficients
+        self._cleaned = cleaned
+        self.RSS, self.rRSS, self.SMAPE, self.RE = rss, rrss, smape, re
+
+        valid = (rss == rss) & (numpy.abs(rss) != numpy.inf)
+        if not valid[evaluated].all():
+            logging.info("Numeric imprecision found. Model is invalid and will be ignored.")
+
+        costs = rss if modeler.compare_with_RSS else smape
+        improving = valid & large_enough & (costs < current_best_costs)
+        best = numpy.argmin(numpy.where(improving, costs, numpy.inf), axis=0)
+        best[~improving.any(axis=0)] = -1
+
+        for s in numpy.flatnonzero(accept_first_valid):
+            valid_indices = numpy.flatnonzero(valid[:, s])
+            if len(valid_indices) == 0:
+                best[s] = -1
+                continue
+            first = valid_indices[0]
+            following = improving[:, s] & (costs[:, s] < costs[first, s])
+            following[:first + 1] = False
+            if following.any():
+                best[s] = numpy.argmin(numpy.where(following, costs[:, s], numpy.inf))
+            else:
+                best[s] = first
+        return best
+
+    def create_hypothesis(self, index: int, series: int, hypothesis: SingleParameterHypothesis, constant_cost,
+                          measurements: Sequence[Measurement]):
+        """
+        Transfers the results of the search for the building block with the given index and series into
+        the given hypothesis object.
+        """
+        if self._cleaned[index, series]:
+            hypothesis.function.constant_coefficient = 0
+        else:
+            hypothesis.function.constant_coefficient = self.constant_coefficients[index, series]
+        hypothesis.function.compound_terms[0].coefficient = self.term_coefficients[index, series]
+        hypothesis._RSS = self.RSS[index, series]
+        hypothesis._rRSS = self.rRSS[index, series]
+        hypothesis._SMAPE = self.SMAPE[index, series]
+        hypothesis._RE = self.RE[index, series]
+        hypothesis._costs_are_calculated = True
+        hypothesis.compute_adjusted_rsquared(constant_cost, measurements)
+        return hypothesis
+
+
+def find_best_hypothesis_batched(modeler: AbstractSingleParameterModeler, building_blocks: Sequence[CompoundTerm],
+                                 create_hypothesis: Callable[[int], SingleParameterHypothesis], constant_cost: float,
+                                 measurements: Sequence[Measurement], current_best: Hypothesis = MAX_HYPOTHESIS,
+                                 deadline: Optional[Deadline] = None):
+    """
+    Searches the best hypothesis for one measurement series, using a batched search over all building blocks.
+    Only the hypothesis for the winning building block is created using create_hypothesis.
+    """
+    return find_best_hypotheses_batched(modeler, building_blocks, create_hypothesis, [constant_cost], [measurements],
+                                        [current_best], deadline)[0]
+
+
+def find_best_hypotheses_batched(modeler: AbstractSingleParameterModeler, building_blocks: Sequence[CompoundTerm],
+                                 create_hypothesis: Callable[[int], SingleParameterHypothesis],
+                                 constant_costs: Sequence[float], series: Sequence[Sequence[Measurement]],
+                                 current_bests: Sequence[Hypothesis], deadline: Optional[Deadline] = None) \
+        -> List[Hypothesis]:
+    """
+    Searches the best hypothesis for each of several measurement series that share the same coordinates.
+
+    The design matrix of each building block is factorized only once and applied to all series at once, with one
+    column per series. The selection is done for each series separately.
+    Only the hypotheses for the winning building blocks are created using create_hypothesis.
+    If a deadline is given, the building blocks are searched in small blocks. When the deadline expires,
+    the remaining blocks are skipped and the best hypotheses found so far are returned.
+    """
+    if len(building_blocks) == 0:
+        return list(current_bests)
+    points = numpy.array([m.coordinate[0] for m in series[0]])
+    block_size = len(building_blocks) if deadline is None else BUILDING_BLOCKS_PER_DEADLINE_CHECK
+
+    results = list(current_bests)
+    for block_start in range(0, len(building_blocks), block_size):
+        if deadline is not None and deadline.expired():
+            break
+        search = BatchedHypothesisSearch(modeler, building_blocks[block_start:block_start + block_size], points)
+        for start in range(0, len(series), MAX_SERIES_PER_SEARCH):
+            chunk = range(start, min(start + MAX_SERIES_PER_SEARCH, len(series)))
+            values = numpy.array([[m.value(modeler.use_median) for m in series[s]] for s in chunk]).T
+
+            accept_first_valid = numpy.array([results[s] == MAX_HYPOTHESIS for s in chunk])
+            if modeler.compare_with_RSS:
+                current_best_costs = numpy.array([results[s].RSS for s in chunk])
+            else:
+                current_best_costs = numpy.array([results[s].SMAPE for s in chunk])
+            current_best_costs[accept_first_valid] = numpy.inf
+
+            best_indices = search.search(values, current_best_costs, accept_first_valid)
+            for column, (s, best_index) in enumerate(zip(chunk, best_indices)):
+                if best_index >= 0:
+                    results[s] = search.create_hypothesis(best_index, column,
+                                                          create_hypothesis(block_start + best_index),
+                                                          constant_costs[s], series[s])
+    return results
@@ -1,23 +1,29 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
 import copy
+import threading
 import warnings
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from operator import attrgetter
-from typing import List, Tuple, Sequence
+from typing import List, Tuple, Sequence, Callable
 
 from extrap.entities.fraction import Fraction
 from extrap.entities.functions import SingleParameterFunction
-from extrap.entities.hypotheses import SingleParameterHypothesis
+from extrap.entities.hypotheses import SingleParameterHypothesis, MAX_HYPOTHESIS
 from extrap.entities.model import Model
 from extrap.entities.terms import CompoundTerm
 from extrap.modelers.abstract_modeler import SingularModeler
+from extrap.modelers.modeler_options import modeler_options
+from extrap.modelers.parallel import resolve_jobs
 from extrap.modelers.single_parameter.abstract_base import AbstractSingleParameterModeler
+from extrap.util.deadline import Deadline
+from extrap.util.progress_bar import DUMMY_PROGRESS
 
 SearchState = namedtuple('SearchState', ['left', 'center', 'right'])
 
@@ -29,6 +35,53 @@ class SingleParameterRefiningHypothesis(SingleParameterHypothesis):
         self.partition_index = partition_index
 
 
+class HypothesisMemo:
+    """
+    Stores the fitted hypotheses of one series of measurements by their exponents, so that each pair of exponents is
+    fitted only once, even if it is part of multiple slices or refinement steps.
+    The memo is only synchronized if it is shared by concurrently refined slices.
+    """
+
+    def __init__(self, concurrent=False):
+        self._hypotheses = {}
+        self._lock = threading.Lock() if concurrent else None
+        self.fits_performed = 0
+        self.fits_saved = 0
+
+    def get(self, poly_exponent, log_exponent, partition_index, use_median,
+            fit: Callable[[SingleParameterRefiningHypothesis], None]) -> SingleParameterRefiningHypothesis:
+        """
+        Returns the fitted hypothesis for the exponents with the given partition index.
+        If the exponents were not fitted before, a new hypothesis is created and fitted using fit.
+        """
+        # fractions hash like the integers they are equal to, so both can be used as key
+        key = (poly_exponent, log_exponent)
+        hypothesis = self._hypotheses.get(key)
+        if hypothesis is not None:
+            if self._lock is None:
+                self.fits_saved += 1
+            else:
+                with self._lock:
+                    self.fits_saved += 1
+            if hypothesis.partition_index != partition_index:
+                hypothesis = copy.copy(hypothesis)
+                hypothesis.partition_index = partition_index
+            return hypothesis
+
+        function = SingleParameterFunction(CompoundTerm.create(poly_exponent, log_exponent))
+        hypothesis = SingleParameterRefiningHypothesis(function, use_median, partition_index)
+        fit(hypothesis)
+        if self._lock is None:
+            self._hypotheses[key] = hypothesis
+            self.fits_performed += 1
+        else:
+            with self._lock:
+                self._hypotheses.setdefault(key, hypothesis)
+                self.fits_performed += 1
+        return hypothesis
+
+
+@modeler_options
 class RefiningModeler(SingularModeler, AbstractSingleParameterModeler):
     """
     Implementation of the refinement modeler
@@ -36,9 +89,17 @@ class RefiningModeler(SingularModeler, AbstractSingleParameterModeler):
     NAME = 'Refining'
     DESCRIPTION = "Modeler for single-parameter models; refines the search-space iteratively."
 
+    slice_jobs = modeler_options.add(1, int, name='Slice jobs',
+                                     description="Number of threads that refine the slices of the search space "
+                                                 "concurrently. Values smaller than one select the number of "
+                                                 "available processors.")
+
     def __init__(self):
         super().__init__(use_median=False)
         self.epsilon = 0.0005
+        # number of hypotheses that were fitted and number of hypotheses that were reused instead of refitted
+        self.fits_performed = 0
+        self.fits_saved = 0
 
         # init variables for the hypothesis creation
         self.max_log_expo = 2
@@ -47,7 +108,13 @@ class RefiningModeler(SingularModeler, AbstractSingleParameterModeler):
         self.termination_threshold = 2.0
         self.nonconstancy_threshold = 1.3
 
-    def create_model(self, measurements):
+    def model(self, measurements, progress_bar=DUMMY_PROGRESS):
+        # at most one beta slice per log exponent and the alpha slice are refined concurrently
+        jobs = min(resolve_jobs(self.slice_jobs), self.max_log_expo + 2)
+        with ThreadPoolExecutor(jobs) if jobs > 1 else _SerialExecutor() as executor:
+            return [self.create_model(m, executor) for m in progress_bar(measurements)]
+
+    def create_model(self, measurements, executor=None):
 
         # check if the number of measurements satisfies the requirements of the modeler (>=5)
         if len(measurements) < 5:
@@ -75,15 +142,25 @@ class RefiningModeler(SingularModeler, AbstractSingleParameterModeler):
         if allow_log:
             slices.append(([0], log_expos))  # alpha slice
 
+        if executor is None:
+            executor = _SerialExecutor()
+        memo = HypothesisMemo(concurrent=not isinstance(executor, _SerialExecutor))
+        # the coarse search is always completed, the deadline can stop the refinement
+        deadline = self.create_deadline()
+
         # create coarse hypotheses
-        hypotheses = [self.find_best_hypothesis(self._build_hypotheses_generator(slice, ignore_constant=True),
-                                                constant_cost, measurements) for slice in slices]
+        hypotheses = list(executor.map(
+            lambda slice: self._find_best_hypothesis_in_partition(slice, constant_cost, measurements, memo),
+            slices))
 
         # determine exponents for initial state
         state_per_slice = self._determine_initial_state(hypotheses, slices)
 
         # execute iterative refinement
-        best_hypothesis = self.iterative_refinement(hypotheses, state_per_slice, slices, constant_cost, measurements)
+        best_hypothesis = self.iterative_refinement(hypotheses, state_per_slice, slices, constant_cost,
+                                                    measurements, memo, executor, deadline)
+        self.fits_performed += memo.fits_performed
+        self.fits_saved += memo.fits_saved
 
         # determine if improvement over constant model is enough
         term_contribution = best_hypothesis.calc_term_contribution(best_hypothesis.function.compound_terms[0],
@@ -92,7 +169,9 @@ class RefiningModeler(SingularModeler, AbstractSingleParameterModeler):
         if improvement < self.nonconstancy_threshold or term_contribution < self.epsilon:
             best_hypothesis = constant_hypothesis
 
-        return Model(best_hypothesis)
+        model = Model(best_hypothesis)
+        model.exhaustive = deadline is None or not deadline.reached
+        return model
 
     @staticmethod
     def _determine_initial_state(hypotheses, slices):
@@ -112,17 +191,25 @@ class RefiningModeler(SingularModeler, AbstractSingleParameterModeler):
 
     def iterative_refinement(self, hypotheses: List[SingleParameterRefiningHypothesis],
                              state_per_slice: List[SearchState], slices,
-                             constant_cost, measurements):
+                             constant_cost, measurements, memo: HypothesisMemo = None, executor=None,
+                             deadline: Deadline = None):
         if self.compare_with_RSS:
             selector = attrgetter('RSS')
         else:
             selector = attrgetter('SMAPE')
+        if memo is None:
+            memo = HypothesisMemo()
+        if executor is None:
+            executor = _SerialExecutor()
         best_hypotheses = hypotheses
         best_hypotheses_step = copy.copy(hypotheses)
         best_hypotheses_previous = copy.copy(hypotheses)
         current_acceptance_threshold = self.acceptance_threshold
         for i in range(10):
-            for s, slice in enumerate(slices):
+            if deadline is not None and deadline.expired():
+                break
+
+            def refine_slice(s):
                 old_state = state_per_slice[s]  # contains old exponents
 
                 # calculates new exponents
@@ -133,14 +220,15 @@ class RefiningModeler(SingularModeler, AbstractSingleParameterModeler):
                 )
 
                 # create new partition
+                slice = slices[s]
                 if len(slice[0]) > 1:
                     partition = (state, slice[1])
                 else:
                     partition = (slice[0], state)
 
                 # determine best partition
-                hypotheses_generator = self._build_hypotheses_generator(partition, ignore_constant=True)
-                best_hypotheses_step[s] = self.find_best_hypothesis(hypotheses_generator, constant_cost, measurements)
+                best_hypotheses_step[s] = self._find_best_hypothesis_in_partition(partition, constant_cost,
+                                                                                  measurements, memo)
                 partition_index = best_hypotheses_step[s].partition_index
 
                 # clips search space
@@ -154,6 +242,10 @@ class RefiningModeler(SingularModeler, AbstractSingleParameterModeler):
                                         old_state.right)
                 state_per_slice[s] = state
 
+            # the slices are independent of each other
+            for _ in executor.map(refine_slice, range(len(slices))):
+                pass
+
             # determine best hypothesis of step
             best_hypothesis_step: SingleParameterHypothesis = min(best_hypotheses_step, key=selector)
             global_best_hypothesis = min(best_hypotheses, key=selector)
@@ -172,18 +264,38 @@ class RefiningModeler(SingularModeler, AbstractSingleParameterModeler):
 
         return min(best_hypotheses, key=selector)
 
-    def _build_hypotheses_generator(self, partition, ignore_constant=False):
-        p_partition, l_partition = partition
-
-        def build_hypothesis(p, l, i):
-            simple_function = SingleParameterFunction(CompoundTerm.create(p, l))
-            return SingleParameterRefiningHypothesis(simple_function, self.use_median, i)
+    def _find_best_hypothesis_in_partition(self, partition, constant_cost, measurements, memo: HypothesisMemo):
+        """
+        Searches for the best hypothesis like find_best_hypothesis, but reuses the hypotheses that were already fitted.
+        """
+        best_hypothesis = MAX_HYPOTHESIS
+        for i, p, l in self._partition_exponents(partition, ignore_constant=True):
+            hypothesis = memo.get(p, l, i, self.use_median,
+                                  lambda h: self.fit_hypothesis(h, constant_cost, measurements, i))
+            best_hypothesis = self.select_hypothesis(best_hypothesis, hypothesis, measurements)
+        return best_hypothesis
 
+    @staticmethod
+    def _partition_exponents(partition, ignore_constant=False):
+        p_partition, l_partition = partition
         if len(p_partition) > 1:
             l = l_partition[0]
-            return (build_hypothesis(p, l, i) for i, p in enumerate(p_partition)
-                    if not (ignore_constant and p == 0 and l == 0))
+            return ((i, p, l) for i, p in enumerate(p_partition) if not (ignore_constant and p == 0 and l == 0))
         else:
             p = p_partition[0]
-            return (build_hypothesis(p, l, i) for i, l in enumerate(l_partition)
-                    if not (ignore_constant and p == 0 and l == 0))
+            return ((i, p, l) for i, l in enumerate(l_partition) if not (ignore_constant and p == 0 and l == 0))
+
+
+class _SerialExecutor:
+    """
+    Executes the mapped functions in the calling thread, like an executor with a single worker.
+    """
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
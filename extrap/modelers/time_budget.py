@@ -0,0 +1,30 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+from abc import ABC
+from typing import Optional
+
+from extrap.modelers.abstract_modeler import AbstractModeler
+from extrap.modelers.modeler_options import modeler_options
+from extrap.util.deadline import Deadline
+
+
+@modeler_options
+class TimeBudgetModeler(AbstractModeler, ABC):
+    """
+    Base class for modelers that limit the time for modeling one measurement series.
+    """
+    time_budget = modeler_options.add(0.0, float, 'Maximum time in seconds for modeling one measurement series, '
+                                                  'the best model found so far is used when it is exceeded. '
+                                                  'Zero disables the limit.')
+
+    def create_deadline(self, series: int = 1) -> Optional[Deadline]:
+        """
+        Creates the deadline for modeling the given number of measurement series together from the time budget and
+        the overall deadline. Series that are modeled together share a deadline, which is the sum of their budgets.
+        """
+        return Deadline.create(self.time_budget * series, self.deadline)
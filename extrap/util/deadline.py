@@ -0,0 +1,60 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    A point in time after which a search should stop and return the best result found so far.
+
+    A deadline can have a parent deadline, e.g., a deadline for modeling one measurement series can have the deadline
+    for modeling the whole experiment as parent. It expires when either itself or its parent expires.
+    Once a search observed that a deadline has expired, the deadline is marked as reached.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, parent: Optional['Deadline'] = None):
+        """
+        :param seconds: The time from now until the deadline expires, None if it does not expire by itself.
+        :param parent: A deadline that also limits this deadline.
+        """
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self.parent = parent
+        self.reached = False
+
+    def expired(self) -> bool:
+        """
+        Returns whether the deadline has expired and marks it as reached, if this is the case.
+        """
+        if not self.reached:
+            if self.expires_at is not None and time.monotonic() >= self.expires_at:
+                self.reached = True
+            elif self.parent is not None and self.parent.expired():
+                self.reached = True
+        return self.reached
+
+    def remaining(self) -> float:
+        """
+        Returns the remaining time in seconds, infinity if neither the deadline nor its parents expire.
+        """
+        remaining = float('inf') if self.expires_at is None else max(self.expires_at - time.monotonic(), 0)
+        if self.parent is not None:
+            remaining = min(remaining, self.parent.remaining())
+        return remaining
+
+    @classmethod
+    def create(cls, seconds: Optional[float], parent: Optional['Deadline'] = None) -> Optional['Deadline']:
+        """
+        Creates a deadline for the given time budget, a budget of None or zero does not limit the deadline.
+        Returns None if neither the budget nor the parent limits the deadline.
+        """
+        if not seconds:
+            seconds = None
+        if seconds is None and parent is None:
+            return None
+        return cls(seconds, parent)
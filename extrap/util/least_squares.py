@@ -0,0 +1,65 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import numpy
+
+# leverages closer to one than this value are treated as one, the closed-form leave-one-out solution is not used then
+LEVERAGE_TOLERANCE = 1e-8
+
+
+def pseudo_inverse(design: numpy.ndarray):
+    """
+    Computes the pseudo inverses of a stack of design matrices with the shape (..., points, coefficients)
+    using one singular value decomposition per matrix.
+    The cutoff for small singular values is the same as the one of numpy.linalg.lstsq.
+
+    :return: The pseudo inverses with the shape (..., coefficients, points), the diagonals of the hat matrices
+             (leverages) with the shape (..., points) and a mask that marks rank deficient design matrices.
+    """
+    u, s, vt = numpy.linalg.svd(design, full_matrices=False)
+    rcond = numpy.finfo(float).eps * max(design.shape[-2:])
+    cutoff = rcond * s[..., :1]
+    large = s > cutoff
+    s_inv = numpy.zeros_like(s)
+    numpy.divide(1, s, out=s_inv, where=large)
+    pinv = numpy.swapaxes(vt, -1, -2) @ (s_inv[..., numpy.newaxis] * numpy.swapaxes(u, -1, -2))
+    leverage = numpy.sum(u * u * large[..., numpy.newaxis, :], axis=-1)
+    rank_deficient = (numpy.sum(large, axis=-1) < design.shape[-1])
+    return pinv, leverage, rank_deficient
+
+
+def leave_one_out_coefficients(design, pinv, leverage, coefficients, values):
+    """
+    Computes the least-squares coefficients for each leave-one-out fold from the solution using all points.
+
+    The coefficients are derived using the downdate formula of the prediction residual error sum of squares (PRESS)
+    statistic, so no fold has to be refitted. Requires design matrices with full rank and leverages smaller than one.
+
+    :param design: The design matrices with the shape (..., points, coefficients).
+    :param pinv: The pseudo inverses of the design matrices with the shape (..., coefficients, points).
+    :param leverage: The diagonals of the hat matrices with the shape (..., points).
+    :param coefficients: The coefficients of the fit using all points with the shape (..., coefficients, series).
+    :param values: The measured values with the shape (points, series).
+    :return: The coefficients for each fold with the shape (..., folds, coefficients, series).
+    """
+    residuals = values - design @ coefficients  # (..., points, series)
+    scaled_residuals = residuals / (1 - leverage)[..., numpy.newaxis]
+    return coefficients[..., numpy.newaxis, :, :] - \
+           numpy.swapaxes(pinv, -1, -2)[..., numpy.newaxis] * scaled_residuals[..., numpy.newaxis, :]
+
+
+def leave_one_out_minimum(values: numpy.ndarray):
+    """
+    Determines for each point the minimum of all other points along the first axis.
+    """
+    if len(values) < 2:
+        return numpy.full_like(values, numpy.nan, dtype=float)
+    order = numpy.argsort(values, axis=0, kind='stable')
+    smallest = numpy.take_along_axis(values, order[:2], axis=0)
+    minimum = numpy.broadcast_to(smallest[0], values.shape).copy()
+    numpy.put_along_axis(minimum, order[:1], smallest[1:2], axis=0)
+    return minimum
@@ -1,6 +1,6 @@
 # This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
 #
-# Copyright (c) 2020, Technical University of Darmstadt, Germany
+# Copyright (c) 2020-2021, Technical University of Darmstadt, Germany
 #
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
@@ -85,12 +85,15 @@ class BaseSchema(Schema):
 
 
 def make_value_schema(class_, value):
+    # classes that support interning are loaded as their canonical instances
+    create = getattr(class_, 'intern', class_)
+
     class Schema(_Schema):
         def dump(self, obj, *, many: bool = None):
             return getattr(obj, value)
 
         def load(self, data, *, many: bool = None, partial=None, unknown: str = None):
-            return class_(data)
+            return create(data)
 
     return Schema
 
@@ -0,0 +1,234 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+"""
+Benchmark suite for the modelers.
+
+Generates synthetic experiments with the generator in data/input/synthetic-data.py and measures the time and the peak
+memory of ModelGenerator.model_all for each modeler. The results are written as JSON, so that they can be compared
+between versions. Each size option accepts several values, all combinations of the values are benchmarked.
+
+Example::
+
+    python -m tests.benchmark --callpaths 10 100 --parameters 1 2 --output results.json
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy
+
+import extrap
+from extrap.entities.callpath import Callpath
+from extrap.entities.coordinate import Coordinate
+from extrap.entities.experiment import Experiment
+from extrap.entities.measurement import Measurement
+from extrap.entities.metric import Metric
+from extrap.entities.parameter import Parameter
+from extrap.fileio.io_helper import create_call_tree
+from extrap.modelers import single_parameter, multi_parameter
+from extrap.modelers.model_generator import ModelGenerator
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+GENERATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'input', 'synthetic-data.py')
+# the generator supports up to three parameters
+MAX_PARAMETERS = 3
+PARAMETER_NAMES = ['x', 'y', 'z']
+
+
+def _load_generator():
+    spec = importlib.util.spec_from_file_location('synthetic_data', GENERATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parameter_values(parameter: int, points: int):
+    """
+    Returns the values of a parameter, they are extended like the values used by the generator script.
+    """
+    if parameter == 0:
+        return [20 + 10 * i for i in range(points)]
+    elif parameter == 1:
+        return [1 + i for i in range(points)]
+    else:
+        return [100 + 100 * i for i in range(points)]
+
+
+def generate_experiment(callpaths=10, metrics=1, points=5, parameters=1, repetitions=5, seed=1) -> Experiment:
+    """
+    Generates an experiment with a random function of the synthetic data generator for each callpath and metric.
+
+    :param callpaths: The number of callpaths.
+    :param metrics: The number of metrics.
+    :param points: The number of values of each parameter, all combinations of the values are measured.
+    :param parameters: The number of parameters, at most three.
+    :param repetitions: The number of repetitions of each measurement.
+    :param seed: The seed for the random coefficients and the noise.
+    """
+    if not 1 <= parameters <= MAX_PARAMETERS:
+        raise ValueError(f"The number of parameters must be between 1 and {MAX_PARAMETERS}.")
+    generator = _load_generator()
+    random.seed(seed)
+
+    experiment = Experiment()
+    for name in PARAMETER_NAMES[:parameters]:
+        experiment.add_parameter(Parameter(name))
+    values = [parameter_values(p, points) for p in range(parameters)]
+    for coordinate in itertools.product(*values):
+        experiment.add_coordinate(Coordinate(coordinate))
+    for m in range(metrics):
+        experiment.add_metric(Metric(f'metric{m}'))
+    for c in range(callpaths):
+        experiment.add_callpath(Callpath(f'callpath{c}'))
+
+    for callpath in experiment.callpaths:
+        for metric in experiment.metrics:
+            function = generator.Function.getRandomFunc(parameters)
+            for coordinate in experiment.coordinates:
+                # the unused parameters are set to the values the generator script uses
+                x, y, z = tuple(coordinate) + (2, 1)[parameters - 1:]
+                experiment.add_measurement(Measurement(
+                    coordinate, callpath, metric, [function.eval_with_noise(x, y, z) for _ in range(repetitions)]))
+    experiment.call_tree = create_call_tree(experiment.callpaths)
+    return experiment
+
+
+def available_modelers(parameters: int):
+    """
+    Returns the names of the modelers that can model experiments with the given number of parameters.
+    """
+    modelers = single_parameter.all_modelers if parameters == 1 else multi_parameter.all_modelers
+    return [name for name in modelers.keys() if name != 'Default']
+
+
+def benchmark_modeler(experiment: Experiment, modeler: str, runs=3, jobs=1):
+    """
+    Measures the time and the peak memory of modeling all measurements of the experiment with the modeler.
+    The peak memory is traced in an additional run, because the tracing slows down the modeling.
+    """
+    times = []
+    for _ in range(runs):
+        model_generator = ModelGenerator(experiment, modeler)
+        start = time.perf_counter()
+        model_generator.model_all(jobs=jobs)
+        times.append(time.perf_counter() - start)
+        experiment.modelers.remove(model_generator)
+
+    model_generator = ModelGenerator(experiment, modeler)
+    tracemalloc.start()
+    try:
+        model_generator.model_all(jobs=jobs)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    experiment.modelers.remove(model_generator)
+
+    return {
+        'times': times,
+        'min_time': min(times),
+        'median_time': statistics.median(times),
+        'peak_memory': peak_memory,
+        'models': len(model_generator.models),
+        'skipped_searches': model_generator.skipped_searches
+    }
+
+
+def run_benchmarks(callpaths=(10,), metrics=(1,), points=(5,), parameters=(1, 2), repetitions=(5,), modelers=None,
+                   runs=3, jobs=1, seed=1, log=None):
+    """
+    Benchmarks the modelers for all combinations of the experiment sizes.
+
+    :param modelers: The names of the modelers, by default all modelers are benchmarked. Modelers that do not
+                     support the number of parameters of an experiment are skipped.
+    :param log: Is called with a short summary of each result.
+    :return: The results, including the configuration and the environment.
+    """
+    results = []
+    for size in itertools.product(callpaths, metrics, points, parameters, repetitions):
+        configuration = dict(zip(['callpaths', 'metrics', 'points', 'parameters', 'repetitions'], size))
+        experiment = generate_experiment(**configuration, seed=seed)
+        names = available_modelers(configuration['parameters'])
+        if modelers is not None:
+            names = [name for name in names if name.lower() in (m.lower() for m in modelers)]
+        for name in names:
+            result = {'modeler': name, **configuration, **benchmark_modeler(experiment, name, runs, jobs)}
+            results.append(result)
+            if log is not None:
+                log("{modeler} callpaths={callpaths} metrics={metrics} points={points} parameters={parameters} "
+                    "repetitions={repetitions}: {min_time:.3f} s, {peak:.1f} MiB".format(
+                        peak=result['peak_memory'] / 2 ** 20, **result))
+
+    environment = {
+        'extrap': extrap.__version__,
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'date': datetime.now().isoformat(timespec='seconds')
+    }
+    if resource is not None:
+        # the maximum resident set size of the whole benchmark process, in kilobytes on Linux
+        environment['max_rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'environment': environment,
+        'configuration': {'runs': runs, 'jobs': jobs, 'seed': seed},
+        'results': results
+    }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the Extra-P modelers with synthetic experiments.")
+    parser.add_argument("--callpaths", type=int, nargs='+', default=[10], metavar="N",
+                        help="Number of callpaths (default: 10)")
+    parser.add_argument("--metrics", type=int, nargs='+', default=[1], metavar="N",
+                        help="Number of metrics (default: 1)")
+    parser.add_argument("--points", type=int, nargs='+', default=[5], metavar="N",
+                        help="Number of values of each parameter (default: 5)")
+    parser.add_argument("--parameters", type=int, nargs='+', default=[1, 2], metavar="N",
+                        choices=range(1, MAX_PARAMETERS + 1), help="Number of parameters (default: 1 2)")
+    parser.add_argument("--repetitions", type=int, nargs='+', default=[5], metavar="N",
+                        help="Number of repetitions of each measurement (default: 5)")
+    parser.add_argument("--modelers", nargs='+', metavar="NAME",
+                        help="Names of the benchmarked modelers (default: all)")
+    parser.add_argument("--runs", type=int, default=3, metavar="N",
+                        help="Number of timed runs of each benchmark (default: 3)")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="Number of processes used for modeling (default: 1)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic data (default: 1)")
+    parser.add_argument("--output", metavar="PATH",
+                        help="Writes the results to the file instead of the standard output")
+    arguments = parser.parse_args(args)
+
+    results = run_benchmarks(arguments.callpaths, arguments.metrics, arguments.points, arguments.parameters,
+                             arguments.repetitions, arguments.modelers, arguments.runs, arguments.jobs, arguments.seed,
+                             log=lambda text: print(text, file=sys.stderr))
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -66,53 +66,73 @@ class Function:
 
         return f
 
+    @staticmethod
+    def getRandomFunc(nparams):
+        """
+        Returns a function with the same terms as getFunc, but with random coefficients.
+        """
+        f = Function()
+        f.c_0 = Function.getRandomCoefficient()
+        f.c_1 = Function.getRandomCoefficient()
+        if nparams < 3:
+            f.c_2 = 0
+        else:
+            f.c_2 = Function.getRandomCoefficient()
 
-nparams = 3
-reps = 5
-
-x_range = [20, 30, 40, 50, 60]
-y_range = [2]
-z_range = [1]
-
-if nparams > 1:
-    y_range = [1, 2, 3, 4, 5]
-if nparams > 2:
-    z_range = [100, 200, 300, 400, 500]
-
-data_file = "input_data_" + str(nparams) + "p.txt"
-outfile = open(data_file, 'w')
-
-outfile.write("PARAMETER x\n")
-if nparams > 1:
-    outfile.write("PARAMETER y\n")
-if nparams > 2:
-    outfile.write("PARAMETER z\n")
-outfile.write("\n")
-
-for z in z_range:
-    for x in x_range:
-        outfile.write("POINTS")
-        for y in y_range:
-            if nparams == 1:
-                outfile.write(" ( {} )".format(x))
-            if nparams == 2:
-                outfile.write(" ( {} {} )".format(x, y))
-            if nparams == 3:
-                outfile.write(" ( {} {} {} )".format(x, y, z))
-        outfile.write("\n")
-    outfile.write("\n")
+        return f
+
+
+def main():
+    nparams = 3
+    reps = 5
 
-outfile.write("REGION reg\n")
-outfile.write("METRIC metr\n")
+    x_range = [20, 30, 40, 50, 60]
+    y_range = [2]
+    z_range = [1]
 
-f = Function.getFunc(nparams)
+    if nparams > 1:
+        y_range = [1, 2, 3, 4, 5]
+    if nparams > 2:
+        z_range = [100, 200, 300, 400, 500]
 
-for z in z_range:
-    for x in x_range:
-        for y in y_range:
-            outfile.write("DATA")
-            for i in range(1, reps + 1):
-                outfile.write(" {}".format(f.eval_with_noise(x, y, z)))
+    data_file = "input_data_" + str(nparams) + "p.txt"
+    outfile = open(data_file, 'w')
+
+    outfile.write("PARAMETER x\n")
+    if nparams > 1:
+        outfile.write("PARAMETER y\n")
+    if nparams > 2:
+        outfile.write("PARAMETER z\n")
+    outfile.write("\n")
+
+    for z in z_range:
+        for x in x_range:
+            outfile.write("POINTS")
+            for y in y_range:
+                if nparams == 1:
+                    outfile.write(" ( {} )".format(x))
+                if nparams == 2:
+                    outfile.write(" ( {} {} )".format(x, y))
+                if nparams == 3:
+                    outfile.write(" ( {} {} {} )".format(x, y, z))
             outfile.write("\n")
+        outfile.write("\n")
+
+    outfile.write("REGION reg\n")
+    outfile.write("METRIC metr\n")
+
+    f = Function.getFunc(nparams)
+
+    for z in z_range:
+        for x in x_range:
+            for y in y_range:
+                outfile.write("DATA")
+                for i in range(1, reps + 1):
+                    outfile.write(" {}".format(f.eval_with_noise(x, y, z)))
+                outfile.write("\n")
+
+    outfile.close()
+
 
-outfile.close()
+if __name__ == '__main__':
+    main()
@@ -277,3 +277,123 @@ class TestBasicModeler(TestCaseWithFunctionAssertions):
             models = modeler.model([measurements])
             self.assertEqual(1, len(models))
             self.assertApproxFunction(function, models[0].hypothesis.function, places=3)
+
+    @staticmethod
+    def _noisy_series(rng, points, building_blocks, max_coefficient=100):
+        """
+        Creates one measurement series for each building block, whose values follow a function of the building block
+        with random coefficients and 5% noise.
+        """
+        series = []
+        for compound_term in building_blocks:
+            term = CompoundTerm(*compound_term.simple_terms)
+            term.coefficient = rng.uniform(1, max_coefficient)
+            function = SingleParameterFunction(term)
+            function.constant_coefficient = rng.uniform(1, max_coefficient)
+            values = function.evaluate(np.array(points)) * rng.normal(1, 0.05, len(points))
+            series.append([Measurement(Coordinate(p), None, None, v) for p, v in zip(points, values)])
+        return series
+
+    def test_batched_search(self):
+        rng = np.random.default_rng(42)
+        points = [2, 4, 8, 16, 32, 64]
+        batched_modeler = SingleParameterModeler()
+        modeler = SingleParameterModeler()
+        modeler.use_batched_search = False
+        for crossvalidation in [True, False]:
+            batched_modeler.use_crossvalidation = crossvalidation
+            modeler.use_crossvalidation = crossvalidation
+            for measurements in self._noisy_series(rng, points, modeler.hypotheses_building_blocks, 1000):
+                expected = modeler.create_model(measurements).hypothesis
+                actual = batched_modeler.create_model(measurements).hypothesis
+                self.assertEqual(type(expected), type(actual))
+                self.assertApproxFunction(expected.function, actual.function)
+                self.assertAlmostEqual(expected.SMAPE, actual.SMAPE)
+                self.assertApprox(expected.RSS, actual.RSS)
+                self.assertApprox(expected.AR2, actual.AR2)
+
+    def test_press_crossvalidation(self):
+        rng = np.random.default_rng(7)
+        points = [2, 4, 8, 16, 32, 64]
+        modeler = SingleParameterModeler()
+        for measurements in self._noisy_series(rng, points, modeler.hypotheses_building_blocks, 1000):
+            for candidate in modeler.hypotheses_building_blocks:
+                expected = modeler.build_hypothesis(candidate)
+                modeler._compute_cost_leave_one_out(expected, measurements)
+                actual = modeler.build_hypothesis(candidate)
+                self.assertTrue(actual.compute_cost_press(measurements, modeler.epsilon))
+                self.assertApprox(expected.RSS, actual.RSS)
+                self.assertApprox(expected.rRSS, actual.rRSS)
+                self.assertApprox(expected.SMAPE, actual.SMAPE)
+                self.assertApprox(expected.RE, actual.RE)
+
+        for batched_search in [True, False]:
+            press_modeler = SingleParameterModeler()
+            press_modeler.use_batched_search = batched_search
+            reference_modeler = SingleParameterModeler()
+            reference_modeler.use_batched_search = batched_search
+            reference_modeler.crossvalidation_method = 'reference'
+            measurements = [Measurement(Coordinate(p), None, None, 3 + 0.5 * p ** 1.5 * rng.normal(1, 0.05))
+                            for p in points]
+            expected = reference_modeler.create_model(measurements).hypothesis
+            actual = press_modeler.create_model(measurements).hypothesis
+            self.assertApproxFunction(expected.function, actual.function)
+            self.assertApprox(expected.SMAPE, actual.SMAPE)
+            self.assertApprox(expected.RSS, actual.RSS)
+
+    def test_term_array_evaluation(self):
+        points = np.array([2, 3, 4, 8, 16, 32, 100], dtype=float)
+        for term in SingleParameterModeler.create_default_building_blocks(True):
+            for simple_term in term.simple_terms:
+                values = simple_term.evaluate(points)
+                self.assertListEqual([simple_term.evaluate(p) for p in points], values.tolist())
+                values[0] = 0
+                self.assertEqual(simple_term.evaluate(points[0]), simple_term.evaluate(points)[0])
+
+    def test_grouped_modeling(self):
+        rng = np.random.default_rng(3)
+        series = []
+        for points in ([2, 4, 8, 16, 32, 64], [2, 4, 8, 16, 32, 64], [1, 2, 3, 4, 5], [64, 32, 16, 8, 4, 2]):
+            series += self._noisy_series(rng, points, SingleParameterModeler.create_default_building_blocks(True)[::4])
+            series.append([Measurement(Coordinate(p), None, None, 42) for p in points])
+
+        self.assertEqual(3, len(SingleParameterModeler.group_by_coordinates(series)))
+        for crossvalidation in [True, False]:
+            modeler = SingleParameterModeler()
+            modeler.use_crossvalidation = crossvalidation
+            grouped_models = modeler.model(series)
+            modeler.group_series = False
+            models = modeler.model(series)
+            self.assertEqual(len(models), len(grouped_models))
+            for expected, actual in zip(models, grouped_models):
+                self.assertEqual(type(expected.hypothesis), type(actual.hypothesis))
+                self.assertApproxFunction(expected.hypothesis.function, actual.hypothesis.function)
+                self.assertApprox(expected.hypothesis.SMAPE, actual.hypothesis.SMAPE)
+                self.assertApprox(expected.hypothesis.AR2, actual.hypothesis.AR2)
+
+    def test_pruning(self):
+        rng = np.random.default_rng(4)
+        points = [2, 4, 8, 16, 32, 64]
+        series = self._noisy_series(rng, points, SingleParameterModeler.create_default_building_blocks(True)[::3])
+        # nearly constant series, most terms contribute less than epsilon
+        series.append([Measurement(Coordinate(p), None, None, 1000 + 1e-4 * p) for p in points])
+
+        for use_batched_search, crossvalidation_method in [(True, 'press'), (True, 'reference'), (False, 'press'),
+                                                           (False, 'reference')]:
+            for compare_with_rss in [False, True]:
+                modeler = SingleParameterModeler()
+                modeler.use_batched_search = use_batched_search
+                modeler.crossvalidation_method = crossvalidation_method
+                modeler.compare_with_RSS = compare_with_rss
+                pruned_models = modeler.model(series)
+                self.assertGreater(modeler.pruned_by_contribution, 0)
+                # the partial costs are only bounded when every fold is refitted one after another
+                if crossvalidation_method == 'reference' and not use_batched_search:
+                    self.assertGreater(modeler.pruned_by_bound, 0)
+                else:
+                    self.assertEqual(0, modeler.pruned_by_bound)
+
+                modeler.prune_hypotheses = False
+                models = modeler.model(series)
+                for expected, actual in zip(models, pruned_models):
+                    self.assertEqual(expected.hypothesis, actual.hypothesis)
@@ -0,0 +1,45 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import json
+import os
+import tempfile
+import unittest
+
+from tests import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_generate_experiment(self):
+        experiment = benchmark.generate_experiment(callpaths=3, metrics=2, points=4, parameters=2, repetitions=3)
+        self.assertEqual(2, len(experiment.parameters))
+        self.assertEqual(16, len(experiment.coordinates))
+        self.assertEqual(6, len(experiment.measurements))
+        for measurements in experiment.measurements.values():
+            self.assertEqual(16, len(measurements))
+            self.assertLessEqual(measurements[0].minimum, measurements[0].maximum)
+        same_seed = benchmark.generate_experiment(callpaths=3, metrics=2, points=4, parameters=2, repetitions=3)
+        self.assertEqual(experiment.measurements, same_seed.measurements)
+        self.assertRaises(ValueError, benchmark.generate_experiment, parameters=4)
+
+    def test_run_benchmarks(self):
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, 'results.json')
+        benchmark.main(['--callpaths', '2', '--parameters', '1', '2', '--runs', '1', '--output', path])
+        with open(path) as file:
+            results = json.load(file)
+        self.assertEqual({'Basic', 'Refining', 'Multi-Parameter'}, {r['modeler'] for r in results['results']})
+        for result in results['results']:
+            self.assertEqual(2, result['models'])
+            self.assertEqual(1, len(result['times']))
+            self.assertGreater(result['peak_memory'], 0)
+        self.assertIn('numpy', results['environment'])
+
+
+if __name__ == '__main__':
+    unittest.main()
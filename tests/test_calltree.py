@@ -0,0 +1,76 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import unittest
+
+from extrap.entities.callpath import Callpath
+from extrap.entities.calltree import Node, CallTree
+from extrap.fileio.io_helper import create_call_tree
+
+
+class TestCallTree(unittest.TestCase):
+
+    def test_create_call_tree(self):
+        callpaths = [Callpath(name) for name in ['main->init', 'main', 'finalize', 'main->init->alloc',
+                                                 'main->compute', 'main->init->read', 'main->compute->alloc']]
+        tree = create_call_tree(callpaths)
+
+        expected_tree = CallTree()
+        main = Node('main', callpaths[1])
+        expected_tree.add_child_node(main)
+        expected_tree.add_child_node(Node('finalize', callpaths[2]))
+        init = Node('init', callpaths[0])
+        main.add_child_node(init)
+        init.add_child_node(Node('alloc', callpaths[3]))
+        init.add_child_node(Node('read', callpaths[5]))
+        compute = Node('compute', callpaths[4])
+        main.add_child_node(compute)
+        compute.add_child_node(Node('alloc', callpaths[6]))
+        self.assertEqual(expected_tree, tree)
+
+    def test_missing_parents(self):
+        tree = create_call_tree([Callpath('main->foo->bar')])
+        foo = tree.get_node('main').find_child('foo')
+        self.assertEqual(Callpath.EMPTY, foo.path)
+        self.assertEqual(Callpath('main->foo->bar'), foo.find_child('bar').path)
+
+    def test_duplicate(self):
+        with self.assertWarns(UserWarning):
+            tree = create_call_tree([Callpath('main'), Callpath('main')])
+        self.assertEqual(1, len(tree.childs))
+
+    def test_find_child(self):
+        tree = CallTree()
+        tree.add_node(Node('main', Callpath('main')))
+        self.assertIs(tree.childs[0], tree.get_node('main'))
+        self.assertTrue(tree.node_exist('main'))
+        self.assertIsNone(tree.get_node('foo'))
+        # children appended directly are found, too
+        tree.childs.append(Node('foo', Callpath('foo')))
+        self.assertIs(tree.childs[1], tree.find_child('foo'))
+        self.assertTrue(tree.child_exists('foo'))
+        tree.childs.pop()
+        tree.childs.pop()
+        self.assertIsNone(tree.find_child('main'))
+
+        tree.childs = [Node('main', Callpath('main')), Node('bar', Callpath('bar'))]
+        self.assertIs(tree.childs[1], tree.find_child('bar'))
+        tree.childs[1] = Node('foo', Callpath('foo'))
+        self.assertIsNone(tree.find_child('bar'))
+        self.assertIs(tree.childs[1], tree.find_child('foo'))
+        tree.childs[0] = Node('foo', Callpath('foo'))
+        self.assertIs(tree.childs[0], tree.find_child('foo'))
+        del tree.childs[0]
+        tree.childs.insert(0, Node('main', Callpath('main')))
+        self.assertIs(tree.childs[0], tree.get_node('main'))
+        self.assertIs(tree.childs[1], tree.find_child('foo'))
+        tree.childs.sort(key=lambda n: n.name)
+        self.assertIs(tree.childs[0], tree.find_child('foo'))
+
+
+if __name__ == '__main__':
+    unittest.main()
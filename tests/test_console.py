@@ -35,6 +35,29 @@ class TestConsole(unittest.TestCase):
         self.assertRaisesRegex(SystemExit, '[^0]', extrap.main,
                                ['--modeler', 'does_not_exist', '--text', 'data/text/one_parameter_1.txt'])
 
+    def test_jobs(self):
+        extrap.main(['--jobs', '2', '--text', 'data/text/one_parameter_1.txt'])
+        extrap.main(['--jobs', '0', '--text', 'data/text/two_parameter_1.txt'])
+
+    def test_stream(self):
+        extrap.main(['--stream', '--text', 'data/text/one_parameter_1.txt'])
+        extrap.main(['--stream', '--jobs', '2', '--text', 'data/text/two_parameter_1.txt'])
+
+    def test_evaluate(self):
+        extrap.main(['--evaluate', '64000', '1024', '--text', 'data/text/one_parameter_1.txt'])
+        extrap.main(['--evaluate', '64000,8', '--text', 'data/text/two_parameter_1.txt'])
+        self.assertRaises(SystemExit, extrap.main, ['--evaluate', '64000', '--text', 'data/text/two_parameter_1.txt'])
+
+    def test_time_budget(self):
+        extrap.main(['--time-budget', '60', '--text', 'data/text/one_parameter_1.txt'])
+        extrap.main(['--time-budget', '60', '--text', 'data/text/two_parameter_1.txt'])
+
+    def test_profile(self):
+        self.assertOutputRegex(r"Modeling profile \(total time: \d+\.\d+ s\)\s+Phase\s+Calls", extrap.main,
+                               ['--profile', '--text', 'data/text/one_parameter_1.txt'])
+        self.assertOutputRegex(r"MultiParameterModeler\.create_model\s+1\s+", extrap.main,
+                               ['--profile', '--text', 'data/text/two_parameter_1.txt'])
+
     def test_print(self):
         extrap.main(['--text', 'data/text/one_parameter_1.txt'])
         self.assertOutputRegex(
@@ -0,0 +1,88 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import unittest
+
+from extrap.entities.callpath import Callpath
+from extrap.entities.coordinate import Coordinate
+from extrap.entities.functions import SingleParameterFunction
+from extrap.entities.hypotheses import ConstantHypothesis
+from extrap.entities.measurement import Measurement
+from extrap.entities.metric import Metric
+from extrap.entities.terms import CompoundTerm
+from extrap.fileio.text_file_reader import read_text_file
+from extrap.modelers.model_generator import ModelGenerator
+from extrap.modelers.multi_parameter.multi_parameter_modeler import MultiParameterModeler
+from extrap.modelers.single_parameter.basic import SingleParameterModeler
+from extrap.modelers.single_parameter.refining import RefiningModeler
+from extrap.util.deadline import Deadline
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_deadline(self):
+        self.assertIsNone(Deadline.create(None))
+        self.assertIsNone(Deadline.create(0))
+        deadline = Deadline.create(3600)
+        self.assertFalse(deadline.expired())
+        self.assertFalse(deadline.reached)
+        self.assertLessEqual(deadline.remaining(), 3600)
+
+        parent = Deadline(0)
+        child = Deadline.create(None, parent)
+        self.assertTrue(child.expired())
+        self.assertTrue(child.reached)
+        self.assertTrue(parent.reached)
+        self.assertEqual(0, child.remaining())
+
+    def test_truncated_modeling(self):
+        experiment = read_text_file('data/text/one_parameter_6.txt')
+        for modeler in [SingleParameterModeler(), RefiningModeler()]:
+            model_generator = ModelGenerator(experiment, modeler)
+            model_generator.model_all()
+            self.assertTrue(all(m.exhaustive for m in model_generator.models.values()))
+
+            truncated_generator = ModelGenerator(experiment, modeler)
+            truncated_generator.model_all(time_budget=1e-9)
+            cp = Callpath('met2'), Metric('')
+            self.assertFalse(truncated_generator.models[cp].exhaustive)
+            self.assertIsNone(modeler.deadline)
+
+    def test_time_budget(self):
+        modeler = SingleParameterModeler()
+        modeler.use_batched_search = False
+        modeler.time_budget = 1e-9
+        term = CompoundTerm.create(2, 1, 0)
+        term.coefficient = 3
+        function = SingleParameterFunction(term)
+        measurements = [Measurement(Coordinate(p), None, None, function.evaluate(p)) for p in [2, 4, 8, 16, 32]]
+        model = modeler.model([measurements])[0]
+        self.assertFalse(model.exhaustive)
+        self.assertIsInstance(model.hypothesis, ConstantHypothesis)
+
+    def test_grouped_time_budget(self):
+        modeler = SingleParameterModeler()
+        modeler.time_budget = 10
+        self.assertLessEqual(modeler.create_deadline().remaining(), 10)
+        self.assertGreater(modeler.create_deadline(4).remaining(), 30)
+        modeler.time_budget = 0
+        self.assertIsNone(modeler.create_deadline(4))
+        # all modelers share the same option
+        self.assertIs(SingleParameterModeler.OPTIONS['time_budget'], MultiParameterModeler.OPTIONS['time_budget'])
+        self.assertIs(SingleParameterModeler.OPTIONS['time_budget'], RefiningModeler.OPTIONS['time_budget'])
+
+    def test_order_by_likelihood(self):
+        building_blocks = SingleParameterModeler.create_default_building_blocks(True)
+        term = CompoundTerm.create(2, 1, 0)
+        measurements = [Measurement(Coordinate(p), None, None, term.evaluate(p)) for p in [2, 4, 8, 16, 32]]
+        ordered = SingleParameterModeler.order_by_likelihood(building_blocks, measurements, False)
+        self.assertCountEqual(building_blocks, ordered)
+        self.assertEqual(term, ordered[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
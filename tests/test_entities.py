@@ -0,0 +1,167 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import copy
+import pickle
+import unittest
+
+import numpy as np
+
+from extrap.entities.callpath import Callpath, CallpathSchema
+from extrap.entities.coordinate import Coordinate, CoordinateSchema
+from extrap.entities.experiment import Experiment
+from extrap.entities.measurement import Measurement
+from extrap.entities.metric import Metric, MetricSchema
+from extrap.fileio.jsonlines_file_reader import read_jsonlines_file
+from extrap.fileio.text_file_reader import read_text_file
+
+
+class TestInterning(unittest.TestCase):
+
+    def test_intern(self):
+        self.assertIs(Callpath.intern('main->foo'), Callpath.intern('main->foo'))
+        self.assertIsNot(Callpath.intern('main->foo'), Callpath.intern('main->bar'))
+        self.assertEqual(Callpath('main->foo'), Callpath.intern('main->foo'))
+        self.assertIs(Metric.intern('time'), Metric.intern('time'))
+        self.assertIs(Coordinate.intern(1, 2), Coordinate.intern([1, 2]))
+        self.assertIs(Coordinate.intern(4), Coordinate.intern((4,)))
+        self.assertEqual(Coordinate(1, 2), Coordinate.intern(1, 2))
+        self.assertEqual(hash(Coordinate(1, 2)), hash(Coordinate.intern(1, 2)))
+
+    def test_slots(self):
+        for entity in [Callpath('main'), Metric('time'), Coordinate(1, 2)]:
+            self.assertFalse(hasattr(entity, '__dict__'))
+            self.assertRaises(AttributeError, setattr, entity, 'tag', 1)
+
+    def test_copy(self):
+        for entity in [Callpath('main'), Metric('time'), Coordinate(1, 2), Callpath.EMPTY]:
+            for copied in [copy.copy(entity), copy.deepcopy(entity), pickle.loads(pickle.dumps(entity))]:
+                self.assertEqual(entity, copied)
+                self.assertEqual(hash(entity), hash(copied))
+
+    def test_schema(self):
+        self.assertIs(Callpath.intern('main'), CallpathSchema().load('main'))
+        self.assertIs(Metric.intern('time'), MetricSchema().load('time'))
+        self.assertIs(Coordinate.intern(1, 2), CoordinateSchema().load([1, 2]))
+
+    def test_readers(self):
+        experiment = read_text_file('data/text/two_parameter_1.txt')
+        for (callpath, metric), measurements in experiment.measurements.items():
+            self.assertIs(Callpath.intern(callpath.name), callpath)
+            self.assertIs(Metric.intern(metric.name), metric)
+            for m in measurements:
+                self.assertIs(Coordinate.intern(m.coordinate), m.coordinate)
+
+        experiment = read_jsonlines_file('data/jsonlines/test2.jsonl')
+        for (callpath, metric), measurements in experiment.measurements.items():
+            self.assertIs(Callpath.intern(callpath.name), callpath)
+            self.assertIs(Metric.intern(metric.name), metric)
+
+
+class TestMeasurement(unittest.TestCase):
+    STATISTICS = ['mean', 'median', 'minimum', 'maximum', 'std']
+
+    def assertStatisticsEqual(self, expected: Measurement, actual: Measurement):
+        for statistic in self.STATISTICS:
+            self.assertEqual(getattr(expected, statistic), getattr(actual, statistic), statistic)
+
+    def test_lazy_statistics(self):
+        values = [3, 1, 4, 1, 5, 9, 2, 6]
+        measurement = Measurement(Coordinate(1), Callpath('main'), Metric('time'), values)
+        lazy_measurement = Measurement(Coordinate(1), Callpath('main'), Metric('time'), values, use_median=False)
+        self.assertFalse(hasattr(measurement, '__dict__'))
+        self.assertIsNone(lazy_measurement._median)
+        self.assertEqual(measurement.value(False), lazy_measurement.value(False))
+        self.assertIsNone(lazy_measurement._std)
+        self.assertEqual(measurement.std, lazy_measurement.std)
+        self.assertIsNone(lazy_measurement._values)
+        self.assertStatisticsEqual(measurement, lazy_measurement)
+
+        lazy_measurement = Measurement(Coordinate(1), Callpath('main'), Metric('time'), values, use_median=True)
+        self.assertIsNone(lazy_measurement._mean)
+        self.assertEqual(measurement.value(True), lazy_measurement.value(True))
+        self.assertEqual(measurement, pickle.loads(pickle.dumps(lazy_measurement)))
+
+        lazy_measurement.merge(measurement)
+        measurement.merge(measurement)
+        self.assertStatisticsEqual(measurement, lazy_measurement)
+
+    def test_from_repetitions(self):
+        rng = np.random.default_rng(1)
+        coordinates = [Coordinate(i) for i in range(1, 21)]
+        repetitions = [rng.random(rng.integers(1, 50)) for _ in coordinates]
+        measurements = Measurement.from_repetitions(coordinates, Callpath('main'), Metric('time'), repetitions)
+        for coordinate, values, measurement in zip(coordinates, repetitions, measurements):
+            self.assertIs(coordinate, measurement.coordinate)
+            self.assertStatisticsEqual(Measurement(coordinate, Callpath('main'), Metric('time'), values), measurement)
+
+        repetitions = rng.random((20, 7))
+        callpaths = [Callpath(f'cp{i}') for i in range(20)]
+        measurements = Measurement.from_repetitions(Coordinate(1), callpaths, Metric('time'), repetitions,
+                                                    use_median=True)
+        for callpath, values, measurement in zip(callpaths, repetitions, measurements):
+            self.assertIsNone(measurement._mean)
+            self.assertIs(callpath, measurement.callpath)
+            self.assertStatisticsEqual(Measurement(Coordinate(1), callpath, Metric('time'), values), measurement)
+
+        self.assertRaises(ValueError, Measurement.from_repetitions, coordinates, Callpath('main'), Metric('time'),
+                          repetitions[:5])
+
+
+class TestFindMeasurement(unittest.TestCase):
+
+    def test_find_measurement(self):
+        experiment = Experiment()
+        callpath, metric = Callpath('main'), Metric('time')
+        measurements = [Measurement(Coordinate(i), callpath, metric, [i]) for i in range(1, 6)]
+        for m in measurements[:3]:
+            experiment.add_measurement(m)
+        self.assertIs(measurements[1], experiment.find_measurement(callpath, metric, Coordinate(2)))
+        self.assertIsNone(experiment.find_measurement(callpath, metric, Coordinate(4)))
+        self.assertIsNone(experiment.find_measurement(Callpath('foo'), metric, Coordinate(1)))
+        # the index is updated by add_measurement
+        experiment.add_measurement(measurements[3])
+        self.assertIs(measurements[3], experiment.find_measurement(callpath, metric, Coordinate(4)))
+        # the first measurement at a coordinate is found
+        experiment.add_measurement(Measurement(Coordinate(4), callpath, metric, [0]))
+        self.assertIs(measurements[3], experiment.find_measurement(callpath, metric, Coordinate(4)))
+        # changes without add_measurement are detected
+        experiment.measurements[callpath, metric].append(measurements[4])
+        self.assertIs(measurements[4], experiment.find_measurement(callpath, metric, Coordinate(5)))
+        # measurements replaced in the list are detected
+        replacement = Measurement(Coordinate(2), callpath, metric, [7])
+        experiment.measurements[callpath, metric][1] = replacement
+        self.assertIs(replacement, experiment.find_measurement(callpath, metric, Coordinate(2)))
+        experiment.measurements[callpath, metric][1] = Measurement(Coordinate(6), callpath, metric, [6])
+        self.assertIsNone(experiment.find_measurement(callpath, metric, Coordinate(2)))
+        self.assertIs(measurements[4], experiment.find_measurement(callpath, metric, Coordinate(5)))
+        experiment.measurements[callpath, metric].pop()
+        self.assertIsNone(experiment.find_measurement(callpath, metric, Coordinate(5)))
+        experiment.measurements[callpath, metric] = measurements[:1]
+        self.assertIsNone(experiment.find_measurement(callpath, metric, Coordinate(2)))
+        experiment.callpaths.append(callpath)
+        experiment.metrics.append(metric)
+        experiment.coordinates.append(Coordinate(1))
+        with self.assertWarns(DeprecationWarning):
+            self.assertIs(measurements[0], experiment.get_measurement(0, 0, 0))
+
+        experiment.clear_measurements()
+        self.assertIsNone(experiment.find_measurement(callpath, metric, Coordinate(1)))
+
+    def test_columnar(self):
+        experiment = read_text_file('data/text/two_parameter_1.txt')
+        expected = {(cp, m, c): experiment.find_measurement(cp, m, c) for cp in experiment.callpaths
+                    for m in experiment.metrics for c in experiment.coordinates}
+        experiment.use_columnar_measurements()
+        for (callpath, metric, coordinate), measurement in expected.items():
+            self.assertEqual(measurement, experiment.find_measurement(callpath, metric, coordinate))
+        self.assertIsNone(experiment.find_measurement(Callpath('foo'), experiment.metrics[0],
+                                                      experiment.coordinates[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
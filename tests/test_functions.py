@@ -0,0 +1,130 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import copy
+import unittest
+
+import numpy
+
+from extrap.entities.functions import SingleParameterFunction, MultiParameterFunction, ConstantFunction, \
+    evaluate_functions
+from extrap.entities.terms import CompoundTerm, MultiParameterTerm, SimpleTerm
+
+
+class TestCompiledFunction(unittest.TestCase):
+
+    @staticmethod
+    def _create_multi_parameter_function():
+        term1 = MultiParameterTerm((0, CompoundTerm.create(1, 2, 1)), (1, CompoundTerm.create(1, 1, 0)),
+                                   (2, CompoundTerm.create(0, 1, 2)))
+        term1.coefficient = 3.3
+        term1.parameter_term_pairs[1][1].coefficient = 1.7
+        term2 = MultiParameterTerm((1, CompoundTerm.create(3, 2, 0)), (2, SimpleTerm('logarithm', 1)))
+        term2.coefficient = 0.1
+        function = MultiParameterFunction(term1, term2)
+        function.constant_coefficient = 4
+        return function
+
+    def test_evaluate(self):
+        points = numpy.random.default_rng(1).uniform(0.5, 1000, (3, 100))
+
+        term = CompoundTerm.create(1, 2, 1)
+        term.coefficient = -2.5
+        function = SingleParameterFunction(term, CompoundTerm.create(3, 1, 0))
+        function.constant_coefficient = 1.5
+        numpy.testing.assert_array_equal(function.evaluate(points[0]), function.compile().evaluate(points[0]))
+        numpy.testing.assert_array_equal(function.evaluate(points[:1]), function.compile().evaluate(points[:1]))
+
+        function = self._create_multi_parameter_function()
+        numpy.testing.assert_array_equal(function.evaluate(points), function.compile().evaluate(points))
+
+        function = ConstantFunction(2.5)
+        numpy.testing.assert_array_equal(numpy.full(100, 2.5), function.compile().evaluate(points))
+
+    def test_invalidation(self):
+        points = numpy.random.default_rng(2).uniform(1, 1000, (3, 10))
+        function = self._create_multi_parameter_function()
+        compiled = function.compile()
+        self.assertIs(compiled, function.compile())
+
+        def modify_coefficient(f):
+            f.compound_terms[0].coefficient = 2
+
+        def modify_compound_coefficient(f):
+            f.compound_terms[0].parameter_term_pairs[0][1].coefficient = 3
+
+        def modify_constant_coefficient(f):
+            f.constant_coefficient = -1
+
+        def modify_exponent(f):
+            f.compound_terms[1].parameter_term_pairs[0][1].simple_terms[0].exponent = 2
+
+        def add_term(f):
+            f.add_compound_term(MultiParameterTerm((0, CompoundTerm.create(1, 1, 0))))
+
+        def add_simple_term(f):
+            f.compound_terms[0].parameter_term_pairs[1][1].add_simple_term(SimpleTerm('logarithm', 2))
+
+        def append_term(f):
+            f.compound_terms.append(MultiParameterTerm((2, CompoundTerm.create(2, 1, 0))))
+
+        def replace_simple_term(f):
+            f.compound_terms[0].parameter_term_pairs[0][1].simple_terms[0] = SimpleTerm('polynomial', 3)
+
+        def remove_term(f):
+            del f.compound_terms[0]
+
+        for modify in [modify_coefficient, modify_compound_coefficient, modify_constant_coefficient, modify_exponent,
+                       add_term, add_simple_term, append_term, replace_simple_term, remove_term]:
+            modify(function)
+            self.assertIsNot(compiled, function.compile(), modify.__name__)
+            compiled = function.compile()
+            self.assertIs(compiled, function.compile(), modify.__name__)
+            numpy.testing.assert_array_equal(function.evaluate(points), compiled.evaluate(points), modify.__name__)
+
+        # functions that share a term are invalidated together, copies are independent of the original
+        other = MultiParameterFunction(function.compound_terms[0])
+        copied = copy.deepcopy(function)
+        compiled, other_compiled, copied_compiled = function.compile(), other.compile(), copied.compile()
+        function.compound_terms[0].coefficient = 5
+        self.assertIsNot(compiled, function.compile())
+        self.assertIsNot(other_compiled, other.compile())
+        self.assertIs(copied_compiled, copied.compile())
+        copied.compound_terms[0].parameter_term_pairs[0][1].simple_terms[0].exponent = 4
+        self.assertIsNot(copied_compiled, copied.compile())
+        numpy.testing.assert_array_equal(copied.evaluate(points), copied.compile().evaluate(points))
+
+    def test_evaluate_functions(self):
+        points = numpy.random.default_rng(3).uniform(1, 1000, (3, 20))
+        functions = []
+        for coefficient in [1, 2.5, -0.5]:
+            function = self._create_multi_parameter_function()
+            function.constant_coefficient = coefficient
+            function.compound_terms[1].coefficient = coefficient
+            functions.append(function)
+            functions.append(ConstantFunction(coefficient))
+        functions.append(MultiParameterFunction(MultiParameterTerm((1, CompoundTerm.create(1, 2, 0)))))
+
+        compiled_functions = [f.compile() for f in functions]
+        self.assertEqual(compiled_functions[0].structure, compiled_functions[2].structure)
+        self.assertNotEqual(compiled_functions[0].structure, compiled_functions[-1].structure)
+        values = evaluate_functions(compiled_functions, points)
+        self.assertEqual((len(functions), 20), values.shape)
+        for function, row in zip(functions, values):
+            numpy.testing.assert_array_equal(function.compile().evaluate(points), row)
+        self.assertEqual((0, 20), evaluate_functions([], points).shape)
+
+    def test_equality(self):
+        function = self._create_multi_parameter_function()
+        other = copy.deepcopy(function)
+        function.compile()
+        self.assertEqual(function, other)
+        self.assertEqual(other, function)
+
+
+if __name__ == '__main__':
+    unittest.main()
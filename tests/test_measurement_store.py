@@ -0,0 +1,140 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import copy
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+from extrap.entities.callpath import Callpath
+from extrap.entities.coordinate import Coordinate
+from extrap.entities.measurement import Measurement
+from extrap.entities.measurement_store import MeasurementStore
+from extrap.entities.metric import Metric
+from extrap.fileio import experiment_io
+from extrap.fileio.text_file_reader import read_text_file
+from extrap.modelers.model_generator import ModelGenerator
+
+
+class TestMeasurementStore(unittest.TestCase):
+
+    def test_add(self):
+        store = MeasurementStore()
+        callpaths = [Callpath(f'cp{i}') for i in range(10)]
+        coordinates = [Coordinate(i) for i in range(1, 12)]
+        for callpath in callpaths:
+            for coordinate in coordinates:
+                store.add_values(callpath, Metric('time'), coordinate, [coordinate[0], 2 * coordinate[0]])
+        self.assertEqual((10, 1, 11, 5), store.values.shape)
+        self.assertTrue(np.all(store.mask))
+        self.assertEqual(10, len(store))
+
+        measurement = Measurement(Coordinate(3), Callpath('cp4'), Metric('time'), [3, 6])
+        coordinate_ids, values = store.series(Callpath('cp4'), Metric('time'))
+        self.assertListEqual(list(range(11)), list(coordinate_ids))
+        self.assertListEqual([measurement.mean, measurement.median, measurement.minimum, measurement.maximum,
+                              measurement.std], list(values[2]))
+        self.assertEqual(measurement, store.measurements(Callpath('cp4'), Metric('time'))[2])
+        self.assertEqual(4.5, store.statistic('mean')[store.callpath_id(Callpath('cp4')), 0, 2])
+
+        store.remove(Callpath('cp4'), Metric('time'))
+        self.assertEqual(9, len(store))
+        self.assertNotIn((Callpath('cp4'), Metric('time')), store)
+        self.assertFalse(np.any(store.mask[store.callpath_id(Callpath('cp4'))]))
+        self.assertRaises(KeyError, store.series, Callpath('cp4'), Metric('time'))
+
+    def test_view(self):
+        experiment = read_text_file('data/text/two_parameter_1.txt')
+        measurements = dict(experiment.measurements)
+        store = experiment.use_columnar_measurements()
+        self.assertIs(store, experiment.measurement_store)
+        self.assertEqual(len(measurements), len(experiment.measurements))
+        self.assertListEqual(list(measurements.keys()), list(experiment.measurements.keys()))
+        for key, series in measurements.items():
+            self.assertIn(key, experiment.measurements)
+            self.assertListEqual(series, experiment.measurements[key])
+            for m, m_store in zip(series, experiment.measurements[key]):
+                self.assertEqual(m.minimum, m_store.minimum)
+                self.assertEqual(m.maximum, m_store.maximum)
+                self.assertEqual(m.std, m_store.std)
+
+        key = next(iter(measurements))
+        del experiment.measurements[key]
+        self.assertNotIn(key, experiment.measurements)
+        self.assertRaises(KeyError, experiment.measurements.__getitem__, key)
+        experiment.measurements[key] = measurements[key]
+        self.assertListEqual(measurements[key], experiment.measurements[key])
+        # measurements at the same coordinate are not replaced
+        for m in measurements[key]:
+            self.assertRaises(ValueError, experiment.add_measurement, m)
+        self.assertRaises(ValueError, experiment.measurements.__setitem__, key, measurements[key] * 2)
+        self.assertListEqual(measurements[key], experiment.measurements[key])
+
+        experiment.clear_measurements()
+        self.assertIsNotNone(experiment.measurement_store)
+        self.assertEqual(0, len(experiment.measurements))
+
+    def test_write_through(self):
+        experiment = read_text_file('data/text/one_parameter_1.txt')
+        key = next(iter(experiment.measurements))
+        measurements = list(experiment.measurements[key])
+        store = experiment.use_columnar_measurements()
+        callpath, metric = key
+
+        series = experiment.measurements[key]
+        series[1].mean = 42
+        self.assertEqual(42, experiment.measurements[key][1].mean)
+        self.assertEqual(42, experiment.find_measurement(callpath, metric, measurements[1].coordinate).mean)
+        experiment.find_measurement(callpath, metric, measurements[2].coordinate).median = 43
+        self.assertEqual(43, experiment.measurements[key][2].median)
+        self.assertRaises(AttributeError, setattr, series[0], 'coordinate', Coordinate(1000))
+
+        new_measurement = Measurement(Coordinate(1000), callpath, metric, [5])
+        series.append(new_measurement)
+        self.assertEqual(len(measurements) + 1, len(series))
+        self.assertEqual(new_measurement, experiment.measurements[key][-1])
+        self.assertRaises(ValueError, series.append, Measurement(Coordinate(1000), callpath, metric, [6]))
+        self.assertEqual(len(measurements) + 1, len(series))
+        series[-1] = Measurement(Coordinate(1000), callpath, metric, [7])
+        self.assertEqual(7, experiment.measurements[key][-1].mean)
+        del series[0]
+        self.assertListEqual(series, experiment.measurements[key])
+        self.assertIsNone(store.measurement(callpath, metric, measurements[0].coordinate))
+
+        # copies are not connected to the store
+        copied = copy.copy(series[0])
+        copied.coordinate = Coordinate(2000)
+        copied.mean = 44
+        self.assertEqual(measurements[1].coordinate, experiment.measurements[key][0].coordinate)
+        self.assertEqual(42, experiment.measurements[key][0].mean)
+        self.assertEqual(series[0], pickle.loads(pickle.dumps(series[0])))
+
+    def test_modeling(self):
+        experiment = read_text_file('data/text/two_parameter_1.txt')
+        model_generator = ModelGenerator(experiment)
+        model_generator.model_all()
+        experiment.use_columnar_measurements()
+        columnar_model_generator = ModelGenerator(experiment)
+        columnar_model_generator.model_all()
+        for key, model in model_generator.models.items():
+            self.assertEqual(model.hypothesis.function, columnar_model_generator.models[key].hypothesis.function)
+
+    def test_save(self):
+        experiment = read_text_file('data/text/one_parameter_1.txt')
+        experiment.use_columnar_measurements()
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, 'experiment.extra-p')
+        experiment_io.write_experiment(experiment, path)
+        loaded = experiment_io.read_experiment(path)
+        self.assertDictEqual(dict(experiment.measurements), loaded.measurements)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,22 @@
 # This software may be modified and distributed under the terms of a BSD-style license.
 # See the LICENSE file in the base directory for details.
 
+import copy
+
+import numpy
+
 from extrap.entities.callpath import Callpath
+from extrap.entities.coordinate import Coordinate
 from extrap.entities.hypotheses import ConstantHypothesis
 from extrap.entities.hypotheses import SingleParameterHypothesis
+from extrap.entities.measurement import Measurement
 from extrap.entities.metric import Metric
 from extrap.fileio.text_file_reader import read_text_file
+from extrap.modelers.abstract_modeler import AbstractModeler
+from extrap.modelers.constant_series import model_constant_series
 from extrap.modelers.model_generator import ModelGenerator
+from extrap.modelers.single_parameter.basic import SingleParameterModeler
+from extrap.util.progress_bar import DUMMY_PROGRESS
 from tests.modelling_testcase import TestCaseWithFunctionAssertions
 
 
@@ -81,3 +91,147 @@ class TestModeling(TestCaseWithFunctionAssertions):
         for model in experiment.modelers[0].models.values():
             self.assertApproxFunction(first.hypothesis.function, model.hypothesis.function)
             self.assertEqual(first.hypothesis, model.hypothesis)
+
+    def test_parallel_modeling(self):
+        for f in ['data/text/one_parameter_6.txt', 'data/text/two_parameter_1.txt']:
+            experiment = read_text_file(f)
+            model_generator = ModelGenerator(experiment)
+            model_generator.model_all()
+
+            parallel_generator = ModelGenerator(experiment)
+            parallel_generator.model_all(jobs=2)
+            self.assertListEqual(list(model_generator.models.keys()), list(parallel_generator.models.keys()))
+            for key, model in model_generator.models.items():
+                self.assertApproxFunction(model.hypothesis.function, parallel_generator.models[key].hypothesis.function)
+                self.assertApprox(model.hypothesis.SMAPE, parallel_generator.models[key].hypothesis.SMAPE)
+                self.assertIs(experiment.measurements[key], parallel_generator.models[key].measurements)
+
+        # options with on_change callbacks must be transferred to the workers
+        experiment = read_text_file('data/text/one_parameter_6.txt')
+        model_generator = ModelGenerator(experiment)
+        model_generator.modeler.poly_exponents = '3'
+        model_generator.modeler.log_exponents = '0'
+        model_generator.modeler.force_combination_exponents = True
+        model_generator.model_all(jobs=2)
+        for model in model_generator.models.values():
+            for compound_term in model.hypothesis.function.compound_terms:
+                self.assertEqual(3, compound_term.simple_terms[0].exponent)
+
+    def test_deduplicated_modeling(self):
+        experiment = read_text_file('data/text/one_parameter_6.txt')
+        keys = list(experiment.measurements.keys())
+        for metric in ['copy1', 'copy2']:
+            for callpath, _ in keys:
+                for m in experiment.measurements[(callpath, Metric(''))]:
+                    copied = copy.copy(m)
+                    copied.metric = Metric(metric)
+                    experiment.add_measurement(copied)
+
+        model_generator = ModelGenerator(experiment)
+        model_generator.model_all()
+        self.assertEqual(2 * len(keys), model_generator.skipped_searches)
+
+        reference_generator = ModelGenerator(experiment)
+        reference_generator.model_all(deduplicate=False)
+        self.assertEqual(0, reference_generator.skipped_searches)
+        for key, model in reference_generator.models.items():
+            deduplicated_model = model_generator.models[key]
+            self.assertEqual(model.hypothesis, deduplicated_model.hypothesis)
+            self.assertEqual(key, (deduplicated_model.callpath, deduplicated_model.metric))
+            self.assertIs(experiment.measurements[key], deduplicated_model.measurements)
+        for callpath, metric in keys:
+            self.assertIsNot(model_generator.models[callpath, metric].hypothesis,
+                             model_generator.models[callpath, Metric('copy1')].hypothesis)
+
+    def test_deduplicate_lazy_statistics(self):
+        coordinates = [Coordinate(i) for i in range(1, 6)]
+        series = [[Measurement(c, Callpath('main'), Metric('time'), values, use_median=False) for c in coordinates]
+                  for values in ([1, 2, 6], [3, 3, 3], [1, 3, 8])]
+        distinct, indices = ModelGenerator._deduplicate(series, False)
+        self.assertListEqual([0, 0, 1], indices)
+        self.assertIs(series[2], distinct[1])
+        for ms in series:
+            for m in ms:
+                self.assertIsNone(m._median)
+                self.assertIsNone(m._std)
+
+        distinct, indices = ModelGenerator._deduplicate(series, True)
+        self.assertListEqual([0, 1, 1], indices)
+
+    def test_model_iter(self):
+        experiment = read_text_file('data/text/one_parameter_6.txt')
+        reference_generator = ModelGenerator(experiment)
+        reference_generator.model_all()
+
+        model_generator = ModelGenerator(experiment)
+        streamed = []
+        for key, model in model_generator.model_iter():
+            self.assertEqual(key, (model.callpath, model.metric))
+            self.assertNotIn(model_generator, experiment.modelers)
+            streamed.append((key, model))
+        self.assertIn(model_generator, experiment.modelers)
+        self.assertCountEqual(experiment.measurements.keys(), [key for key, _ in streamed])
+        self.assertListEqual(list(experiment.measurements.keys()), list(model_generator.models.keys()))
+
+        searched = [key for key, model in streamed if not isinstance(model.hypothesis, ConstantHypothesis)]
+        maxima = [max(m.mean for m in experiment.measurements[key]) for key in searched]
+        self.assertListEqual(sorted(maxima, reverse=True), maxima)
+        for key, model in streamed:
+            self.assertIs(model, model_generator.models[key])
+            self.assertApproxFunction(reference_generator.models[key].hypothesis.function, model.hypothesis.function)
+
+        callback_keys = []
+        ordered_generator = ModelGenerator(experiment)
+        ordered_generator.model_all(order_by_importance=True, callback=lambda key, model: callback_keys.append(key))
+        self.assertListEqual([key for key, _ in streamed], callback_keys)
+
+    def test_evaluate(self):
+        experiment = read_text_file('data/text/two_parameter_3.txt')
+        model_generator = ModelGenerator(experiment)
+        model_generator.model_all()
+        coordinates = [Coordinate(64000, 8), Coordinate(1024, 2), Coordinate(20, 30)]
+        points = numpy.array([c.as_tuple() for c in coordinates]).T
+
+        keys, values = model_generator.evaluate(coordinates)
+        self.assertListEqual(list(model_generator.models.keys()), keys)
+        self.assertEqual((len(keys), len(coordinates)), values.shape)
+        for key, row in zip(keys, values):
+            function = model_generator.models[key].hypothesis.function
+            numpy.testing.assert_array_equal(function.evaluate(points), row)
+        numpy.testing.assert_array_equal(values, model_generator.evaluate(points).values)
+
+        subset = keys[::-2]
+        evaluation = model_generator.evaluate(points, subset)
+        self.assertListEqual(subset, evaluation.keys)
+        numpy.testing.assert_array_equal(values[::-2], evaluation.values)
+
+    def test_constant_series(self):
+        experiment = read_text_file('data/text/one_parameter_6.txt')
+        coordinates = experiment.coordinates
+        for i, value in enumerate([0, 0.1, 3, -2.5, 1e-300, 0.9]):
+            for coordinate in coordinates:
+                experiment.add_measurement(Measurement(coordinate, Callpath(f'const{i}'), Metric(''), [value] * 3))
+
+        models = model_constant_series(list(experiment.measurements.values()), False)
+        # the mean of 0.9 differs from the values in the last bit, so the series is searched like by the modelers
+        self.assertEqual([None] * 4 + [ConstantHypothesis] * 5 + [None],
+                         [model and type(model.hypothesis) for model in models])
+
+        model_generator = ModelGenerator(experiment)
+        model_generator.model_all()
+        reference_models = model_generator.modeler.model(list(experiment.measurements.values()))
+        for key, reference_model in zip(experiment.measurements.keys(), reference_models):
+            self.assertEqual(reference_model.hypothesis, model_generator.models[key].hypothesis)
+
+        # modelers that do not create the constant models themselves receive all series
+        class CountingModeler(SingleParameterModeler):
+            def model_constant_series(self, measurements):
+                return AbstractModeler.model_constant_series(self, measurements)
+
+            def model(self, measurements, progress_bar=DUMMY_PROGRESS):
+                self.modeled = len(measurements)
+                return super().model(measurements, progress_bar)
+
+        modeler = CountingModeler()
+        ModelGenerator(experiment, modeler).model_all(deduplicate=False)
+        self.assertEqual(len(experiment.measurements), modeler.modeled)
@@ -14,13 +14,17 @@ import numpy as np
 from extrap.entities.callpath import Callpath
 from extrap.entities.coordinate import Coordinate
 from extrap.entities.functions import MultiParameterFunction
+from extrap.entities.hypotheses import MultiParameterHypothesis
 from extrap.entities.measurement import Measurement
 from extrap.entities.metric import Metric
 from extrap.entities.terms import CompoundTerm, MultiParameterTerm
 from extrap.fileio.jsonlines_file_reader import read_jsonlines_file
 from extrap.fileio.text_file_reader import read_text_file
 from extrap.modelers.model_generator import ModelGenerator
-from extrap.modelers.multi_parameter.multi_parameter_modeler import MultiParameterModeler
+from extrap.modelers.multi_parameter.multi_parameter_modeler import MultiParameterModeler, TermColumnStore, \
+    TermColumnCache
+from extrap.modelers.multi_parameter.sum_of_products import SumOfProductsEnumerator
+from extrap.util.caching import LRUCache
 from tests.modelling_testcase import TestCaseWithFunctionAssertions
 
 
@@ -444,6 +448,181 @@ class TestSparseModeling(TestCaseWithFunctionAssertions):
             self.assertEqual(1, len(models))
             self.assertApproxFunction(function, models[0].hypothesis.function)
 
+    def test_modeling_4p_sum_of_products(self):
+        points = np.array(list(zip(*itertools.product([2, 4, 8, 16, 32], repeat=4))))
+        term_xy = MultiParameterTerm((0, CompoundTerm.create(1, 1, 0)), (1, CompoundTerm.create(1, 2, 0)))
+        term_zw = MultiParameterTerm((2, CompoundTerm.create(0, 1, 1)), (3, CompoundTerm.create(2, 1, 0)))
+        term_xy.coefficient = 3
+        term_zw.coefficient = 5
+        function = MultiParameterFunction(term_xy, term_zw)
+        function.constant_coefficient = 50
+
+        values = function.evaluate(points)
+        measurements = [Measurement(Coordinate(p), None, None, v) for p, v in zip(zip(*points), values)]
+        modeler = MultiParameterModeler()
+
+        models = modeler.model([measurements])
+        self.assertEqual(1, len(models))
+        self.assertApproxFunction(function, models[0].hypothesis.function)
+
+    def test_sum_of_products_budget(self):
+        points = np.array(list(zip(*itertools.product([2, 4, 8, 16], repeat=5))), dtype=float)
+        terms = [(i, CompoundTerm.create(1, 1, 0)) for i in range(5)]
+        values = MultiParameterTerm(*terms).evaluate(points) + 100
+        store = TermColumnStore(points)
+        enumerator = SumOfProductsEnumerator(terms, store, values, 0.0005, 50)
+        functions = list(enumerator)
+        self.assertLessEqual(enumerator.examined, 50)
+        for function in functions:
+            parameters = {p for term in function for p, _ in term.parameter_term_pairs}
+            self.assertSetEqual({0, 1, 2, 3, 4}, parameters)
+
+    def test_sum_of_products_rss(self):
+        points = np.array(list(zip(*itertools.product([2, 4, 8, 16], repeat=4))), dtype=float)
+        terms = [(i, CompoundTerm.create(1, 1, 0)) for i in range(4)]
+        function = MultiParameterFunction(MultiParameterTerm(*terms[:2]), MultiParameterTerm(*terms[2:]))
+        function.constant_coefficient = 1e6
+        values = function.evaluate(points) + np.random.default_rng(1).normal(0, 1e-3, points.shape[1])
+        enumerator = SumOfProductsEnumerator(terms, TermColumnStore(points), values, 0.0005, 1000)
+        self.assertEqual(SumOfProductsEnumerator.DEFAULT_MAX_TERMS, enumerator.max_terms)
+        # the RSS of a good fit is not lost to cancellation
+        t = [enumerator._subsets.index(subset) for subset in [(0, 1), (2, 3)]]
+        coefficients, rss = enumerator._solve(t)
+        function.constant_coefficient = coefficients[0]
+        for term, coefficient in zip(function, coefficients[1:]):
+            term.coefficient = coefficient
+        residuals = values - function.evaluate(points)
+        self.assertAlmostEqual(residuals @ residuals, rss, delta=1e-6 * rss)
+        for function in enumerator:
+            self.assertLessEqual(len(function.compound_terms), SumOfProductsEnumerator.DEFAULT_MAX_TERMS)
+
+    def test_single_parameter_jobs(self):
+        points = np.array(list(zip(*itertools.product([2, 4, 8, 16, 32], repeat=3))))
+        term = MultiParameterTerm((0, CompoundTerm.create(1, 1, 0)), (1, CompoundTerm.create(1, 2, 0)),
+                                  (2, CompoundTerm.create(0, 1, 1)))
+        term.coefficient = 3
+        function = MultiParameterFunction(term)
+        function.constant_coefficient = 50
+        values = function.evaluate(points)
+        measurements = [Measurement(Coordinate(p), None, None, v) for p, v in zip(zip(*points), values)]
+
+        modeler = MultiParameterModeler()
+        modeler.single_parameter_jobs = 3
+        models = modeler.model([measurements])
+        self.assertApproxFunction(function, models[0].hypothesis.function)
+
+        experiment = read_text_file('data/text/two_parameter_1.txt')
+        series = list(experiment.measurements.values()) * 3
+        serial_modeler = MultiParameterModeler()
+        serial_modeler.single_parameter_modeler.use_batched_search = False
+        serial_modeler.single_parameter_modeler.crossvalidation_method = 'reference'
+        serial_models = serial_modeler.model(series)
+        modeler.reset_single_parameter_modeler()
+        modeler.single_parameter_modeler.use_batched_search = False
+        modeler.single_parameter_modeler.crossvalidation_method = 'reference'
+        models = modeler.model(series)
+        self.assertGreater(modeler.single_parameter_modeler.pruned_by_bound, 0)
+        for serial_model, model in zip(serial_models, models):
+            self.assertEqual(serial_model.hypothesis, model.hypothesis)
+        self.assertEqual(serial_modeler.single_parameter_modeler.pruned_by_bound,
+                         modeler.single_parameter_modeler.pruned_by_bound)
+        self.assertEqual(serial_modeler.single_parameter_modeler.pruned_by_contribution,
+                         modeler.single_parameter_modeler.pruned_by_contribution)
+
+    def test_measurement_point_layout_cache(self):
+        points = list(itertools.product([2, 4, 8, 16, 32], [10, 20, 30, 40, 50]))
+        other_points = list(itertools.product([1, 3, 5, 7, 9, 11], [10, 20, 30, 40, 50]))
+        modeler = MultiParameterModeler()
+        first = [Measurement(Coordinate(p), None, None, p[0] * p[1]) for p in points]
+        second = [Measurement(Coordinate(p), None, None, p[0] + p[1]) for p in points]
+        other = [Measurement(Coordinate(p), None, None, p[0] + p[1]) for p in other_points]
+        expected = [modeler.find_best_measurement_points(ms) for ms in (second, other)]
+        self.assertEqual(2, len(modeler._measurement_point_layouts))
+
+        # the layouts are cached per call of model, the cached layouts give the same results
+        layouts = []
+        find_layout = modeler._find_best_measurement_point_layout
+        modeler._find_best_measurement_point_layout = lambda c: layouts.append(c) or find_layout(c)
+        modeler.model([first])
+        self.assertEqual(1, len(layouts))
+        self.assertEqual(0, len(modeler._measurement_point_layouts))
+        actual = []
+        modeler.find_best_measurement_points(first)
+        for ms in (second, other):
+            actual.append(modeler.find_best_measurement_points(ms))
+        self.assertEqual(3, len(layouts))
+        for expected_sp, actual_sp in zip(expected, actual):
+            for expected_ms, actual_ms in zip(expected_sp, actual_sp):
+                self.assertListEqual([(m.coordinate, m.mean) for m in expected_ms],
+                                     [(m.coordinate, m.mean) for m in actual_ms])
+
+    def test_compute_cost(self):
+        term = MultiParameterTerm((0, CompoundTerm.create(3, 2, 1)), (1, CompoundTerm.create(1, 3, 0)))
+        function = MultiParameterFunction(term, MultiParameterTerm((1, CompoundTerm.create(1, 1, 2))))
+        function.constant_coefficient = 200
+        rng = np.random.default_rng(1)
+        measurements = [Measurement(Coordinate(x, y), None, None, rng.uniform(1, 5000))
+                        for x, y in itertools.product([2, 4, 8, 16, 32], [10, 20, 30, 40, 50])]
+        hypothesis = MultiParameterHypothesis(function, False)
+        hypothesis.compute_coefficients(measurements)
+        hypothesis.compute_cost(measurements)
+
+        rss, rrss, smape, re = 0, 0, 0, 0
+        for m in measurements:
+            predicted = function.evaluate({0: float(m.coordinate[0]), 1: float(m.coordinate[1])})
+            difference = predicted - m.mean
+            rss += difference * difference
+            rrss += (difference / m.mean) * (difference / m.mean)
+            smape += abs(difference) / (abs(m.mean) + abs(predicted)) * 2
+            re += abs(difference) / m.mean
+        self.assertEqual(rss, hypothesis.RSS)
+        self.assertEqual(rrss, hypothesis.rRSS)
+        self.assertEqual(smape / len(measurements) * 100, hypothesis.SMAPE)
+        self.assertEqual(re / len(measurements), hypothesis.RE)
+
+    def test_term_column_store(self):
+        x_term, y_term = CompoundTerm.create(3, 2, 1), CompoundTerm.create(1, 3, 0)
+        mult = MultiParameterTerm((0, x_term), (1, y_term))
+        add = MultiParameterTerm((1, y_term))
+        coordinates = np.array(list(itertools.product([2, 4, 8, 16, 32], [10, 20, 30, 40, 50])), dtype=float).T
+        store = TermColumnStore(coordinates)
+        columns = store.function_columns(MultiParameterFunction(mult, add))
+        np.testing.assert_array_equal(mult.evaluate(coordinates), columns[0])
+        np.testing.assert_array_equal(add.evaluate(coordinates), columns[1])
+        self.assertIs(columns[0], store.function_columns(MultiParameterFunction(mult))[0])
+        self.assertIs(store.parameter_column(1, y_term), store.parameter_column(1, y_term))
+
+    def test_term_column_cache(self):
+        experiment = read_text_file('data/text/two_parameter_1.txt')
+        series = list(experiment.measurements.values())
+        # the same coordinates with other values
+        series.append([Measurement(m.coordinate, None, None, m.mean * 2 + 1) for m in series[0]])
+        expected = [MultiParameterModeler().model([ms])[0] for ms in series]
+        modeler = MultiParameterModeler()
+        models = modeler.model(series)
+        self.assertGreater(modeler.term_column_hits, 0)
+        self.assertGreater(modeler.term_column_misses, 0)
+        self.assertIsNone(modeler._term_column_cache)
+        for expected_model, model in zip(expected, models):
+            self.assertEqual(expected_model.hypothesis, model.hypothesis)
+
+        cache = TermColumnCache()
+        coordinates = cache.coordinates(series[0])
+        self.assertIs(coordinates, cache.coordinates(series[-1]))
+        self.assertFalse(coordinates.flags.writeable)
+        term = CompoundTerm.create(1, 2, 1)
+        column = cache.column(coordinates, 0, term, lambda: term.evaluate(coordinates[0]))
+        self.assertIs(column, cache.column(coordinates, 0, CompoundTerm.create(1, 2, 1), lambda: None))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+        lru_cache = LRUCache(maxsize=2)
+        lru_cache.get('a', lambda: 1)
+        lru_cache.get('b', lambda: 2)
+        self.assertEqual(1, lru_cache.get('a', lambda: 3))
+        lru_cache.get('c', lambda: 4)
+        self.assertEqual(5, lru_cache.get('b', lambda: 5))
+        self.assertEqual((1, 4, 2, 2), tuple(lru_cache.info()))
+
 
 class TestFindBestMeasurements(unittest.TestCase):
 
@@ -716,3 +895,20 @@ class TestFindBestMeasurements(unittest.TestCase):
             Coordinate(c) for c in reversed(range(1, 5 + 1))
         ])
         self.assertListEqual([4] * 4 + [0], [m.mean for m in f_msm[2]])
+
+    def test_combined_values(self):
+        modeler = MultiParameterModeler()
+        measurements = [Measurement(Coordinate(x, y), None, None, [(x + y) * v for v in (1, 2, 6)])
+                        for x, y in itertools.product([1, 2, 3], [0, 10, 20])]
+        measurements[0] = Measurement(Coordinate(1, 0), None, None, [0, 0, 0])
+        f_msm = modeler.find_best_measurement_points(measurements)
+
+        for p, combined in enumerate(f_msm):
+            self.assertEqual(3, len(combined))
+            for m in combined:
+                group = [o for o in measurements if o.coordinate[p] == m.coordinate[0]]
+                self.assertEqual(np.mean([o.mean for o in group]), m.mean)
+                self.assertEqual(m.mean, m.median)
+                self.assertEqual(np.nanmean([o.maximum / o.mean for o in group]) * m.mean, m.maximum)
+                self.assertEqual(np.nanmean([o.minimum / o.mean for o in group]) * m.mean, m.minimum)
+                self.assertEqual(np.nanmean([o.std / o.mean for o in group]) * m.mean, m.std)
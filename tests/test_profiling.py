@@ -0,0 +1,82 @@
+# This file is part of the Extra-P software (http://www.scalasca.org/software/extra-p)
+#
+# Copyright (c) 2021, Technical University of Darmstadt, Germany
+#
+# This software may be modified and distributed under the terms of a BSD-style license.
+# See the LICENSE file in the base directory for details.
+
+import unittest
+
+import numpy
+
+from extrap.entities.hypotheses import SingleParameterHypothesis
+from extrap.fileio.text_file_reader import read_text_file
+from extrap.modelers.model_generator import ModelGenerator
+from extrap.modelers.profiling import ModelingProfiler
+from extrap.modelers.single_parameter.basic import SingleParameterModeler
+from extrap.util.progress_bar import ProgressBar
+
+
+class TestModelingProfiler(unittest.TestCase):
+
+    def test_single_parameter(self):
+        experiment = read_text_file('data/text/one_parameter_1.txt')
+        modeler = SingleParameterModeler()
+        modeler.use_batched_search = False
+        model_generator = ModelGenerator(experiment, modeler)
+        with ModelingProfiler() as profiler:
+            model_generator.model_all()
+        report = profiler.report()
+
+        self.assertEqual(1, report.phases['ModelGenerator.model_all'].calls)
+        self.assertEqual(len(experiment.measurements), report.phases['SingleParameterModeler.create_model'].calls)
+        for phase in ['find_best_hypothesis', 'compute_coefficients', 'compute_cost', 'calc_term_contribution']:
+            self.assertGreater(report.phases[phase].calls, 0, phase)
+        for statistics in report.phases.values():
+            self.assertLessEqual(statistics.max_time, statistics.total_time)
+            self.assertLessEqual(statistics.total_time, report.total_time)
+        self.assertEqual(len(experiment.measurements), len(report.slowest_series))
+        self.assertEqual(sorted((s.time for s in report.slowest_series), reverse=True),
+                         [s.time for s in report.slowest_series])
+        self.assertIn('find_best_hypothesis', str(report))
+
+    def test_multi_parameter(self):
+        experiment = read_text_file('data/text/two_parameter_3.txt')
+        model_generator = ModelGenerator(experiment)
+        with ModelingProfiler(slowest_series=1) as profiler:
+            model_generator.model_all()
+        report = profiler.report()
+
+        self.assertIn('MultiParameterModeler.create_model', report.phases)
+        self.assertEqual(1, len(report.slowest_series))
+        # the series of the single-parameter modelers are part of the multi-parameter series
+        slowest = report.slowest_series[0]
+        self.assertLessEqual(report.phases['MultiParameterModeler.create_model'].max_time, slowest.time)
+
+    def test_restore(self):
+        lstsq = numpy.linalg.lstsq
+        compute_cost = SingleParameterHypothesis.compute_cost
+        profiler = ModelingProfiler()
+        profiler.enable()
+        self.assertIsNot(lstsq, numpy.linalg.lstsq)
+        self.assertIn('update', vars(ProgressBar))
+        self.assertRaises(RuntimeError, ModelingProfiler().enable)
+        profiler.disable()
+        self.assertIs(lstsq, numpy.linalg.lstsq)
+        self.assertIs(compute_cost, SingleParameterHypothesis.compute_cost)
+        self.assertNotIn('update', vars(ProgressBar))
+        self.assertFalse(profiler.enabled)
+
+    def test_results_unchanged(self):
+        experiment = read_text_file('data/text/one_parameter_6.txt')
+        model_generator = ModelGenerator(experiment)
+        model_generator.model_all()
+        profiled_model_generator = ModelGenerator(experiment)
+        with ModelingProfiler():
+            profiled_model_generator.model_all()
+        for key, model in model_generator.models.items():
+            self.assertEqual(model.hypothesis.function, profiled_model_generator.models[key].hypothesis.function)
+
+
+if __name__ == '__main__':
+    unittest.main()
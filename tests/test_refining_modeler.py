@@ -204,3 +204,22 @@ class TestRefiningModeler(TestCaseWithFunctionAssertions):
             hypothesis = SingleParameterHypothesis(function, False)
             hypothesis.compute_cost(measurements)
             self.assertApproxFunction(function, models[0].hypothesis.function)
+
+    def test_memoized_fits(self):
+        points = [4, 8, 16, 32, 64, 128]
+        term = CompoundTerm.create(3, 2, 1)
+        term.coefficient = 3
+        function = SingleParameterFunction(term)
+        function.constant_coefficient = 50
+        measurements = [Measurement(Coordinate(p), None, None, function.evaluate(p)) for p in points]
+
+        modeler = RefiningModeler()
+        models = modeler.model([measurements])
+        self.assertApproxFunction(function, models[0].hypothesis.function)
+        self.assertGreater(modeler.fits_performed, 0)
+        self.assertGreater(modeler.fits_saved, 0)
+
+        modeler = RefiningModeler()
+        modeler.slice_jobs = 3
+        concurrent_models = modeler.model([measurements])
+        self.assertApproxFunction(models[0].hypothesis.function, concurrent_models[0].hypothesis.function)